@@ -1,15 +1,28 @@
 import os
-import time
+import argparse
+import asyncio
+import threading
 import feedparser
-import newspaper
-from newspaper import Article
 import google.generativeai as genai
 from supabase import create_client, Client
 from dotenv import load_dotenv
-from datetime import datetime, timezone
-import requests
-from bs4 import BeautifulSoup
-from google.api_core import exceptions
+from datetime import datetime, timezone, timedelta
+from news_writer import NewsWriter
+from http_fetch import fetch as fetch_page, get_session, HEADERS
+from http_fetch import report as report_http
+from extractors import extract_article
+from feed_cache import FeedCache
+from seen_index import SeenIndex
+from dedup import fetch_existing_links
+from rate_limit import HostRateLimiter
+from gemini_batch import summarize_batch, truncate_words
+from summary_cache import SummaryCache
+from gemini_scheduler import GeminiScheduler, QuotaExhausted, parse_models, GEMINI_MODELS
+from summarizer_engine import get_engine
+from gemini_stream import GeminiStream, GEMINI_CONCURRENCY
+import metrics
+from metrics import (FEEDS_FETCHED, ENTRIES_SEEN, ENTRIES_DEDUPED, ARTICLES_SUMMARIZED,
+                     ARTICLES_SAVED, FAILURES, STAGE_SECONDS)
 
 # Load environment variables
 load_dotenv()
@@ -24,6 +37,8 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 # Configure Gemini
 genai.configure(api_key=GEMINI_API_KEY)
 # Using the requested model
+# Switching to 1.5-flash as 2.0-flash-lite is hitting immediate quota limits
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 GENERATION_CONFIG = {
     "temperature": 0.5,
     "top_p": 0.8,
@@ -36,15 +51,53 @@ SYSTEM_INSTRUCTION = (
     "Your task is to distill the provided article into a punchy, factual, and objective summary."
 )
 
-def get_gemini_model():
-    # Switching to 1.5-flash as 2.0-flash-lite is hitting immediate quota limits
-    model_name = "gemini-1.5-flash" 
+# ETag / Last-Modified validators for source feeds
+feed_cache = FeedCache()
+
+# Local index of links already stored, shared with main.py
+seen_index = SeenIndex()
+
+# Entries older than this are never scraped
+FRESHNESS_DAYS = float(os.getenv("FRESHNESS_DAYS", "2"))
+# New articles scraped per source per cycle
+MAX_ARTICLES_PER_SOURCE = int(os.getenv("MAX_ARTICLES_PER_SOURCE", "5"))
+
+# Per-cycle counters and links a source started processing this cycle
+cycle_stats = {}
+claimed_links = set()
+_cycle_lock = threading.Lock()
+
+# Free tier allows ~15 requests/minute; the scheduler keeps 10% headroom
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+# Used while every Gemini model is out of quota: "lexrank" or "none"
+GEMINI_FALLBACK = os.getenv("GEMINI_FALLBACK", "lexrank")
+
+# Per-host token buckets for article sites
+rate_limiter = HostRateLimiter()
+
+# Summaries keyed by article text, so re-scrapes and wire copies skip Gemini
+summary_cache = SummaryCache()
+
+def gemini_cache_params(model):
+    """Cache key parameters; a summary is stored under the model that wrote it."""
+    return {"model": model, "max_words": 2000}
+
+def cached_gemini_summary(text):
+    """A cached summary by any configured model, preferring them in priority order."""
+    return summary_cache.get_first(text, "gemini",
+                                   [gemini_cache_params(budget.name) for budget in gemini.budgets])
+
+def get_gemini_model(model_name=GEMINI_MODEL):
     return genai.GenerativeModel(
         model_name=model_name,
         generation_config=GENERATION_CONFIG,
         system_instruction=SYSTEM_INSTRUCTION
     )
 
+# Paces calls per model (GEMINI_MODELS="name:rpm:tpm,...") and cascades on quota errors
+gemini = GeminiScheduler(parse_models(GEMINI_MODELS, GEMINI_MODEL, GEMINI_RPM, GEMINI_TPM), get_gemini_model)
+
 def clear_news_items():
     """Clears the news_items table completely."""
     print("Clearing news_items table...", flush=True)
@@ -65,159 +118,392 @@ def get_active_sources():
 
 def scrape_article(url):
     """
-    Extracts Main Article Text and Top Image URL using Newspaper3k.
-    Falls back to basic BS4 if Newspaper3k fails.
+    Downloads the article once and extracts the main text and top image
+    URL, with Newspaper3k first and lxml on the same bytes as a fallback.
     """
     try:
-        # Newspaper3k
-        article = Article(url)
-        article.download()
-        article.parse()
-        
-        text = article.text
-        image_url = article.top_image
-        
-        if not text or len(text.strip()) < 100:
-            raise Exception("Newspaper3k returned empty/short text")
-            
-        return text, image_url
-        
+        page = fetch_page(url)
     except Exception as e:
-        print(f"Newspaper3k failed for {url}: {e}. Trying BS4 fallback...", flush=True)
-        try:
-            # Simple fallback
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Simple paragraph extractions
-            paragraphs = soup.find_all('p')
-            text = " ".join([p.get_text() for p in paragraphs])
-            
-            # Try to find og:image
-            image_url = None
-            og_image = soup.find("meta", property="og:image")
-            if og_image:
-                image_url = og_image.get("content")
-                
-            return text, image_url
-            
-        except Exception as e2:
-            print(f"Scraping failed completely for {url}: {e2}", flush=True)
-            return None, None
+        print(f"Scraping failed completely for {url}: {e}", flush=True)
+        return None, None
+    return extract_article(page)
 
-def summarize_with_gemini(text):
-    """
-    Generates a 3-5 line summary using Gemini.
-    """
-    model = get_gemini_model()
-    
+def gemini_prompt(text):
     # Limit text to 2000 words
     words = text.split()
     if len(words) > 2000:
         text = " ".join(words[:2000])
         
-    prompt = (
+    return (
         "Summarize the following news article in exactly 3 to 5 lines. "
         "Focus only on the core facts. No fluff. No 'According to the article' phrases.\n\n"
         f"Article Text: {text}"
     )
-    
-    retries = 3
-    for attempt in range(retries):
-        try:
-            response = model.generate_content(prompt)
-            return response.text.strip()
-        except exceptions.ResourceExhausted as e:
-            wait_time = 60 * (attempt + 1)
-            print(f"Quota exceeded. Waiting {wait_time} seconds before retry...", flush=True)
-            time.sleep(wait_time)
-        except Exception as e:
-            print(f"Gemini summarization failed: {e}", flush=True)
-            return None
-    return None
-
-def save_news_item(item):
-    """Saves the processed item to news_items table."""
+
+def summarize_with_gemini(text):
+    """
+    Generates a 3-5 line summary using Gemini. Returns (summary, model name).
+    Raises QuotaExhausted when every configured model is out of quota.
+    """
     try:
-        data = {
-            "title": item["title"],
-            "source_name": item["source_name"],
-            "source_id": item.get("source_id"),
-            "summary_text": item["summary_text"],
-            "link": item["link"],
-            "image_url": item["image_url"],
-            "published_at": item["published_at"].isoformat()
-        }
-        
-        supabase.table("news_items").insert(data).execute()
-        print(f"Saved: {item['title']}", flush=True)
+        response = gemini.generate_content(gemini_prompt(text))
+        return response.text.strip(), getattr(response, "model_name", GEMINI_MODEL)
+    except QuotaExhausted:
+        raise
+    except Exception as e:
+        print(f"Gemini summarization failed: {e}", flush=True)
+        return None, None
+
+def fallback_summary(text):
+    """Local LexRank summary for when Gemini has no quota left."""
+    if GEMINI_FALLBACK != "lexrank":
+        return None
+    FAILURES.inc(stage="gemini_quota")
+    print("Gemini quota exhausted, using LexRank fallback.", flush=True)
+    summary, _ = get_engine().summarize_text(text, 4)
+    return summary
+
+def summarize_cached(text):
+    """
+    Looks the article up in the summary cache before calling Gemini.
+    Summaries are stored under the model that wrote them. Returns (summary,
+    summarizer), the summarizer being "cache", "gemini" or "lexrank_fallback".
+    """
+    summary = cached_gemini_summary(text)
+    if summary:
+        return summary, "cache"
+    try:
+        summary, model = summarize_with_gemini(text)
+    except QuotaExhausted:
+        return fallback_summary(text), "lexrank_fallback"
+    summary_cache.put(text, "gemini", summary, gemini_cache_params(model))
+    return summary, "gemini"
+
+async def summarize_with_gemini_async(text):
+    """Async form of summarize_with_gemini for the concurrent pipeline."""
+    try:
+        response = await gemini.generate_content_async(gemini_prompt(text))
+        return response.text.strip(), getattr(response, "model_name", GEMINI_MODEL)
+    except QuotaExhausted:
+        raise
+    except Exception as e:
+        print(f"Gemini summarization failed: {e}", flush=True)
+        return None, None
+
+async def summarize_cached_async(text):
+    # SummaryCache is SQLite; keep its I/O off the event loop
+    summary = await asyncio.to_thread(cached_gemini_summary, text)
+    if summary:
+        return summary, "cache"
+    try:
+        summary, model = await summarize_with_gemini_async(text)
+    except QuotaExhausted:
+        # LexRank is CPU bound; keep it off the event loop
+        return await asyncio.to_thread(fallback_summary, text), "lexrank_fallback"
+    await asyncio.to_thread(summary_cache.put, text, "gemini", summary, gemini_cache_params(model))
+    return summary, "gemini"
+
+# Write-behind writer for news_items, open for the length of a cycle
+writer = None
+
+def save_news_item(item, summarizer):
+    """Queues the processed item for a batched upsert to news_items."""
+    try:
+        writer.add(item)
+        seen_index.add([item["link"]])
+        count_cycle("summarized")
+        ARTICLES_SUMMARIZED.inc(source=item["source_name"], summarizer=summarizer)
+        ARTICLES_SAVED.inc(source=item["source_name"])
+        feed_cache.resolve([item["link"]])
+        print(f"Queued: {item['title']}", flush=True)
         
     except Exception as e:
+        FAILURES.inc(stage="save", source=item["source_name"])
+        retry_later(item)
         print(f"Error saving {item['title']}: {e}", flush=True)
 
-def process_source(source):
-    print(f"Fetching from {source['source_name']}...", flush=True)
+def count_cycle(key, n=1):
+    with _cycle_lock:
+        cycle_stats[key] = cycle_stats.get(key, 0) + n
+
+def reset_cycle():
+    with _cycle_lock:
+        cycle_stats.clear()
+        claimed_links.clear()
+
+def claim(link, source_name=None):
+    """
+    Claims a link for this cycle right before it is scraped. False when
+    another source got to it first; entries deferred by the per-source
+    cap are never claimed, so other feeds carrying them still can.
+    """
+    with _cycle_lock:
+        if link not in claimed_links:
+            claimed_links.add(link)
+            return True
+        cycle_stats["skipped_existing"] = cycle_stats.get("skipped_existing", 0) + 1
+    ENTRIES_DEDUPED.inc(source=source_name, reason="claimed")
+    return False
+
+def retry_later(item, failed=True):
+    """Keeps the item's entry in the feed cache's retry table for the next run."""
+    feed_cache.retry_later(item["source_name"], item, failed)
+
+def get_published_time(entry):
+    if hasattr(entry, 'published_parsed') and entry.published_parsed:
+        return datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
+    return datetime.now(timezone.utc)
+
+def new_entries(entries, source_name=None):
+    """
+    Filters feed entries before anything is scraped: drops entries outside
+    the freshness window, then links already in news_items (one bulk
+    lookup through the seen index) and links another source claimed this
+    cycle. Nothing is claimed here; see claim().
+    Returns (entry, published_dt) pairs in feed order.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=FRESHNESS_DAYS)
+    fresh = []
+    for entry in entries:
+        if not entry.get("link"):
+            continue
+        published_dt = get_published_time(entry)
+        if published_dt < cutoff:
+            count_cycle("skipped_stale")
+            ENTRIES_DEDUPED.inc(source=source_name, reason="stale")
+            continue
+        fresh.append((entry, published_dt))
+
+    with STAGE_SECONDS.time(stage="dedup", source=source_name):
+        existing = fetch_existing_links(supabase, [entry.link for entry, _ in fresh], index=seen_index)
+
+    new = []
+    claimed = 0
+    with _cycle_lock:
+        for entry, published_dt in fresh:
+            if entry.link in existing or entry.link in claimed_links:
+                cycle_stats["skipped_existing"] = cycle_stats.get("skipped_existing", 0) + 1
+                claimed += entry.link not in existing
+                continue
+            new.append((entry, published_dt))
+    ENTRIES_DEDUPED.inc(len(fresh) - len(new) - claimed, source=source_name, reason="existing")
+    ENTRIES_DEDUPED.inc(claimed, source=source_name, reason="claimed")
+    return new
+
+def entry_item(source, entry, published_dt):
+    """The news_items row for a feed entry, before scraping and summarizing."""
+    return {
+        "title": entry.title,
+        "source_name": source['source_name'],
+        "source_id": source['id'],
+        "link": entry.link,
+        "image_url": entry.media_content[0]['url'] if 'media_content' in entry else None,
+        "published_at": published_dt
+    }
+
+def report_cycle():
+    skipped = cycle_stats.get("skipped_existing", 0) + cycle_stats.get("skipped_stale", 0)
+    print(f"Cycle: {skipped} entries skipped ({cycle_stats.get('skipped_existing', 0)} already stored, "
+          f"{cycle_stats.get('skipped_stale', 0)} stale), {cycle_stats.get('scraped', 0)} scraped, "
+          f"{cycle_stats.get('summarized', 0)} summarized.", flush=True)
+
+def process_source(source, pending=None):
+    """
+    Scrapes and summarizes the newest entries of one source.
+    With a `pending` list, scraped articles are queued there for
+    summarize_pending() instead of being summarized one by one; a
+    GeminiStream summarizes them concurrently as they are appended.
+    Entries waiting in the retry table go first, also when the feed
+    itself answers 304.
+    """
+    source_name = source['source_name']
+    print(f"Fetching from {source_name}...", flush=True)
     feed_url = source['rss_url']
     
     try:
-        feed = feedparser.parse(feed_url)
+        rate_limiter.wait(feed_url, source_name)
+        with STAGE_SECONDS.time(stage="feed", source=source_name):
+            fetched = feed_cache.fetch(source_name, feed_url, HEADERS, session=get_session())
+        if fetched.content is None:
+            FEEDS_FETCHED.inc(source=source_name, status="not_modified")
+            feed_entries = []
+        else:
+            feed_entries = feedparser.parse(fetched.content).entries
+            FEEDS_FETCHED.inc(source=source_name, status="ok")
+            ENTRIES_SEEN.inc(len(feed_entries), source=source_name)
     except Exception as e:
+        FEEDS_FETCHED.inc(source=source_name, status="error")
         print(f"Error parsing feed {feed_url}: {e}", flush=True)
         return
+
+    entries, retried = feed_cache.with_retries(source_name, feed_entries)
+    if not entries:
+        print(f"{source_name}: nothing new, skipping.", flush=True)
+        if pending is None:
+            feed_cache.commit(fetched)
+        return fetched
+    candidates = new_entries(entries, source_name)
+    # Retried links that went stale or got stored meanwhile are done
+    feed_cache.resolve(retried - {entry.link for entry, _ in candidates})
     
-    # Process mostly the top entries to save time/tokens if there are many sources
+    # Fill the per-source quota from entries that are fresh and not stored yet
     count = 0
-    max_articles = 5 
     
-    for entry in feed.entries:
-        if count >= max_articles:
+    for i, (entry, published_dt) in enumerate(candidates):
+        if count >= MAX_ARTICLES_PER_SOURCE:
+            # The rest waits in the retry table for the next run
+            for deferred, deferred_dt in candidates[i:]:
+                retry_later(entry_item(source, deferred, deferred_dt), failed=False)
             break
+        if not claim(entry.link, source_name):
+            # Another source is processing it; its outcome settles the retry entry
+            feed_cache.resolve([entry.link])
+            continue
             
-        link = entry.link
-        title = entry.title
-        
-        # Parse published time
-        if hasattr(entry, 'published_parsed'):
-            published_dt = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-        else:
-            published_dt = datetime.now(timezone.utc)
+        item = entry_item(source, entry, published_dt)
+        link = item["link"]
+        title = item["title"]
             
         # 1. Scrape
-        text, article_image_url = scrape_article(link)
+        rate_limiter.wait(link, source_name)
+        with STAGE_SECONDS.time(stage="scrape", source=source_name):
+            text, article_image_url = scrape_article(link)
+        count_cycle("scraped")
         
         if not text:
+            FAILURES.inc(stage="scrape", source=source_name)
+            retry_later(item)
             print(f"Skipping {title} (No text extracted)", flush=True)
             continue
             
-        # Use RSS image if scraping failed to get one
-        final_image_url = article_image_url
-        if not final_image_url and 'media_content' in entry:
-             final_image_url = entry.media_content[0]['url']
-        
+        # The RSS image stays when scraping did not find one
+        item["image_url"] = article_image_url or item["image_url"]
+
+        if pending is not None:
+            pending.append((item, text))
+            count += 1
+            continue
+
         # 2. Summarize
-        summary = summarize_with_gemini(text)
+        with STAGE_SECONDS.time(stage="summarize", source=source_name):
+            summary, summarizer = summarize_cached(text)
         
         if summary:
-            item = {
-                "title": title,
-                "source_name": source['source_name'],
-                "source_id": source['id'],
-                "summary_text": summary,
-                "link": link,
-                "image_url": final_image_url,
-                "published_at": published_dt
-            }
-            save_news_item(item)
+            item["summary_text"] = summary
+            save_news_item(item, summarizer)
             count += 1
-            # Rate limiting for Free Tier
-            print("Sleeping 5s to respect API rate limits...", flush=True)
-            time.sleep(5) 
         else:
+            FAILURES.inc(stage="summarize", source=source_name)
+            retry_later(item)
             print(f"Skipping {title} (Summarization failed)", flush=True)
 
-def main():
+    # In batch mode the caller commits once the queued articles are saved
+    if pending is None:
+        feed_cache.commit(fetched)
+    return fetched
+
+def summarize_pending(pending):
+    """Summarizes queued (item, text) pairs in batched Gemini calls and saves them."""
+    summaries = {}
+    # Which summarizer produced each summary, for ARTICLES_SUMMARIZED
+    summarizers = {}
+    uncached = []
+    for i, (_, text) in enumerate(pending):
+        cached = cached_gemini_summary(text)
+        if cached:
+            summaries[str(i)] = cached
+            summarizers[str(i)] = "cache"
+        else:
+            uncached.append((str(i), text))
+
+    if uncached:
+        exhausted = set()
+        # Model that wrote each summary: batched ones by id, single calls by truncated text
+        served_by = {}
+        single_models = {}
+
+        def summarize_one(text):
+            try:
+                summary, single_models[text] = summarize_with_gemini(text)
+                return summary
+            except QuotaExhausted:
+                exhausted.add(text)
+                return None
+
+        fresh = {}
+        with STAGE_SECONDS.time(stage="summarize_batch"):
+            try:
+                _, stats = summarize_batch(gemini, uncached, summarize_one, results=fresh,
+                                           served_by=served_by)
+                print(f"Summarized {stats['articles']} articles with {stats['batch_calls']} batched "
+                      f"and {stats['single_calls']} single Gemini calls.", flush=True)
+            except QuotaExhausted:
+                # Everything not summarized yet falls back
+                exhausted.update(truncate_words(text) for article_id, text in uncached
+                                 if article_id not in fresh)
+        for article_id, text in uncached:
+            # summarize_batch hands summarize_one the truncated text
+            if truncate_words(text) in exhausted:
+                fresh[article_id] = fallback_summary(text)
+                summarizers[article_id] = "lexrank_fallback"
+            else:
+                summarizers[article_id] = "gemini"
+                model = served_by.get(article_id) or single_models.get(truncate_words(text))
+                summary_cache.put(text, "gemini", fresh.get(article_id), gemini_cache_params(model))
+        summaries.update(fresh)
+
+    for i, (item, _) in enumerate(pending):
+        summary = summaries.get(str(i))
+        if summary:
+            item["summary_text"] = summary
+            save_news_item(item, summarizers[str(i)])
+        else:
+            FAILURES.inc(stage="summarize", source=item["source_name"])
+            retry_later(item)
+            print(f"Skipping {item['title']} (Summarization failed)", flush=True)
+
+def save_summarized(job, result):
+    item, _ = job
+    # result is (summary, summarizer), or None when summarize_job raised
+    summary, summarizer = result or (None, None)
+    if summary:
+        item["summary_text"] = summary
+        save_news_item(item, summarizer)
+    else:
+        FAILURES.inc(stage="summarize", source=item["source_name"])
+        retry_later(item)
+        print(f"Skipping {item['title']} (Summarization failed)", flush=True)
+
+async def summarize_job(job):
+    """GeminiStream work function: one queued (item, text) pair, timed per source."""
+    item, text = job
+    with STAGE_SECONDS.time(stage="summarize", source=item["source_name"]):
+        return await summarize_cached_async(text)
+
+async def process_sources_async(sources):
+    """
+    Scrapes sources in worker threads while Gemini requests run on the
+    event loop, up to GEMINI_CONCURRENCY at a time. Each summary is saved
+    as soon as it arrives, so scraping never waits on the LLM.
+    """
+    stream = GeminiStream(
+        asyncio.get_running_loop(),
+        summarize_job,
+        save_summarized,
+        GEMINI_CONCURRENCY
+    )
+    fetched_feeds = await asyncio.gather(
+        *(asyncio.to_thread(process_source, source, stream) for source in sources)
+    )
+    await stream.drain()
+    print(f"Summarized {stream.completed} articles with up to {GEMINI_CONCURRENCY} "
+          f"Gemini requests in flight.", flush=True)
+    return fetched_feeds
+
+def main(batch=False, concurrent=False):
+    global writer
     print("Starting AI News Service...", flush=True)
+    metrics.start("ai_news")
     
     # Step A: Clear Table
     # Commenting out to preserve data during debugging/quota issues
@@ -226,12 +512,43 @@ def main():
     # Step B: Get Sources
     sources = get_active_sources()
     print(f"Found {len(sources)} active sources.", flush=True)
+    for source in sources:
+        rate_limiter.configure_source(source)
     
     # Run
-    for source in sources:
-        process_source(source)
+    reset_cycle()
+    writer = NewsWriter(supabase)
+    try:
+        if batch or concurrent:
+            if concurrent:
+                fetched_feeds = asyncio.run(process_sources_async(sources))
+            else:
+                pending = []
+                fetched_feeds = [process_source(source, pending) for source in sources]
+                summarize_pending(pending)
+            for fetched in fetched_feeds:
+                if fetched:
+                    feed_cache.commit(fetched)
+        else:
+            for source in sources:
+                process_source(source)
+    finally:
+        writer.close()
+    report_cycle()
+    report_http(cycle_stats.get("scraped"))
+    feed_cache.report()
+    seen_index.report()
+    summary_cache.report()
+    gemini.report()
+    metrics.finish()
         
     print("AI News Service Cycle Complete.", flush=True)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="AI news service")
+    parser.add_argument("--batch", action="store_true",
+                        help="pack several articles into each Gemini request")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="keep several Gemini requests in flight while scraping continues")
+    args = parser.parse_args()
+    main(batch=args.batch, concurrent=args.concurrent)
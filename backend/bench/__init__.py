@@ -0,0 +1 @@
+"""Benchmarks. Run from backend/ as modules, e.g. `python -m bench.bench_lexrank`."""
@@ -0,0 +1,90 @@
+import re
+import time
+import random
+import argparse
+from http_fetch import Page
+from extractors import extract_bs4, extract_lxml
+from bench.bench_summarizer import load_corpus
+
+_WHITESPACE = re.compile(r"\s+")
+
+NAV = "".join(f"<li><a href='/section/{i}'>Section {i}</a></li>" for i in range(80))
+SCRIPT = "<script>var data = {" + ",".join(f"'k{i}': '<p>not a paragraph</p>'" for i in range(200)) + "};</script>"
+STYLE = "<style>" + "".join(f".c{i} {{ margin: {i}px; }}" for i in range(300)) + "</style>"
+
+
+def make_page(text, rng, variant):
+    """A news-like page: heavy chrome around the article paragraphs."""
+    sentences = [s for s in text.split(". ") if s]
+    paragraphs = []
+    for i, sentence in enumerate(sentences):
+        if i % 5 == 1:
+            sentence = f"<a href='/t/{i}'>{sentence}</a> &amp; more"
+        elif i % 5 == 2:
+            sentence = f"<em>{sentence}</em><br>“quoted” &nbsp;text"
+        elif i % 5 == 3:
+            sentence += " <!-- ad slot -->"
+        paragraphs.append(f"<p class='body-{i}'>{sentence}.</p>")
+    if variant % 3 == 1:
+        paragraphs.insert(2, "<blockquote><p>Pull quote from the story.</p></blockquote>")
+
+    charset = "windows-1252" if variant % 4 == 3 else "utf-8"
+    og_image = "" if variant % 5 == 4 else \
+        f"<meta property='og:image' content='https://img.example/{rng.randrange(10 ** 6)}.jpg'>"
+    html = (
+        f"<!DOCTYPE html><html><head><meta charset='{charset}'><title>Story {variant} | Example News</title>"
+        f"<meta property='og:title' content='Story {variant}'>{og_image}"
+        "<meta property='article:published_time' content='2026-01-08T12:00:00Z'>"
+        f"{STYLE}{SCRIPT}</head><body><nav><ul>{NAV}</ul></nav>"
+        f"<main><article><h1>Story {variant}</h1>{''.join(paragraphs)}</article></main>"
+        f"<footer><ul>{NAV}</ul><p>© Example News – all rights reserved</p></footer></body></html>"
+    )
+    content = html.encode(charset, errors="replace")
+    return Page(f"https://news.example/{variant}", f"https://news.example/{variant}", 200, content, None,
+                len(content))
+
+
+def normalize(text):
+    return _WHITESPACE.sub(" ", (text or "").replace("\xa0", " ")).strip()
+
+
+def best_of(extract, page, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = extract(page)
+        times.append(time.perf_counter() - started)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BeautifulSoup vs lxml fallback extraction")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--sentences", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    pages = [make_page(text, rng, i) for i, text in enumerate(load_corpus(args.pages, args.sentences))]
+
+    bs4_total = lxml_total = 0.0
+    mismatches = 0
+    for page in pages:
+        (bs4_text, bs4_image), bs4_secs = best_of(extract_bs4, page, args.repeat)
+        (lxml_text, lxml_image), lxml_secs = best_of(extract_lxml, page, args.repeat)
+        bs4_total += bs4_secs
+        lxml_total += lxml_secs
+        if normalize(bs4_text) != normalize(lxml_text) or bs4_image != lxml_image:
+            mismatches += 1
+            print(f"Mismatch on {page.url}")
+
+    kib = sum(len(page.content) for page in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {kib:.0f} KiB average")
+    print(f"BeautifulSoup : {bs4_total / len(pages) * 1000:7.2f} ms/page")
+    print(f"lxml          : {lxml_total / len(pages) * 1000:7.2f} ms/page")
+    print(f"speedup       : {bs4_total / lxml_total:.1f}x")
+    print(f"matching output: {len(pages) - mismatches}/{len(pages)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+from tests.fake_gemini import FakeGeminiModel
+from gemini_batch import summarize_batch
+from bench.bench_summarizer import load_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini calls per cycle: one per article vs batched")
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--sentences", type=int, default=30)
+    parser.add_argument("--drop-rate", type=float, default=0.05)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.articles, args.sentences)
+    model = FakeGeminiModel(drop_rate=args.drop_rate, malformed_rate=args.malformed_rate)
+
+    def summarize_one(text):
+        return model.generate_content(f"Article Text: {text}").text
+
+    summaries, stats = summarize_batch(model, list(enumerate(corpus)), summarize_one)
+    done = sum(1 for summary in summaries.values() if summary)
+
+    print(f"{len(corpus)} articles, {done} summarized")
+    print(f"one call per article : {len(corpus)} calls")
+    print(f"batched              : {model.calls} calls "
+          f"({stats['batch_calls']} batched + {stats['single_calls']} single retries)")
+    print(f"reduction            : {len(corpus) / model.calls:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
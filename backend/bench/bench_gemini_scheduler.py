@@ -0,0 +1,47 @@
+import time
+import argparse
+from tests.fake_gemini import FakeGeminiModel
+from gemini_scheduler import GeminiScheduler, QuotaExhausted
+from bench.bench_summarizer import load_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quota errors with a model cascade vs blocking retries")
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--quota-after", type=int, default=10,
+                        help="primary model calls before it starts failing")
+    parser.add_argument("--retry-seconds", type=float, default=60)
+    parser.add_argument("--rpm", type=float, default=600)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.articles, 20)
+    models = {
+        "primary": FakeGeminiModel(quota_after=args.quota_after, retry_seconds=args.retry_seconds),
+        "secondary": FakeGeminiModel(),
+    }
+    scheduler = GeminiScheduler(
+        [("primary", args.rpm, 1_000_000), ("secondary", args.rpm, 1_000_000)],
+        models.get
+    )
+
+    started = time.perf_counter()
+    summarized = 0
+    for text in corpus:
+        try:
+            scheduler.generate_content(f"Article Text: {text}")
+            summarized += 1
+        except QuotaExhausted as e:
+            print(f"Fallback needed: {e}")
+    elapsed = time.perf_counter() - started
+
+    # The old loop slept 60 s, 120 s, 180 s per exhausted article
+    blocked = sum(60 * (attempt + 1) for attempt in range(3)) * (len(corpus) - args.quota_after)
+    print(f"{summarized}/{len(corpus)} summarized in {elapsed:.2f}s")
+    print(f"primary quota errors: {models['primary'].quota_errors}, "
+          f"secondary calls: {models['secondary'].calls}")
+    print(f"old retry loop would have slept up to {blocked}s")
+    scheduler.report()
+
+
+if __name__ == "__main__":
+    main()
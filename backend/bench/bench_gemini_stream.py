@@ -0,0 +1,73 @@
+import time
+import asyncio
+import argparse
+from tests.fake_gemini import FakeGeminiModel
+from gemini_scheduler import GeminiScheduler
+from gemini_stream import GeminiStream
+from bench.bench_summarizer import load_corpus
+
+
+def make_scheduler(model, rpm):
+    return GeminiScheduler([("fake", rpm, 10_000_000)], lambda name: model)
+
+
+def run_sequential(corpus, model, scrape_latency, rpm):
+    """The old loop: scrape one article, wait for its summary, repeat."""
+    scheduler = make_scheduler(model, rpm)
+    saved = []
+    for text in corpus:
+        time.sleep(scrape_latency)
+        saved.append(scheduler.generate_content(f"Article Text: {text}").text)
+    return saved
+
+
+async def run_streamed(corpus, model, scrape_latency, rpm, in_flight):
+    scheduler = make_scheduler(model, rpm)
+    saved = []
+
+    async def work(text):
+        response = await scheduler.generate_content_async(f"Article Text: {text}")
+        return response.text
+
+    stream = GeminiStream(asyncio.get_running_loop(), work,
+                          lambda job, summary: saved.append(summary), in_flight)
+
+    def scrape():
+        for text in corpus:
+            time.sleep(scrape_latency)
+            stream.append(text)
+
+    await asyncio.to_thread(scrape)
+    await stream.drain()
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cycle time: sequential vs streamed Gemini calls")
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--scrape-latency", type=float, default=0.5)
+    parser.add_argument("--gemini-latency", type=float, default=3.0)
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=600)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.articles, 20)
+
+    started = time.perf_counter()
+    sequential = run_sequential(corpus, FakeGeminiModel(latency=args.gemini_latency),
+                                args.scrape_latency, args.rpm)
+    sequential_secs = time.perf_counter() - started
+
+    started = time.perf_counter()
+    streamed = asyncio.run(run_streamed(corpus, FakeGeminiModel(latency=args.gemini_latency),
+                                        args.scrape_latency, args.rpm, args.in_flight))
+    streamed_secs = time.perf_counter() - started
+
+    print(f"{len(corpus)} articles, scrape {args.scrape_latency}s, Gemini {args.gemini_latency}s")
+    print(f"sequential : {sequential_secs:6.2f}s ({len(sequential)} saved)")
+    print(f"streamed   : {streamed_secs:6.2f}s ({len(streamed)} saved, {args.in_flight} in flight)")
+    print(f"speedup    : {sequential_secs / streamed_secs:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import time
+import argparse
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.summarizers.lex_rank import LexRankSummarizer
+from sumy.utils import get_stop_words
+from summarizer_engine import SummarizerEngine
+from lexrank_np import NumpyLexRank
+from bench.bench_summarizer import load_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sumy LexRank vs the vectorized NumpyLexRank")
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--sentences", type=int, default=150)
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    engine = SummarizerEngine(backend="sumy")
+    documents = [PlaintextParser.from_string(text, engine.tokenizer).document
+                 for text in load_corpus(args.articles, args.sentences)]
+
+    reference = LexRankSummarizer(engine.stem)
+    reference.stop_words = get_stop_words("english")
+    vectorized = NumpyLexRank(engine.stem, get_stop_words("english"))
+
+    # Warm the shared stem cache so both sides pay the same stemming cost
+    for document in documents[:5]:
+        reference(document, 4)
+
+    started = time.perf_counter()
+    expected = [reference(document, 4) for document in documents]
+    sumy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = []
+    for start in range(0, len(documents), args.batch):
+        actual.extend(vectorized.summarize_batch(documents[start:start + args.batch], 4))
+    numpy_seconds = time.perf_counter() - started
+
+    matches = sum(1 for a, b in zip(expected, actual) if a == b)
+    print(f"{len(documents)} articles x {args.sentences} sentences, batch {args.batch}")
+    print(f"same selection : {matches}/{len(documents)}")
+    print(f"sumy           : {sumy_seconds / len(documents) * 1000:.1f} ms/article")
+    print(f"numpy          : {numpy_seconds / len(documents) * 1000:.1f} ms/article")
+    print(f"speedup        : {sumy_seconds / numpy_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
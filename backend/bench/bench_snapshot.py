@@ -0,0 +1,79 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from news_snapshot import Snapshot, write_snapshot
+
+LATEST_NEWS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "latest_news.json")
+
+
+def best_of(function, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="latest_news.json vs the columnar snapshot")
+    parser.add_argument("--input", default=LATEST_NEWS)
+    parser.add_argument("--scale", type=int, default=1, help="repeat the records to simulate a larger export")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        records = json.load(f) * args.scale
+
+    workdir = tempfile.mkdtemp()
+    json_path = os.path.join(workdir, "latest_news.json")
+    snap_path = os.path.join(workdir, "latest_news.snap")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=4, ensure_ascii=False)
+    write_snapshot(snap_path, records)
+
+    with open(snap_path, "rb") as f:
+        snap_bytes = f.read()
+    with open(json_path, "rb") as f:
+        json_bytes = f.read()
+
+    def load_json():
+        with open(json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def open_snapshot():
+        snapshot = Snapshot(snap_path)
+        count = len(snapshot)
+        snapshot.close()
+        return count
+
+    def read_all():
+        with Snapshot(snap_path) as snapshot:
+            return list(snapshot)
+
+    def read_headlines():
+        with Snapshot(snap_path) as snapshot:
+            return list(snapshot.column("headline"))
+
+    loaded, json_secs = best_of(load_json, args.repeat)
+    _, open_secs = best_of(open_snapshot, args.repeat)
+    rows, all_secs = best_of(read_all, args.repeat)
+    _, headline_secs = best_of(read_headlines, args.repeat)
+    assert rows == loaded, "snapshot round trip differs from the JSON records"
+    shutil.rmtree(workdir)
+
+    print(f"{len(records)} records")
+    print(f"size      JSON {len(json_bytes) / 1024:7.1f} KiB (gzip {len(gzip.compress(json_bytes)) / 1024:6.1f})"
+          f"   snapshot {len(snap_bytes) / 1024:7.1f} KiB (gzip {len(gzip.compress(snap_bytes)) / 1024:6.1f})")
+    print(f"json.load              : {json_secs * 1000:8.3f} ms")
+    print(f"snapshot open (mmap)   : {open_secs * 1000:8.3f} ms")
+    print(f"snapshot, all rows     : {all_secs * 1000:8.3f} ms")
+    print(f"snapshot, one column   : {headline_secs * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import time
+import argparse
+from concurrent.futures import wait
+from summarize_pool import SummarizePool
+from bench.bench_summarizer import load_corpus
+
+
+def run(corpus, workers):
+    with SummarizePool(workers) as pool:
+        # Let every worker build its engine before timing
+        wait([pool.submit_text(corpus[0], 4) for _ in range(workers)])
+        started = time.perf_counter()
+        wait([pool.submit_text(text, 4) for text in corpus])
+        return len(corpus) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarization throughput by worker count")
+    parser.add_argument("--articles", type=int, default=400)
+    parser.add_argument("--sentences", type=int, default=80)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.articles, args.sentences)
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        rate = run(corpus, workers)
+        baseline = baseline or rate
+        print(f"{workers:>3} workers: {rate:8.1f} articles/s ({rate / baseline:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
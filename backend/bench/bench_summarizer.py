@@ -0,0 +1,66 @@
+import os
+import json
+import time
+import random
+import argparse
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.nlp.tokenizers import Tokenizer
+from sumy.summarizers.lex_rank import LexRankSummarizer
+from sumy.nlp.stemmers import Stemmer
+from sumy.utils import get_stop_words
+from summarizer_engine import SummarizerEngine
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "ai_studio_code.txt")
+
+
+def load_corpus(count, sentences_per_article, seed=7):
+    """Builds synthetic articles by sampling sentences from the stored summaries."""
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        groups = json.load(f)
+
+    sentences = []
+    for group in groups:
+        for article in group.get("articles", []):
+            sentences.extend(s.strip() + "." for s in article.get("summary", "").split(". ") if s.strip())
+
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(sentences) for _ in range(sentences_per_article)) for _ in range(count)]
+
+
+def summarize_per_call(text, sentence_count):
+    """What summarize_article used to do: build everything for every article."""
+    language = "english"
+    parser = PlaintextParser.from_string(text, Tokenizer(language))
+    summarizer = LexRankSummarizer(Stemmer(language))
+    summarizer.stop_words = get_stop_words(language)
+    return summarizer(parser.document, sentence_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call sumy setup vs the shared SummarizerEngine")
+    parser.add_argument("--articles", type=int, default=300)
+    parser.add_argument("--sentences", type=int, default=40)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.articles, args.sentences)
+
+    started = time.process_time()
+    for text in corpus:
+        summarize_per_call(text, 4)
+    baseline = time.process_time() - started
+
+    engine = SummarizerEngine()
+    started = time.process_time()
+    for text in corpus:
+        engine.summarize_text(text, 4)
+    shared = time.process_time() - started
+
+    print(f"{len(corpus)} articles x {args.sentences} sentences")
+    print(f"per-call setup : {baseline / len(corpus) * 1000:.2f} ms CPU/article")
+    print(f"shared engine  : {shared / len(corpus) * 1000:.2f} ms CPU/article")
+    print(f"speedup        : {baseline / shared:.2f}x")
+    print(f"stem cache     : {engine.stem_cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import os
+import re
+import gzip
+import json
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from news_export import iter_news_pages, Watermark
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Served as static assets by the Next.js build (public/ is copied as-is)
+BUNDLE_DIR = os.getenv(
+    "BUNDLE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "feeds")
+)
+# Same page size as Feed.tsx (ITEMS_PER_PAGE)
+BUNDLE_PAGE_SIZE = int(os.getenv("BUNDLE_PAGE_SIZE", "20"))
+# Older pages are left to live queries
+BUNDLE_MAX_PAGES = int(os.getenv("BUNDLE_MAX_PAGES", "10"))
+
+MANIFEST_NAME = "manifest.json"
+SHARD_COLUMNS = "id, title, summary_text, link, image_url, published_at, created_at, source_id, source_name"
+
+
+def slugify(name):
+    """
+    Readable slug plus a short hash of the exact name, so names that slug
+    alike ("AI/ML" and "AI ML") still get separate feeds.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-") or "other"
+    return f"{slug}-{hashlib.sha256((name or '').encode('utf-8')).hexdigest()[:6]}"
+
+
+def load_sources(client):
+    response = client.table("sources").select("id, source_name, category, logo_url").execute()
+    return {row["id"]: row for row in response.data}
+
+
+def feed_definitions(sources):
+    """{feed key: {"kind", "name", "source_ids"}} for every source and category."""
+    feeds = {}
+    for source_id, source in sources.items():
+        feeds[f"source/{source_id}"] = {"kind": "source", "name": source.get("source_name"),
+                                        "source_ids": [source_id]}
+        category = source.get("category") or "Other"
+        feed = feeds.setdefault(f"category/{slugify(category)}",
+                                {"kind": "category", "name": category, "source_ids": []})
+        feed["source_ids"].append(source_id)
+    return feeds
+
+
+def fetch_feed_items(client, source_ids, limit):
+    """Newest items of a feed, in the order Feed.tsx shows them."""
+    response = client.table("news_items").select(SHARD_COLUMNS) \
+        .in_("source_id", source_ids) \
+        .order("published_at", desc=True) \
+        .limit(limit) \
+        .execute()
+    return response.data
+
+
+def write_file(path, data):
+    """
+    Writes data plus .gz and .br variants next to it, atomically. The
+    plain file goes last, so its presence means every variant is there.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    variants = [(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((path + ".br", brotli.compress(data, quality=11)))
+    variants.append((path, data))
+    for variant_path, payload in variants:
+        tmp_path = variant_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, variant_path)
+
+
+def write_shard(out_dir, key, page, payload):
+    """
+    Writes one shard under a content-hash filename and returns its path
+    relative to out_dir. An unchanged page keeps its name and is not
+    rewritten, so CDN caches stay warm.
+    """
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    relative = f"{key}/{page}.{digest}.json"
+    path = os.path.join(out_dir, relative)
+    if os.path.exists(path):
+        return relative, False
+    write_file(path, data)
+    return relative, True
+
+
+def build_feed(client, out_dir, key, feed, sources, page_size, max_pages):
+    items = fetch_feed_items(client, feed["source_ids"], page_size * max_pages)
+    for item in items:
+        source = sources.get(item.get("source_id")) or {}
+        item["source_logo_url"] = source.get("logo_url")
+        item.pop("created_at", None)
+
+    pages = [items[start:start + page_size] for start in range(0, len(items), page_size)] or [[]]
+    entry = {"kind": feed["kind"], "name": feed["name"], "count": len(items), "pages": []}
+    written = 0
+    for page, page_items in enumerate(pages):
+        relative, fresh = write_shard(out_dir, key, page, {
+            "feed": key, "page": page, "pages": len(pages), "items": page_items
+        })
+        entry["pages"].append(relative)
+        written += fresh
+    return entry, written
+
+
+def newest_watermark(client):
+    rows = client.table("news_items").select("id, created_at") \
+        .order("created_at", desc=True).order("id", desc=True).limit(1).execute().data
+    return (rows[0]["created_at"], rows[0]["id"]) if rows else None
+
+
+def touched_source_ids(client, after):
+    """Source ids of items ingested after the watermark, plus the new watermark."""
+    touched = set()
+    last = after
+    for rows in iter_news_pages(client, after=after, columns="id, created_at, source_id"):
+        touched.update(row.get("source_id") for row in rows)
+        last = (rows[-1]["created_at"], rows[-1]["id"])
+    return touched, last
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def prune(out_dir, keys, keep):
+    """Deletes shards of `keys` referenced by neither the old nor the new manifest."""
+    removed = 0
+    for key in keys:
+        feed_dir = os.path.join(out_dir, key)
+        if not os.path.isdir(feed_dir):
+            continue
+        for name in os.listdir(feed_dir):
+            relative = f"{key}/{re.sub(r'[.](gz|br)$', '', name)}"
+            if relative not in keep:
+                os.remove(os.path.join(feed_dir, name))
+                removed += 1
+    return removed
+
+
+def build_bundles(client, out_dir=BUNDLE_DIR, full=False, page_size=BUNDLE_PAGE_SIZE, max_pages=BUNDLE_MAX_PAGES):
+    """
+    Materializes paginated feed shards per source and per category plus a
+    manifest.json that maps each feed to its shard files.
+
+    Incremental runs only rebuild feeds whose sources received items since
+    the stored (created_at, id) watermark, and feeds that appeared. Deleted
+    or edited rows are picked up by a full rebuild (full=True).
+    A feed that fails to build keeps its previous manifest entry, and the
+    watermark only advances once every rebuilt feed was written, so the
+    next run retries it.
+    Shards a previous manifest still points to are kept for one more
+    generation so clients holding the old manifest can finish paging.
+    """
+    out_dir = os.path.abspath(out_dir)
+    sources = load_sources(client)
+    feeds = feed_definitions(sources)
+    watermark = Watermark("feed_bundles")
+    published = load_manifest(out_dir)
+    previous = None if full else published
+    after = watermark.load() if previous else None
+
+    if previous is None or after is None:
+        # Take the watermark first; rows ingested during the build are re-checked next run
+        last = newest_watermark(client)
+        touched = set(feeds)
+    else:
+        touched_sources, last = touched_source_ids(client, after)
+        touched = {key for key, feed in feeds.items()
+                   if key not in previous["feeds"] or touched_sources.intersection(feed["source_ids"])}
+
+    manifest_feeds = {key: entry for key, entry in (previous or {}).get("feeds", {}).items() if key in feeds}
+    written = 0
+    failed = 0
+    for key in sorted(touched):
+        try:
+            manifest_feeds[key], fresh = build_feed(client, out_dir, key, feeds[key], sources, page_size, max_pages)
+        except Exception as e:
+            print(f"Error building feed {key}: {e}")
+            failed += 1
+            # Also after --full: clients keep the last good pages
+            published_entry = (published or {}).get("feeds", {}).get(key)
+            if published_entry is not None:
+                manifest_feeds[key] = published_entry
+            continue
+        written += fresh
+
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "page_size": page_size,
+        "feeds": manifest_feeds,
+    }
+    write_file(os.path.join(out_dir, MANIFEST_NAME),
+               json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode("utf-8"))
+    if last is not None and not failed:
+        watermark.save(*last)
+
+    keep = {path for entry in manifest_feeds.values() for path in entry["pages"]}
+    for entry in (published or {}).get("feeds", {}).values():
+        keep.update(entry["pages"])
+    removed = prune(out_dir, touched, keep)
+
+    return {"feeds": len(manifest_feeds), "rebuilt": len(touched) - failed, "failed": failed,
+            "written": written, "removed": removed}
+
+
+def main():
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Build static, precompressed feed shards")
+    parser.add_argument("--out", default=BUNDLE_DIR)
+    parser.add_argument("--full", action="store_true", help="rebuild every feed")
+    parser.add_argument("--page-size", type=int, default=BUNDLE_PAGE_SIZE)
+    parser.add_argument("--max-pages", type=int, default=BUNDLE_MAX_PAGES)
+    args = parser.parse_args()
+
+    load_dotenv()
+    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    stats = build_bundles(supabase, args.out, args.full, args.page_size, args.max_pages)
+    print(f"Feed bundles: {stats['feeds']} feeds, {stats['rebuilt']} rebuilt, {stats['failed']} failed, "
+          f"{stats['written']} shards written, {stats['removed']} files pruned "
+          f"({'gzip + brotli' if brotli else 'gzip'}).")
+
+
+if __name__ == "__main__":
+    main()
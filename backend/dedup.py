@@ -0,0 +1,41 @@
+# Links per in.(...) filter. Each chunk goes into the query string,
+# so keep it well under typical URL length limits.
+DEDUP_CHUNK_SIZE = 50
+
+
+def query_existing_links(client, links, chunk_size=DEDUP_CHUNK_SIZE):
+    """Returns the subset of `links` found in news_items, one select per chunk."""
+    existing = set()
+
+    for start in range(0, len(links), chunk_size):
+        chunk = links[start:start + chunk_size]
+        try:
+            response = client.table("news_items").select("link").in_("link", chunk).execute()
+            existing.update(row["link"] for row in response.data)
+        except Exception as e:
+            # Same policy as the old per-link check: treat unknown as new
+            print(f"Error checking existence for {len(chunk)} links: {e}", flush=True)
+
+    return existing
+
+
+def fetch_existing_links(client, links, chunk_size=DEDUP_CHUNK_SIZE, index=None):
+    """
+    Returns the subset of `links` that already exists in news_items.
+    Replaces one select per entry with one select per chunk of links.
+
+    With a SeenIndex, links it knows are stored skip Supabase; everything
+    else is still looked up in bulk, and links found there are added to
+    the index.
+    """
+    unique_links = list(dict.fromkeys(link for link in links if link))
+
+    if index is None:
+        return query_existing_links(client, unique_links, chunk_size)
+
+    seen, unsure = index.lookup(unique_links)
+    if unsure:
+        found = query_existing_links(client, unsure, chunk_size)
+        index.add(found)
+        seen |= found
+    return seen
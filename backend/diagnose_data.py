@@ -7,13 +7,23 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("Error: SUPABASE_URL or SUPABASE_KEY not set")
-    exit(1)
+# Created by setup(), so the helpers below can be imported without credentials
+supabase: Client = None
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# next_value() default: walk the column across every source_name
+_ANY_NAME = object()
+
+def setup():
+    """Connects to Supabase once per process."""
+    global supabase
+    if supabase is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            print("Error: SUPABASE_URL or SUPABASE_KEY not set")
+            exit(1)
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def diagnose():
+    setup()
     print("Diagnosing Data Integrity...")
     
     # 1. Check if source_id column exists in news_items
@@ -39,16 +49,105 @@ def diagnose():
     sources = {s['source_name']: s['id'] for s in res.data}
     print(f"Found {len(sources)} sources: {list(sources.keys())}")
 
-    # 3. Check for mismatches
+    # 3. Aggregate news_items per (source_name, source_id) on the server
     print("\nChecking Mismatches...")
-    res = supabase.table("news_items").select("source_name").execute()
-    news_source_names = set(item['source_name'] for item in res.data)
-    
-    for name in news_source_names:
-        if name in sources:
-            print(f"MATCH: '{name}' matches source ID {sources[name]}")
+    try:
+        stats = stats_from_view(supabase)
+        print("Using the news_source_stats view.")
+    except Exception as e:
+        print(f"news_source_stats view unavailable ({e}); using paged count queries.")
+        stats = stats_from_counts(supabase)
+
+    report(stats, sources)
+
+def stats_from_view(client):
+    """Per (source_name, source_id) row counts from the news_source_stats view (schema_update_v4.sql)."""
+    res = client.table("news_source_stats").select("source_name, source_id, row_count").execute()
+    return [(row["source_name"], row["source_id"], row["row_count"]) for row in res.data]
+
+def filter_name(query, source_name):
+    """source_name = value, or IS NULL for None, the same group the view's GROUP BY makes."""
+    if source_name is None:
+        return query.is_("source_name", "null")
+    return query.eq("source_name", source_name)
+
+def count_rows(client, source_name, source_id=None, null_id=False):
+    """Exact count of matching news_items rows; only the count crosses the wire."""
+    query = filter_name(client.table("news_items").select("id", count="exact", head=True), source_name)
+    if null_id:
+        query = query.is_("source_id", "null")
+    elif source_id is not None:
+        query = query.eq("source_id", source_id)
+    return query.execute().count or 0
+
+def next_value(client, column, after=None, source_name=_ANY_NAME):
+    """
+    Smallest non-NULL `column` value greater than `after`: one step of a
+    paged DISTINCT, optionally within one source_name (None: NULL names).
+    """
+    query = client.table("news_items").select(column).not_.is_(column, "null")
+    if source_name is not _ANY_NAME:
+        query = filter_name(query, source_name)
+    if after is not None:
+        query = query.gt(column, after)
+    res = query.order(column).limit(1).execute()
+    return res.data[0][column] if res.data else None
+
+def name_stats(client, name):
+    """(name, source_id, count) for every source_id under one source_name, NULL ids included."""
+    stats = []
+    null_count = count_rows(client, name, null_id=True)
+    if null_count:
+        stats.append((name, None, null_count))
+    source_id = next_value(client, "source_id", source_name=name)
+    while source_id is not None:
+        stats.append((name, source_id, count_rows(client, name, source_id)))
+        source_id = next_value(client, "source_id", source_id, source_name=name)
+    return stats
+
+def stats_from_counts(client):
+    """
+    Same rows as the view without it: distinct names and ids are walked
+    one value per request and each pair is counted with count=exact, so
+    the work is O(distinct pairs) requests and never transfers item rows.
+    Rows without a source_name form their own group, as in the view.
+    """
+    stats = []
+    name = next_value(client, "source_name")
+    while name is not None:
+        stats.extend(name_stats(client, name))
+        name = next_value(client, "source_name", name)
+    stats.extend(name_stats(client, None))
+    return stats
+
+def report(stats, sources):
+    """Prints per-source counts, NULL source_id totals and orphaned pairs."""
+    null_total = 0
+    orphans = []
+    seen_names = set()
+    for name, source_id, count in sorted(stats, key=lambda row: (row[0] or "", str(row[1]))):
+        seen_names.add(name)
+        if name is None:
+            orphans.append((name, source_id, count, "no source_name"))
+            print(f"MISSING NAME: {count} rows without source_name (source_id {source_id})")
+        elif name not in sources:
+            orphans.append((name, source_id, count, "name not in sources"))
+            print(f"MISMATCH: '{name}' in news_items but NOT in sources table ({count} rows)")
+        elif source_id is None:
+            null_total += count
+            print(f"NULL ID: '{name}' has {count} rows without source_id")
+        elif source_id != sources[name]:
+            orphans.append((name, source_id, count, f"expected source_id {sources[name]}"))
+            print(f"MISMATCH: '{name}' rows point at {source_id}, sources has {sources[name]} ({count} rows)")
         else:
-            print(f"MISMATCH: '{name}' in news_items but NOT in sources table")
+            print(f"MATCH: '{name}' matches source ID {source_id} ({count} rows)")
+
+    for name in sorted(set(sources) - seen_names):
+        print(f"EMPTY: source '{name}' has no news_items")
+
+    total = sum(count for _, _, count in stats)
+    print(f"\n{total} news_items rows, {null_total} with NULL source_id, "
+          f"{sum(row[2] for row in orphans)} in {len(orphans)} orphaned source_name/source_id pairs.")
 
 if __name__ == "__main__":
     diagnose()
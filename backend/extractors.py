@@ -0,0 +1,114 @@
+import re
+from collections import namedtuple
+import lxml.html
+from bs4 import BeautifulSoup
+from newspaper import Article
+from http_fetch import page_text
+
+# Shorter extractions are treated as a failed parse
+MIN_TEXT_CHARS = 100
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.I)
+
+# Result of parse_lxml and parse_bs4; fields missing from the page are None
+Extracted = namedtuple("Extracted", ["text", "image_url", "title", "published_time"])
+
+
+def extract_newspaper(page):
+    """newspaper3k on an already downloaded page. Returns (text, image_url, article)."""
+    article = Article(page.final_url or page.url)
+    article.download(input_html=page_text(page))
+    article.parse()
+    return article.text, article.top_image, article
+
+
+def parse_bs4(page):
+    """The fields of parse_lxml with BeautifulSoup, for pages lxml cannot parse."""
+    soup = BeautifulSoup(page.content, 'html.parser')
+    text = " ".join([p.get_text() for p in soup.find_all('p')])
+
+    image_url = None
+    og_image = soup.find("meta", property="og:image")
+    if og_image:
+        image_url = og_image.get("content")
+    published = _first(meta.get("content", "") for meta in soup.find_all("meta", property="article:published_time"))
+    title = _first(meta.get("content", "") for meta in soup.find_all("meta", property="og:title")) or \
+        _first(t.get_text() for t in soup.find_all("title"))
+    return Extracted(text, image_url, title, published)
+
+
+def extract_bs4(page):
+    """Paragraph text and og:image with BeautifulSoup. Returns (text, image_url)."""
+    extracted = parse_bs4(page)
+    return extracted.text, extracted.image_url
+
+
+def _lxml_parser(page):
+    """Picks the page encoding the way BeautifulSoup would: header, then <meta charset>, then UTF-8."""
+    encoding = page.encoding
+    if not encoding:
+        match = _META_CHARSET.search(page.content[:4096])
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+    return lxml.html.HTMLParser(encoding=encoding)
+
+
+def _first(values):
+    for value in values:
+        value = value.strip()
+        if value:
+            return value
+    return None
+
+
+def parse_lxml(page):
+    """
+    Paragraph text, og:image, article:published_time and title in one
+    lxml parse with targeted XPath, instead of a pure-Python soup.
+    """
+    try:
+        root = lxml.html.fromstring(page.content, parser=_lxml_parser(page))
+    except LookupError:
+        # Unknown charset name; let libxml2 sniff it
+        root = lxml.html.fromstring(page.content)
+
+    text = " ".join(p.text_content() for p in root.iter("p"))
+    images = root.xpath("//meta[@property='og:image']/@content")
+    image_url = images[0] if images else None
+    published = _first(root.xpath("//meta[@property='article:published_time']/@content"))
+    title = _first(root.xpath("//meta[@property='og:title']/@content")) or \
+        _first(t.text_content() for t in root.iter("title"))
+    return Extracted(text, image_url, title, published)
+
+
+def extract_lxml(page):
+    """Same output as extract_bs4, about an order of magnitude faster. Returns (text, image_url)."""
+    extracted = parse_lxml(page)
+    return extracted.text, extracted.image_url
+
+
+def extract_article(page, min_chars=MIN_TEXT_CHARS):
+    """
+    Runs the extractors over the same bytes in turn: newspaper3k first,
+    lxml when newspaper fails or returns short text, BeautifulSoup if
+    lxml cannot parse the page.
+    Returns (text, image_url); text is None when nothing usable was found.
+    """
+    try:
+        text, image_url, _ = extract_newspaper(page)
+        if text and len(text.strip()) >= min_chars:
+            return text, image_url
+        print(f"Newspaper3k returned empty/short text for {page.url}. Trying lxml fallback...", flush=True)
+    except Exception as e:
+        print(f"Newspaper3k failed for {page.url}: {e}. Trying lxml fallback...", flush=True)
+        image_url = None
+
+    try:
+        text, og_image = extract_lxml(page)
+    except Exception as e:
+        print(f"lxml extraction failed for {page.url}: {e}. Trying BS4...", flush=True)
+        try:
+            text, og_image = extract_bs4(page)
+        except Exception as e2:
+            print(f"BS4 extraction failed for {page.url}: {e2}", flush=True)
+            return None, image_url
+    return (text or None), (image_url or og_image)
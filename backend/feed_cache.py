@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime
+import requests
+import feedparser
+from local_cache import cache_path
+
+# Failed attempts before a link is dropped from the retry table
+FEED_RETRY_ATTEMPTS = int(os.getenv("FEED_RETRY_ATTEMPTS", "3"))
+
+# status is the HTTP status; content is None for a 304
+FeedFetch = namedtuple("FeedFetch", "source url status content etag last_modified")
+
+
+class FeedCache:
+    """
+    Conditional-GET cache for RSS/Atom feeds.
+
+    Stores the ETag / Last-Modified validators of each feed URL on disk and
+    sends them back as If-None-Match / If-Modified-Since. A 304 means the
+    feed has not changed and the caller can skip it without parsing.
+
+    Validators are only stored through commit(), after the caller has
+    processed the feed, so a cycle that dies halfway re-reads the feed.
+    Entries left for later (over the per-source cap) or that failed are
+    kept in a retry table instead, and come back through with_retries()
+    on the next run even when the feed answers 304. A link that fails
+    `retry_attempts` times is dropped.
+
+    Counters per source: hits (the server answered 304), misses (a full
+    body was downloaded, with or without validators) and bytes_saved
+    (size of the last full body for every 304).
+    """
+
+    def __init__(self, path=None, retry_attempts=FEED_RETRY_ATTEMPTS):
+        self.retry_attempts = retry_attempts
+        self._db = sqlite3.connect(path or cache_path("feed_cache.sqlite3"),
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS validators ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " body_bytes INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS stats ("
+            " source TEXT PRIMARY KEY,"
+            " hits INTEGER NOT NULL DEFAULT 0,"
+            " misses INTEGER NOT NULL DEFAULT 0,"
+            " bytes_saved INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS retries ("
+            " link TEXT PRIMARY KEY,"
+            " source TEXT NOT NULL,"
+            " entry TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_retries_source ON retries(source)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        # Counters for this run only; the stats table keeps the totals
+        self.run_stats = {}
+
+    def _lookup(self, url):
+        with self._lock:
+            return self._db.execute(
+                "SELECT etag, last_modified, body_bytes FROM validators WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _count(self, source, hits=0, misses=0, bytes_saved=0):
+        with self._lock:
+            stats = self.run_stats.setdefault(source, {"hits": 0, "misses": 0, "bytes_saved": 0})
+            stats["hits"] += hits
+            stats["misses"] += misses
+            stats["bytes_saved"] += bytes_saved
+            self._db.execute(
+                "INSERT INTO stats (source, hits, misses, bytes_saved)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(source) DO UPDATE SET"
+                " hits = hits + excluded.hits,"
+                " misses = misses + excluded.misses,"
+                " bytes_saved = bytes_saved + excluded.bytes_saved",
+                (source, hits, misses, bytes_saved)
+            )
+            self._db.commit()
+
+    def fetch(self, source, url, headers=None, timeout=15, session=None):
+        """
+        GETs a feed with the stored validators.
+        Returns a FeedFetch; content is None when the server answered 304.
+        """
+        request_headers = dict(headers or {})
+        cached = self._lookup(url)
+        if cached:
+            etag, last_modified, body_bytes = cached
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
+
+        response = (session or requests).get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and cached:
+            self._count(source, hits=1, bytes_saved=body_bytes)
+            return FeedFetch(source, url, 304, None, cached[0], cached[1])
+
+        response.raise_for_status()
+        self._count(source, misses=1)
+        return FeedFetch(source, url, response.status_code, response.content,
+                         response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def commit(self, result):
+        """Stores the validators of a fully processed feed fetch."""
+        if result.content is None or not (result.etag or result.last_modified):
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, body_bytes, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (result.url, result.etag, result.last_modified, len(result.content), time.time())
+            )
+            self._db.commit()
+
+    def retry_later(self, source, item, failed=False):
+        """
+        Keeps an entry for the next run. `item` needs link and title, and may
+        carry published_at and image_url. failed=True counts an attempt; a
+        link is dropped once it has failed `retry_attempts` times.
+        """
+        published_at = item.get("published_at")
+        if isinstance(published_at, datetime):
+            published_at = published_at.isoformat()
+        entry = json.dumps({"link": item["link"], "title": item.get("title"),
+                            "published_at": published_at, "image_url": item.get("image_url")})
+        with self._lock:
+            row = self._db.execute("SELECT attempts FROM retries WHERE link = ?", (item["link"],)).fetchone()
+            attempts = (row[0] if row else 0) + bool(failed)
+            if attempts >= self.retry_attempts:
+                self._db.execute("DELETE FROM retries WHERE link = ?", (item["link"],))
+                self._db.commit()
+                print(f"{source}: giving up on {item['link']} after {attempts} failed attempts.", flush=True)
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO retries (link, source, entry, attempts, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (item["link"], source, entry, attempts, time.time())
+            )
+            self._db.commit()
+
+    def resolve(self, links):
+        """Removes links that were saved, or no longer need a retry, from the retry table."""
+        links = list(links)
+        if not links:
+            return
+        with self._lock:
+            self._db.executemany("DELETE FROM retries WHERE link = ?", [(link,) for link in links])
+            self._db.commit()
+
+    def retry_entries(self, source):
+        """The source's retried entries as feedparser entries, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT entry FROM retries WHERE source = ? ORDER BY updated_at", (source,)
+            ).fetchall()
+        entries = []
+        for (entry,) in rows:
+            entry = json.loads(entry)
+            retried = feedparser.FeedParserDict(link=entry["link"], title=entry["title"] or entry["link"])
+            if entry["published_at"]:
+                retried["published_parsed"] = datetime.fromisoformat(entry["published_at"]).utctimetuple()
+            if entry["image_url"]:
+                retried["media_content"] = [{"url": entry["image_url"]}]
+            entries.append(retried)
+        return entries
+
+    def with_retries(self, source, entries):
+        """
+        Returns (entries, retried_links): the source's retried entries
+        followed by the feed entries that are not among them.
+        """
+        retried = self.retry_entries(source)
+        links = {entry.link for entry in retried}
+        return retried + [entry for entry in entries if entry.get("link") not in links], links
+
+    def report(self):
+        """Prints this run's hit/miss counts per source; a hit is a 304."""
+        if not self.run_stats:
+            return
+        print("Feed cache (this run):", flush=True)
+        total_saved = 0
+        for source, stats in sorted(self.run_stats.items()):
+            total_saved += stats["bytes_saved"]
+            print(f"  {source}: hits={stats['hits']} misses={stats['misses']} "
+                  f"saved={stats['bytes_saved'] / 1024:.1f} KB",
+                  flush=True)
+        print(f"  Total saved: {total_saved / 1024:.1f} KB", flush=True)
+        with self._lock:
+            waiting = self._db.execute("SELECT COUNT(*) FROM retries").fetchone()[0]
+        if waiting:
+            print(f"  Entries waiting for a retry: {waiting}", flush=True)
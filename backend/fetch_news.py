@@ -1,5 +1,8 @@
 import os
-import json
+import re
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import newspaper
 from newspaper import Article
 from datetime import datetime, timedelta, timezone
@@ -7,6 +10,16 @@ from dotenv import load_dotenv
 from supabase import create_client, Client
 import time
 from urllib.parse import urlparse
+from summary_cache import SummaryCache
+from dedup import fetch_existing_links
+from seen_index import SeenIndex
+from host_limits import HostLimiter
+from news_export import export_news
+from http_fetch import fetch as fetch_page, page_text
+from http_fetch import report as report_http
+import metrics
+from metrics import (FEEDS_FETCHED, ENTRIES_SEEN, ENTRIES_DEDUPED, ARTICLES_SUMMARIZED,
+                     ARTICLES_SAVED, FAILURES, STAGE_SECONDS)
 
 # Load environment variables
 load_dotenv()
@@ -14,12 +27,44 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env file.")
-    exit(1)
+# Supabase client and local caches, created by setup() so importing this
+# module does not connect or need credentials
+supabase: Client = None
+# Summaries keyed by article text, shared with the other pipelines
+summary_cache = None
+# Local index of stored links, shared with main.py and ai_news_service.py
+seen_index = None
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def setup():
+    """Connects to Supabase and opens the local caches, once per process."""
+    global supabase, summary_cache, seen_index
+    if supabase is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env file.")
+            exit(1)
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    if summary_cache is None:
+        summary_cache = SummaryCache()
+    if seen_index is None:
+        seen_index = SeenIndex()
+
+# Articles saved per source per run
+MAX_ARTICLES_PER_SOURCE = int(os.getenv("MAX_ARTICLES_PER_SOURCE", "10"))
+# Download threads per source and sources scraped at once
+ARTICLE_WORKERS = int(os.getenv("ARTICLE_WORKERS", "4"))
+SOURCE_WORKERS = int(os.getenv("SOURCE_WORKERS", "4"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))
+
+# Caps concurrent downloads per host across every source thread
+host_limiter = HostLimiter(ARTICLE_WORKERS * SOURCE_WORKERS, FETCH_PER_HOST)
+
+# Dates embedded in article URLs: /2026/01/08/, /2026-01-08/, /20260108/ and /2026/01/
+URL_DATE_PATTERNS = [
+    re.compile(r"/(20\d{2})[/-](0[1-9]|1[0-2])[/-](0[1-9]|[12]\d|3[01])(?=[/\-_.]|$)"),
+    re.compile(r"/(20\d{2})(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])(?=/)"),
+    re.compile(r"/(20\d{2})/(0[1-9]|1[0-2])(?=/)"),
+]
 
 def fetch_sources():
     """Fetches all sources from the Supabase 'sources' table."""
@@ -35,14 +80,166 @@ def get_base_url(url):
     parsed = urlparse(url)
     return f"{parsed.scheme}://{parsed.netloc}"
 
-def scrape_source(source, cutoff_date):
-    """Scrapes a single source using newspaper3k."""
+def infer_url_date(url):
+    """
+    Latest moment an article could have been published, judging by a date
+    in its URL, or None when the URL has no date. A month-only URL counts
+    until the end of that month.
+    """
+    path = urlparse(url).path
+    for pattern in URL_DATE_PATTERNS:
+        match = pattern.search(path)
+        if not match:
+            continue
+        try:
+            parts = [int(part) for part in match.groups()]
+            if len(parts) == 3:
+                start = datetime(*parts, tzinfo=timezone.utc)
+                return start + timedelta(days=1)
+            year, month = parts
+            return datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+def filter_candidates(articles, cutoff_date, source_name=None):
+    """
+    Drops articles that need not be downloaded: links dated before the
+    cutoff by their URL, duplicates, and links already in news_items
+    (one bulk lookup, through the seen index when the cutoff is inside
+    its window).
+    Returns (candidates, stats).
+    """
+    stats = {"found": len(articles), "stale_url": 0, "existing": 0}
+    by_link = {}
+    for article in articles:
+        latest = infer_url_date(article.url)
+        if latest is not None and latest < cutoff_date:
+            stats["stale_url"] += 1
+            continue
+        by_link.setdefault(article.url, article)
+
+    # The seen index only covers its own window; a longer --days lookback
+    # must ask Supabase or older stored links would look new
+    in_window = datetime.now(timezone.utc) - cutoff_date <= timedelta(seconds=seen_index.window)
+    index = seen_index if in_window else None
+    with STAGE_SECONDS.time(stage="dedup", source=source_name):
+        existing = fetch_existing_links(supabase, list(by_link), index=index)
+    stats["existing"] = len(existing)
+    candidates = [article for link, article in by_link.items() if link not in existing]
+
+    ENTRIES_DEDUPED.inc(stats["stale_url"], source=source_name, reason="stale")
+    ENTRIES_DEDUPED.inc(stats["found"] - stats["stale_url"] - len(by_link), source=source_name, reason="duplicate")
+    ENTRIES_DEDUPED.inc(stats["existing"], source=source_name, reason="existing")
+    return candidates, stats
+
+def scrape_article(article, source, cutoff_date):
+    """
+    Downloads, parses, summarizes and upserts one candidate article.
+    Returns the row saved, or None when the article was skipped.
+    """
+    source_name = source.get("source_name")
+    try:
+        # One GET through the shared session; newspaper parses those bytes
+        with STAGE_SECONDS.time(stage="scrape", source=source_name):
+            with host_limiter.slot(article.url):
+                page = fetch_page(article.url)
+            article.download(input_html=page_text(page))
+            article.parse()
+        
+        # Freshness Check
+        # article.publish_date can be None or a datetime object
+        if article.publish_date:
+            # Ensure timezone awareness
+            pub_date = article.publish_date
+            if pub_date.tzinfo is None:
+                pub_date = pub_date.replace(tzinfo=timezone.utc)
+            
+            if pub_date < cutoff_date:
+                # Article is too old
+                ENTRIES_DEDUPED.inc(source=source_name, reason="stale")
+                return None
+        else:
+            # If no date found, we might want to skip or assume it's new. 
+            # For safety in this "freshness" driven task, let's skip if we can't verify date, 
+            # OR we could check if we've seen the URL before.
+            # Let's assume if no date, we check the DB. 
+            pass
+
+        # Extract data
+        title = article.title
+        link = article.url
+        
+        # Summarization (NLP)
+        # newspaper3k has built-in NLP for summary, but it requires 'nltk' download sometimes.
+        # simpler to just take the top text or description if available?
+        # article.nlp() populates article.summary and article.keywords
+        summary = summary_cache.get(article.text, "newspaper_nlp")
+        if summary is None:
+            try:
+                with STAGE_SECONDS.time(stage="summarize", source=source_name):
+                    article.nlp()
+                summary = article.summary
+                summary_cache.put(article.text, "newspaper_nlp", summary)
+                ARTICLES_SUMMARIZED.inc(source=source_name, summarizer="newspaper_nlp")
+            except:
+                FAILURES.inc(stage="summarize", source=source_name)
+                summary = article.text[:500] + "..." if article.text else ""
+        else:
+            ARTICLES_SUMMARIZED.inc(source=source_name, summarizer="cache")
+
+        image_url = article.top_image
+        
+        # Check if we have a valid publish date to save, else use now()
+        final_pub_date = article.publish_date if article.publish_date else datetime.now(timezone.utc)
+        if final_pub_date.tzinfo is None:
+            final_pub_date = final_pub_date.replace(tzinfo=timezone.utc)
+
+        return {
+            "source_name": source.get("source_name"),
+            "source_id": source.get("id"),
+            "title": title,
+            "summary_text": summary,
+            "link": link,
+            "image_url": image_url,
+            "published_at": final_pub_date.isoformat()
+        }
+            
+    except Exception as e:
+       # print(f"Error processing article: {e}")
+       FAILURES.inc(stage="scrape", source=source_name)
+       return None
+
+def save_article(article_data):
+    """Upserts one article row. Returns True on success."""
+    source_name = article_data["source_name"]
+    try:
+        with STAGE_SECONDS.time(stage="save", source=source_name):
+            supabase.table("news_items").upsert(
+                article_data, 
+                on_conflict="link" 
+            ).execute()
+        seen_index.add([article_data["link"]])
+        ARTICLES_SAVED.inc(source=source_name)
+        # print(f"Saved: {article_data['title']}")
+        return True
+    except Exception as e:
+        FAILURES.inc(stage="save", source=source_name)
+        print(f"Error saving {article_data['title']}: {e}")
+        return False
+
+def scrape_source(source, cutoff_date, workers=ARTICLE_WORKERS):
+    """
+    Scrapes a single source using newspaper3k.
+    Candidates are downloaded by `workers` threads (per-host limits apply
+    across all sources); the source stops submitting work once
+    MAX_ARTICLES_PER_SOURCE articles are saved.
+    """
     source_name = source.get("source_name")
     rss_url = source.get("rss_url") # We use this to derive the homepage
-    source_id = source.get("id")
     
     if not rss_url:
-        return []
+        return 0
 
     # Use the provided URL directly to support scraping specific sections (e.g., /world, /politics)
     target_url = rss_url
@@ -50,141 +247,108 @@ def scrape_source(source, cutoff_date):
     
     try:
         # memoize_articles=False ensuring we don't cache locally and miss updates if run repeatedly in dev
-        paper = newspaper.build(target_url, memoize_articles=False)
+        with STAGE_SECONDS.time(stage="feed", source=source_name):
+            paper = newspaper.build(target_url, memoize_articles=False)
+        FEEDS_FETCHED.inc(source=source_name, status="ok")
+        ENTRIES_SEEN.inc(len(paper.articles), source=source_name)
         print(f"Found {len(paper.articles)} potential articles on {source_name}.")
-        
-        processed_count = 0
-        
-        for article in paper.articles:
-            # Basic optimization: Check if URL already exists before downloading
-            # This saves bandwidth and time
-            try:
-                # Check DB first? 
-                # Doing a select for every link might be slow if we have thousands. 
-                # But compared to downloading and parsing HTML, it's fast.
-                pass 
-            except:
-                pass
-
-            try:
-                article.download()
-                article.parse()
-                
-                # Freshness Check
-                # article.publish_date can be None or a datetime object
-                if article.publish_date:
-                    # Ensure timezone awareness
-                    pub_date = article.publish_date
-                    if pub_date.tzinfo is None:
-                        pub_date = pub_date.replace(tzinfo=timezone.utc)
-                    
-                    if pub_date < cutoff_date:
-                        # Article is too old
-                        continue
-                else:
-                    # If no date found, we might want to skip or assume it's new. 
-                    # For safety in this "freshness" driven task, let's skip if we can't verify date, 
-                    # OR we could check if we've seen the URL before.
-                    # Let's assume if no date, we check the DB. 
-                    pass
-
-                # Extract data
-                title = article.title
-                link = article.url
-                
-                # Summarization (NLP)
-                # newspaper3k has built-in NLP for summary, but it requires 'nltk' download sometimes.
-                # simpler to just take the top text or description if available?
-                # article.nlp() populates article.summary and article.keywords
-                try:
-                    article.nlp()
-                    summary = article.summary
-                except:
-                    summary = article.text[:500] + "..." if article.text else ""
-
-                image_url = article.top_image
-                
-                # Check if we have a valid publish date to save, else use now()
-                final_pub_date = article.publish_date if article.publish_date else datetime.now(timezone.utc)
-                if final_pub_date.tzinfo is None:
-                    final_pub_date = final_pub_date.replace(tzinfo=timezone.utc)
-
-                article_data = {
-                    "source_name": source_name,
-                    "source_id": source_id,
-                    "title": title,
-                    "summary_text": summary,
-                    "link": link,
-                    "image_url": image_url,
-                    "published_at": final_pub_date.isoformat()
-                }
-                
-                # UPSERT
-                try:
-                    supabase.table("news_items").upsert(
-                        article_data, 
-                        on_conflict="link" 
-                    ).execute()
-                    processed_count += 1
-                    # print(f"Saved: {title}")
-                except Exception as e:
-                    print(f"Error saving {title}: {e}")
-
-                # Rate limiting / politeness
-                # Only process a few articles per source for this demo? 
-                # Or just loop all? 
-                # Let's limit to 10 recent ones per source to avoid taking forever if the site is huge.
-                if processed_count >= 10:
-                    break
-                    
-            except Exception as e:
-               # print(f"Error processing article: {e}")
-               continue
-               
-        print(f"Processed {processed_count} articles for {source_name}.")
 
+        # Skip stale and already stored links before downloading anything
+        candidates, stats = filter_candidates(paper.articles, cutoff_date, source_name)
+        print(f"{source_name}: {stats['stale_url']} stale by URL date, {stats['existing']} already stored, "
+              f"{len(candidates)} to download.")
     except Exception as e:
+        FAILURES.inc(stage="feed", source=source_name)
         print(f"Error building paper for {source_name}: {e}")
+        return 0
+
+    processed_count = 0
+    done = threading.Event()
+    count_lock = threading.Lock()
+
+    def process(article):
+        nonlocal processed_count
+        # Target already met while this one sat in the queue
+        if done.is_set():
+            return
+        article_data = scrape_article(article, source, cutoff_date)
+        if article_data is None:
+            return
+        # Claim a slot before saving so in-flight downloads cannot overshoot the target
+        with count_lock:
+            if processed_count >= MAX_ARTICLES_PER_SOURCE:
+                return
+            processed_count += 1
+        if not save_article(article_data):
+            with count_lock:
+                processed_count -= 1
+        elif processed_count >= MAX_ARTICLES_PER_SOURCE:
+            done.set()
 
-def scrape_and_save(days_to_fetch):
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = [executor.submit(process, article) for article in candidates]
+        for future in futures:
+            future.result()
+            if done.is_set():
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+           
+    print(f"Processed {processed_count} articles for {source_name}.")
+    return processed_count
+
+def scrape_and_save(days_to_fetch, workers=ARTICLE_WORKERS, source_workers=SOURCE_WORKERS):
+    """Scrapes up to `source_workers` sources at a time, so a run takes about as long as the slowest source."""
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_to_fetch)
     print(f"Fetching news published after: {cutoff_date}")
 
     sources = fetch_sources()
     
-    for source in sources:
-        scrape_source(source, cutoff_date)
+    with ThreadPoolExecutor(max_workers=max(1, source_workers)) as executor:
+        futures = {executor.submit(scrape_source, source, cutoff_date, workers): source for source in sources}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error scraping {futures[future].get('source_name')}: {e}")
+
+    report_http()
+    seen_index.report()
+    summary_cache.report()
 
-def export_latest_news(start_time_of_script):
-    """Fetches articles added since script started and saves to JSON."""
+def export_latest_news(start_time_of_script, snapshot=False):
+    """
+    Streams articles added since script started to latest_news.json, page by page.
+    With snapshot=True the same rows also go to latest_news.snap (columnar, see news_snapshot.py).
+    """
     try:
-        response = supabase.table("news_items") \
-            .select("source_name, title, summary_text, link, published_at, image_url") \
-            .gte("created_at", start_time_of_script.isoformat()) \
-            .execute()
-            
-        articles = response.data
-        
-        formatted_articles = []
-        for item in articles:
-            formatted_articles.append({
-                "source": item.get("source_name"),
-                "headline": item.get("title"),
-                "summary": item.get("summary_text"),
-                "url": item.get("link"),
-                "image": item.get("image_url"), 
-                "date": item.get("published_at")
-            })
-            
-        with open("latest_news.json", "w", encoding="utf-8") as f:
-            json.dump(formatted_articles, f, indent=4, ensure_ascii=False)
-            
-        print(f"Exported {len(formatted_articles)} new articles to latest_news.json")
+        since = start_time_of_script.isoformat()
+        count = export_news(supabase, "latest_news.json", since=since, fmt="json")
+        print(f"Exported {count} new articles to latest_news.json")
+        if snapshot:
+            count = export_news(supabase, "latest_news.snap", since=since, fmt="snapshot")
+            print(f"Exported {count} new articles to latest_news.snap")
         
     except Exception as e:
         print(f"Error exporting JSON: {e}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape sources with newspaper3k")
+    parser.add_argument("--days", type=float, default=None,
+                        help="days of news to fetch (asked interactively when omitted)")
+    parser.add_argument("--workers", type=int, default=ARTICLE_WORKERS,
+                        help="download threads per source")
+    parser.add_argument("--sources", type=int, default=SOURCE_WORKERS,
+                        help="sources scraped concurrently (1 = one after another)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="also export latest_news.snap, a compact columnar snapshot")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    setup()
+
     # Ensure NLTK data for newspaper3k NLP
     try:
         import nltk
@@ -192,18 +356,22 @@ def main():
     except:
         pass
 
-    try:
-        days_input = input("How many days of news do you want to fetch? ")
-        days = float(days_input)
-    except ValueError:
-        print("Invalid input. Defaulting to 1 day.")
-        days = 1.0
+    days = args.days
+    if days is None:
+        try:
+            days_input = input("How many days of news do you want to fetch? ")
+            days = float(days_input)
+        except ValueError:
+            print("Invalid input. Defaulting to 1 day.")
+            days = 1.0
 
     start_time = datetime.now(timezone.utc)
+    metrics.start("fetch_news")
     
-    scrape_and_save(days)
+    scrape_and_save(days, args.workers, args.sources)
     
-    export_latest_news(start_time)
+    export_latest_news(start_time, args.snapshot)
+    metrics.finish()
 
 if __name__ == "__main__":
     main()
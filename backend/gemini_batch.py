@@ -0,0 +1,143 @@
+import os
+import json
+from google.api_core import exceptions
+from gemini_scheduler import QuotaExhausted, estimate_tokens
+
+# Prompt budget per batched request, in (estimated) input tokens
+GEMINI_BATCH_TOKENS = int(os.getenv("GEMINI_BATCH_TOKENS", "24000"))
+GEMINI_BATCH_MAX_ARTICLES = int(os.getenv("GEMINI_BATCH_MAX_ARTICLES", "8"))
+# Same cap summarize_with_gemini applies to a single article
+MAX_ARTICLE_WORDS = 2000
+# Output room per article; 3-5 lines is well under this
+OUTPUT_TOKENS_PER_ARTICLE = 256
+
+BATCH_INSTRUCTIONS = (
+    "Summarize each of the following news articles in exactly 3 to 5 lines. "
+    "Focus only on the core facts. No fluff. No 'According to the article' phrases.\n"
+    "Return only a JSON array with one object per article, in the form "
+    '[{"id": "<article id>", "summary": "<summary>"}]. '
+    "Use the ids exactly as given.\n\n"
+)
+
+
+def truncate_words(text, max_words=MAX_ARTICLE_WORDS):
+    words = text.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words])
+    return text
+
+
+def pack_batches(articles, token_budget=GEMINI_BATCH_TOKENS, max_articles=GEMINI_BATCH_MAX_ARTICLES):
+    """
+    Greedily packs (article_id, text) pairs into batches that stay under
+    token_budget and max_articles. An article larger than the budget gets
+    a batch of its own.
+    """
+    batches = []
+    current = []
+    used = estimate_tokens(BATCH_INSTRUCTIONS)
+    for article_id, text in articles:
+        cost = estimate_tokens(text) + 16
+        if current and (used + cost > token_budget or len(current) >= max_articles):
+            batches.append(current)
+            current = []
+            used = estimate_tokens(BATCH_INSTRUCTIONS)
+        current.append((article_id, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(batch):
+    parts = [BATCH_INSTRUCTIONS]
+    for article_id, text in batch:
+        parts.append(f"### Article id: {article_id}\n{text}\n")
+    return "\n".join(parts)
+
+
+def parse_batch_response(text, expected_ids):
+    """
+    Returns {id: summary} for the well-formed entries of a JSON array reply.
+    Unknown ids, duplicates and empty summaries are dropped.
+    """
+    text = (text or "").strip()
+    # Models sometimes wrap JSON in a markdown fence despite the mime type
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[4:]
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    if isinstance(data, dict):
+        data = data.get("summaries", [])
+    if not isinstance(data, list):
+        return {}
+
+    summaries = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        article_id = str(entry.get("id", ""))
+        summary = entry.get("summary")
+        if article_id in expected_ids and article_id not in summaries \
+                and isinstance(summary, str) and summary.strip():
+            summaries[article_id] = summary.strip()
+    return summaries
+
+
+def summarize_batch(model, articles, summarize_one, before_call=None,
+                    token_budget=GEMINI_BATCH_TOKENS, max_articles=GEMINI_BATCH_MAX_ARTICLES,
+                    results=None, served_by=None):
+    """
+    Summarizes (article_id, text) pairs with as few Gemini calls as possible.
+
+    Each batch is one generate_content call asking for a JSON array. Ids
+    that are missing or malformed in the reply are retried one by one
+    through summarize_one(text). before_call() runs before every batched
+    request (rate limiting). Returns ({id: summary or None}, stats).
+
+    A quota error on a batched call (QuotaExhausted or ResourceExhausted)
+    is raised rather than retried article by article, which would only
+    add requests against an exhausted quota. Pass a `results` dict to keep
+    the summaries of the batches finished before it, and a `served_by`
+    dict to learn which model answered each batched id.
+    """
+    articles = [(str(article_id), truncate_words(text)) for article_id, text in articles]
+    results = {} if results is None else results
+    stats = {"articles": len(articles), "batch_calls": 0, "single_calls": 0}
+
+    for batch in pack_batches(articles, token_budget, max_articles):
+        expected = {article_id for article_id, _ in batch}
+        summaries = {}
+        if len(batch) > 1:
+            if before_call:
+                before_call()
+            stats["batch_calls"] += 1
+            try:
+                response = model.generate_content(
+                    build_batch_prompt(batch),
+                    generation_config={
+                        "response_mime_type": "application/json",
+                        "max_output_tokens": OUTPUT_TOKENS_PER_ARTICLE * len(batch),
+                    },
+                )
+                summaries = parse_batch_response(response.text, expected)
+                if served_by is not None:
+                    served_by.update((article_id, getattr(response, "model_name", None))
+                                     for article_id in summaries)
+            except (QuotaExhausted, exceptions.ResourceExhausted):
+                raise
+            except Exception as e:
+                print(f"Batched Gemini call failed for {len(batch)} articles: {e}", flush=True)
+
+        for article_id, text in batch:
+            if article_id not in summaries:
+                stats["single_calls"] += 1
+                summaries[article_id] = summarize_one(text)
+        results.update(summaries)
+
+    return results, stats
@@ -0,0 +1,244 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from collections import deque
+from google.api_core import exceptions
+from metrics import GEMINI_SECONDS, GEMINI_WAIT_SECONDS
+
+# Comma-separated "model:rpm:tpm" entries, highest priority first
+GEMINI_MODELS = os.getenv("GEMINI_MODELS", "")
+# Fraction of each published limit we allow ourselves to use
+GEMINI_QUOTA_HEADROOM = float(os.getenv("GEMINI_QUOTA_HEADROOM", "0.9"))
+# Longest pacing sleep before trying the next model instead; the last
+# usable model is always waited for
+GEMINI_MAX_WAIT = float(os.getenv("GEMINI_MAX_WAIT", "10"))
+# Expected output tokens per call when the caller does not say
+DEFAULT_OUTPUT_TOKENS = 256
+DEFAULT_RETRY_SECONDS = 60.0
+
+_RETRY_IN = re.compile(r"retry in ([\d.]+)\s*s", re.I)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+class QuotaExhausted(Exception):
+    """Every configured model is out of quota; `retry_at` is a time.monotonic() value."""
+
+    def __init__(self, retry_at):
+        super().__init__(f"All Gemini models exhausted for {max(0.0, retry_at - time.monotonic()):.0f}s")
+        self.retry_at = retry_at
+
+
+def parse_models(spec, default_model, default_rpm, default_tpm=1_000_000):
+    """Parses GEMINI_MODELS; falls back to the single default model."""
+    models = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, rest = part.partition(":")
+        rpm, _, tpm = rest.partition(":")
+        models.append((name, float(rpm or default_rpm), float(tpm or default_tpm)))
+    return models or [(default_model, float(default_rpm), float(default_tpm))]
+
+
+def retry_hint(error, default=DEFAULT_RETRY_SECONDS):
+    """Seconds the server asked us to wait, from RetryInfo details or the message."""
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            seconds = getattr(delay, "seconds", 0) + getattr(delay, "nanos", 0) / 1e9
+            if seconds > 0:
+                return seconds
+    match = _RETRY_IN.search(str(error))
+    if match:
+        return float(match.group(1))
+    return default
+
+
+class ModelBudget:
+    """
+    Even request pacing (one call every 60/rpm seconds) and a sliding
+    one-minute token window for one model.
+    """
+
+    def __init__(self, name, rpm, tpm, headroom=GEMINI_QUOTA_HEADROOM):
+        self.name = name
+        self.rpm = max(1.0, rpm * headroom)
+        self.tpm = max(1.0, tpm * headroom)
+        self.interval = 60.0 / self.rpm
+        self.next_at = 0.0     # earliest start of the next call
+        self.calls = deque()   # [timestamp, tokens] per call in the last minute
+        self.tokens = 0
+        self.blocked_until = 0.0
+
+    def blocked(self, now):
+        """True while the server's retry hint after a quota error runs."""
+        return self.blocked_until > now
+
+    def _expire(self, now):
+        while self.calls and now - self.calls[0][0] >= 60:
+            _, tokens = self.calls.popleft()
+            self.tokens -= tokens
+
+    def wait_time(self, tokens, now):
+        """Seconds until a call of `tokens` fits the pacing interval and the token window."""
+        self._expire(now)
+        wait = max(0.0, self.blocked_until - now, self.next_at - now)
+        if self.calls and self.tokens + tokens > self.tpm:
+            # Wait until enough old calls leave the window
+            excess = self.tokens + tokens - self.tpm
+            for timestamp, used in self.calls:
+                excess -= used
+                if excess <= 0:
+                    wait = max(wait, timestamp + 60 - now)
+                    break
+        return wait
+
+    def record(self, tokens, at):
+        """Books a call starting at `at`; the next one may start an interval later."""
+        entry = [at, tokens]
+        self.calls.append(entry)
+        self.tokens += tokens
+        self.next_at = at + self.interval
+        return entry
+
+    def settle(self, entry, actual_tokens):
+        """Replaces an estimated token count with the real one."""
+        if entry in self.calls:
+            self.tokens += actual_tokens - entry[1]
+        entry[1] = actual_tokens
+
+
+class GeminiScheduler:
+    """
+    Paces Gemini calls under per-model RPM/TPM budgets.
+
+    Calls to a model are spaced evenly at 60/rpm seconds, so the budget
+    never bursts into the server's limit. generate_content() picks the
+    first model in priority order that can take the call within
+    `max_wait` seconds; if none can, it waits as long as needed on the
+    last usable one. A ResourceExhausted error blocks that model for the
+    server's retry hint and the call moves on to the next model right away.
+    QuotaExhausted is raised only when every model is blocked or failed
+    this call, so the caller can use a non-Gemini fallback.
+
+    It exposes generate_content (and generate_content_async) like a
+    GenerativeModel, so it can be passed anywhere a model handle is
+    expected. Each response gets a `model_name` attribute naming the model
+    that answered, so callers can key caches on it.
+    """
+
+    def __init__(self, models, make_model, max_wait=GEMINI_MAX_WAIT, sleep=time.sleep):
+        self.budgets = [ModelBudget(name, rpm, tpm) for name, rpm, tpm in models]
+        self._make_model = make_model
+        self._handles = {}
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.counters = {budget.name: {"calls": 0, "quota_errors": 0} for budget in self.budgets}
+
+    def handle(self, name):
+        """One model handle per model name for the scheduler's lifetime."""
+        handle = self._handles.get(name)
+        if handle is None:
+            handle = self._handles[name] = self._make_model(name)
+        return handle
+
+    def _estimate(self, prompt, kwargs):
+        config = kwargs.get("generation_config") or {}
+        output = config.get("max_output_tokens", DEFAULT_OUTPUT_TOKENS) if isinstance(config, dict) \
+            else DEFAULT_OUTPUT_TOKENS
+        return estimate_tokens(prompt) + output
+
+    def reserve(self, tokens, skip=()):
+        """
+        Picks a model for a call of `tokens` and books it in the window.
+        Returns (budget, entry, delay); the caller waits `delay` before sending.
+        """
+        with self._lock:
+            now = time.monotonic()
+            usable = [budget for budget in self.budgets
+                      if budget.name not in skip and not budget.blocked(now)]
+            for budget in usable:
+                delay = budget.wait_time(tokens, now)
+                if delay <= self.max_wait or budget is usable[-1]:
+                    entry = budget.record(tokens, now + delay)
+                    self.counters[budget.name]["calls"] += 1
+                    return budget, entry, delay
+            retry_at = min((budget.blocked_until for budget in self.budgets if budget.blocked(now)),
+                           default=now + DEFAULT_RETRY_SECONDS)
+        raise QuotaExhausted(retry_at)
+
+    def settle(self, budget, entry, response):
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        if total:
+            with self._lock:
+                budget.settle(entry, total)
+        response.model_name = budget.name
+
+    def exhausted(self, budget, error):
+        """Blocks a model for the server's retry hint after a quota error."""
+        hint = retry_hint(error)
+        with self._lock:
+            budget.blocked_until = max(budget.blocked_until, time.monotonic() + hint)
+            self.counters[budget.name]["quota_errors"] += 1
+        print(f"Quota exceeded on {budget.name}; parking it for {hint:.0f}s.", flush=True)
+
+    def generate_content(self, prompt, **kwargs):
+        tokens = self._estimate(prompt, kwargs)
+        tried = set()
+        while True:
+            budget, entry, delay = self.reserve(tokens, skip=tried)
+            GEMINI_WAIT_SECONDS.observe(delay, model=budget.name)
+            if delay:
+                self._sleep(delay)
+            started = time.perf_counter()
+            try:
+                response = self.handle(budget.name).generate_content(prompt, **kwargs)
+            except exceptions.ResourceExhausted as e:
+                GEMINI_SECONDS.observe(time.perf_counter() - started, model=budget.name, outcome="quota")
+                self.exhausted(budget, e)
+                tried.add(budget.name)
+                continue
+            except Exception:
+                GEMINI_SECONDS.observe(time.perf_counter() - started, model=budget.name, outcome="error")
+                raise
+            GEMINI_SECONDS.observe(time.perf_counter() - started, model=budget.name, outcome="ok")
+            self.settle(budget, entry, response)
+            return response
+
+    async def generate_content_async(self, prompt, **kwargs):
+        """Same as generate_content, but paces with asyncio.sleep."""
+        tokens = self._estimate(prompt, kwargs)
+        tried = set()
+        while True:
+            budget, entry, delay = self.reserve(tokens, skip=tried)
+            GEMINI_WAIT_SECONDS.observe(delay, model=budget.name)
+            if delay:
+                await asyncio.sleep(delay)
+            started = time.perf_counter()
+            try:
+                response = await self.handle(budget.name).generate_content_async(prompt, **kwargs)
+            except exceptions.ResourceExhausted as e:
+                GEMINI_SECONDS.observe(time.perf_counter() - started, model=budget.name, outcome="quota")
+                self.exhausted(budget, e)
+                tried.add(budget.name)
+                continue
+            except Exception:
+                GEMINI_SECONDS.observe(time.perf_counter() - started, model=budget.name, outcome="error")
+                raise
+            GEMINI_SECONDS.observe(time.perf_counter() - started, model=budget.name, outcome="ok")
+            self.settle(budget, entry, response)
+            return response
+
+    def report(self):
+        for name, counters in self.counters.items():
+            print(f"Gemini [{name}]: {counters['calls']} calls, "
+                  f"{counters['quota_errors']} quota errors", flush=True)
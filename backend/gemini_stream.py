@@ -0,0 +1,55 @@
+import os
+import asyncio
+from metrics import QUEUE_DEPTH
+
+# Gemini requests kept in flight at once; the scheduler still enforces RPM/TPM
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+
+
+class GeminiStream:
+    """
+    Runs summarization jobs on an event loop while other threads keep
+    scraping.
+
+    append(job) can be called from any thread (it has the same signature
+    as list.append, so it can stand in for a pending list). Each job is
+    handed to `work(job)`, a coroutine, with at most `max_in_flight`
+    running at once, and `on_done(job, result)` runs in a worker thread
+    (it does blocking I/O) as soon as that job finishes, so results reach
+    persistence in completion order rather than after the whole cycle and
+    the loop keeps serving the other requests meanwhile.
+    """
+
+    def __init__(self, loop, work, on_done, max_in_flight=GEMINI_CONCURRENCY):
+        self.loop = loop
+        self._work = work
+        self._on_done = on_done
+        self._slots = asyncio.Semaphore(max(1, max_in_flight))
+        self._futures = []
+        self.completed = 0
+        self.failed = 0
+
+    async def _run(self, job):
+        async with self._slots:
+            QUEUE_DEPTH.dec(queue="gemini_waiting")
+            QUEUE_DEPTH.inc(queue="gemini_in_flight")
+            try:
+                result = await self._work(job)
+            except Exception as e:
+                print(f"Summarization job failed: {e}", flush=True)
+                self.failed += 1
+                result = None
+            finally:
+                QUEUE_DEPTH.dec(queue="gemini_in_flight")
+        await asyncio.to_thread(self._on_done, job, result)
+        self.completed += 1
+
+    def append(self, job):
+        QUEUE_DEPTH.inc(queue="gemini_waiting")
+        self._futures.append(asyncio.run_coroutine_threadsafe(self._run(job), self.loop))
+
+    async def drain(self):
+        """Waits for every job appended so far."""
+        while self._futures:
+            pending, self._futures = self._futures, []
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in pending))
@@ -0,0 +1,62 @@
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlparse
+import asyncio
+import threading
+
+
+def host_of(url):
+    """Returns the lower-cased host part of a URL."""
+    return urlparse(url).netloc.lower()
+
+
+class AsyncHostLimiter:
+    """
+    Caps the number of in-flight requests overall and per host.
+    Hosts get their own semaphore so one slow site cannot hold every slot.
+    """
+
+    def __init__(self, max_concurrency=20, per_host=2):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts = {}
+
+    def _host_semaphore(self, host):
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host)
+            self._hosts[host] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def slot(self, url):
+        # Take the host slot first so requests queued behind a busy host
+        # do not sit on global slots other hosts could use.
+        async with self._host_semaphore(host_of(url)):
+            async with self._global:
+                yield
+
+
+class HostLimiter:
+    """Thread version of AsyncHostLimiter for the thread-pool pipelines."""
+
+    def __init__(self, max_concurrency=20, per_host=2):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self._global = threading.BoundedSemaphore(max_concurrency)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, host):
+        with self._lock:
+            semaphore = self._hosts.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host)
+                self._hosts[host] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, url):
+        with self._host_semaphore(host_of(url)):
+            with self._global:
+                yield
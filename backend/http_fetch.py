@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import namedtuple
+import requests
+from requests.adapters import HTTPAdapter
+
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "15"))
+# Keep-alive connections kept per host; enough for the async and threaded pipelines
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+
+try:
+    import brotli  # noqa: F401  (lets urllib3 decode "br")
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# One downloaded page; `content` is the decompressed body
+Page = namedtuple("Page", ["url", "final_url", "status", "content", "encoding", "wire_bytes"])
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+stats = {"requests": 0, "errors": 0, "bytes": 0, "wire_bytes": 0}
+
+
+def get_session():
+    """The process-wide requests.Session (connection pool, keep-alive, compression)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+
+def _count(**counts):
+    with _stats_lock:
+        for key, value in counts.items():
+            stats[key] += value
+
+
+def fetch(url, headers=None, timeout=REQUEST_TIMEOUT):
+    """
+    Downloads url once through the shared session and returns a Page.
+    Raises for network errors and non-2xx responses.
+    """
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+    except Exception:
+        _count(requests=1, errors=1)
+        raise
+
+    content = response.content
+    try:
+        # Bytes read off the socket, i.e. before gzip/brotli decoding
+        wire_bytes = response.raw.tell() or len(content)
+    except Exception:
+        wire_bytes = len(content)
+    _count(requests=1, bytes=len(content), wire_bytes=wire_bytes)
+
+    # requests assumes ISO-8859-1 for text/* without a charset; UTF-8 is the better guess for HTML
+    encoding = response.encoding if "charset" in response.headers.get("content-type", "").lower() else None
+    return Page(url, response.url, response.status_code, content, encoding, wire_bytes)
+
+
+def page_text(page):
+    """Decoded HTML of a Page."""
+    return page.content.decode(page.encoding or "utf-8", errors="replace")
+
+
+def report(articles=None):
+    """Prints download totals; with `articles`, also the average per article."""
+    with _stats_lock:
+        snapshot = dict(stats)
+    line = (f"HTTP: {snapshot['requests']} requests ({snapshot['errors']} failed), "
+            f"{snapshot['bytes'] / 1024:.0f} KiB downloaded, {snapshot['wire_bytes'] / 1024:.0f} KiB on the wire")
+    if articles:
+        line += f", {snapshot['wire_bytes'] / articles / 1024:.0f} KiB per article"
+    print(line, flush=True)
@@ -1,7 +1,13 @@
-import json
 import os
+import json
+import time
+import argparse
+from datetime import datetime
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from json_stream import iter_records
+from local_cache import cache_path
+from news_writer import upsert_rows
 
 # Load environment variables
 load_dotenv()
@@ -9,60 +15,232 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env file.")
-    exit(1)
+# Created by setup(), so importing this module does not connect
+supabase: Client = None
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# Seconds between progress lines
+REPORT_INTERVAL = 5
+
+# Accepted spellings of each news_items column, file-style names first
+FIELD_ALIASES = {
+    "source_name": ("source", "source_name"),
+    "title": ("headline", "title"),
+    "summary_text": ("summary", "summary_text"),
+    "link": ("url", "link"),
+    "published_at": ("date", "published_at"),
+    "image_url": ("image", "image_url"),
+}
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-INPUT_FILE = r"c:\Users\India\Desktop\new idea\ai_studio_code.txt"
+def setup():
+    """Connects to Supabase once per process."""
+    global supabase
+    if supabase is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env file.")
+            exit(1)
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def import_summaries():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Error: File not found at {INPUT_FILE}")
-        return
 
+def load_source_ids(client):
+    """{source_name: id} from the sources table, read once per import."""
     try:
-        with open(INPUT_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            
-        print(f"Loaded data from {INPUT_FILE}")
-        
-        count = 0
-        for group in data:
-            source_name = group.get("source")
-            articles = group.get("articles", [])
-            
-            for article in articles:
-                item = {
-                    "source_name": source_name,
-                    "title": article.get("headline"),
-                    "summary_text": article.get("summary"),
-                    "link": article.get("url"),
-                    "published_at": article.get("date"),
-                    # We don't have image_url in the file, so we omit it.
-                    # Verify if upsert clears missing fields or only updates provided ones if keys are missing?
-                    # valid supabase-py upsert replaces the row.
-                    # To do a partial update for existing rows, we might need to check existence or use a different method.
-                    # But for now, assuming these are the "truth" or new items.
-                }
-                
-                try:
-                    # Attempt simple upsert
-                    supabase.table("news_items").upsert(item, on_conflict="link").execute()
-                    count += 1
-                    if count % 10 == 0:
-                        print(f"Processed {count} articles...")
-                except Exception as e:
-                    print(f"Error upserting {item['link']}: {e}")
-                    
-        print(f"Successfully processed {count} articles from file.")
-        
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
+        response = client.table("sources").select("id, source_name").execute()
+        return {row["source_name"]: row["id"] for row in response.data}
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        print(f"Error loading sources: {e}")
+        return {}
+
+
+def _field(record, group, column):
+    for name in FIELD_ALIASES[column]:
+        value = record.get(name)
+        if value is None and group:
+            value = group.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def to_news_row(record, group, source_ids):
+    """
+    Validates one input record and returns a news_items row, or raises
+    ValueError saying what is wrong with it.
+    """
+    row = {column: _field(record, group, column) for column in FIELD_ALIASES}
+
+    link = row["link"]
+    if not isinstance(link, str) or not link.startswith(("http://", "https://")):
+        raise ValueError(f"invalid link {link!r}")
+    for column in ("title", "summary_text", "source_name"):
+        if not isinstance(row[column], str) or not row[column].strip():
+            raise ValueError(f"missing {column}")
+    if row["published_at"] is not None:
+        try:
+            datetime.fromisoformat(str(row["published_at"]).replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"invalid date {row['published_at']!r}")
+
+    row["source_id"] = source_ids.get(row["source_name"])
+    if row["image_url"] is None:
+        # Leave images already stored for this link alone
+        del row["image_url"]
+    return row
+
+
+class Checkpoint:
+    """
+    Number of leading records of one input file that are committed, kept
+    in the local cache for --resume. Ignored once the file changes.
+    """
+
+    def __init__(self, input_path):
+        stat = os.stat(input_path)
+        self.input = {"path": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime}
+        self.path = cache_path(f"import_{os.path.basename(input_path)}.checkpoint.json")
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get("input") != self.input:
+            print("Input file changed since the checkpoint; starting from the beginning.")
+            return 0
+        return data.get("records", 0)
+
+    def save(self, records):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"input": self.input, "records": records}, f)
+        os.replace(tmp_path, self.path)
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.skipped = 0
+        self.read = 0
+        self.invalid = 0
+        self.upserted = 0
+        self.failed = 0
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.upserted / elapsed if elapsed > 0 else 0.0
+
+    def maybe_report(self):
+        now = time.perf_counter()
+        if now - self.last_report >= REPORT_INTERVAL:
+            self.last_report = now
+            print(f"Read {self.read} rows, upserted {self.upserted} ({self.rate():.0f} rows/s)...", flush=True)
+
+
+def import_summaries(path, batch_size=IMPORT_BATCH_SIZE, dry_run=False, client=None, resume=False):
+    """
+    Streams grouped, flat JSON or NDJSON records from `path` into
+    news_items, upserting `batch_size` rows per request on link.
+    Memory stays flat: only the current batch is held.
+
+    After each batch the number of leading records that are committed is
+    checkpointed; with resume=True those records are read past without
+    being sent again. A failed batch holds the checkpoint back so a
+    resumed run retries it.
+    """
+    if not os.path.exists(path):
+        print(f"Error: File not found at {path}")
+        return None
+    if client is None:
+        setup()
+        client = supabase
+
+    source_ids = load_source_ids(client)
+    stats = ImportStats()
+    checkpoint = Checkpoint(path)
+    skip = checkpoint.load() if resume else 0
+    if skip:
+        print(f"Resuming after record {skip}.")
+    # Rows with and without image_url go in separate requests so a bulk
+    # upsert never nulls images the file does not mention
+    batches = {True: [], False: []}
+    # Record number of the first row in each pending batch
+    firsts = {True: None, False: None}
+    position = 0
+    failed_at = None
+
+    def committed():
+        """Records before the first one still pending or failed."""
+        marks = [first for first in firsts.values() if first is not None]
+        if failed_at is not None:
+            marks.append(failed_at)
+        return min(marks, default=position)
+
+    def flush(has_image):
+        nonlocal failed_at
+        batch = batches[has_image]
+        if not batch:
+            return
+        try:
+            if not dry_run:
+                upsert_rows(client, batch, len(batch))
+            stats.upserted += len(batch)
+        except Exception as e:
+            stats.failed += len(batch)
+            failed_at = min(failed_at, firsts[has_image]) if failed_at is not None else firsts[has_image]
+            print(f"Error upserting {len(batch)} rows: {e}")
+        batch.clear()
+        firsts[has_image] = None
+        if not dry_run:
+            checkpoint.save(committed())
+
+    with open(path, "r", encoding="utf-8") as f:
+        for group, record in iter_records(f):
+            position += 1
+            if position <= skip:
+                stats.skipped += 1
+                continue
+            stats.read += 1
+            try:
+                row = to_news_row(record, group, source_ids)
+            except ValueError as e:
+                stats.invalid += 1
+                if stats.invalid <= 10:
+                    print(f"Skipping row {position}: {e}")
+                continue
+
+            has_image = "image_url" in row
+            if firsts[has_image] is None:
+                firsts[has_image] = position - 1
+            batches[has_image].append(row)
+            if len(batches[has_image]) >= batch_size:
+                flush(has_image)
+            stats.maybe_report()
+
+    for has_image in batches:
+        flush(has_image)
+    if not dry_run:
+        checkpoint.save(committed())
+
+    elapsed = time.perf_counter() - stats.started
+    print(f"Imported {stats.upserted} of {stats.read} rows from {path} in {elapsed:.1f}s "
+          f"({stats.rate():.0f} rows/s); {stats.invalid} invalid, {stats.failed} failed"
+          + (f", {stats.skipped} already imported." if stats.skipped else "."))
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk import summaries into news_items")
+    parser.add_argument("path", help="grouped (ai_studio_code.txt style), flat JSON or NDJSON file")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="parse and validate without writing")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the records a previous run of this file already committed")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    import_summaries()
+    args = parse_args()
+    import_summaries(args.path, args.batch_size, args.dry_run, resume=args.resume)
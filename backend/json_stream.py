@@ -0,0 +1,145 @@
+import json
+
+READ_CHUNK = 1 << 20
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonStream:
+    """
+    Incremental reader over a text file holding JSON values.
+
+    Keeps only a sliding window of the file in memory and decodes one
+    value at a time with JSONDecoder.raw_decode, so scalars and small
+    objects come out without the file ever being loaded whole.
+    """
+
+    def __init__(self, f, chunk_size=READ_CHUNK):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size=None):
+        if self._eof:
+            return False
+        data = self._f.read(size or self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of input."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self._pos += 1
+
+    def skip(self, char):
+        """Consumes `char` if it is next; returns whether it was."""
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def value(self):
+        """Decodes the next complete JSON value."""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number at the end of the window may continue in the next chunk
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # The value spans past the window; read more, growing the read size
+            if not self._fill(size) and not self._buf[self._pos:]:
+                raise ValueError("Unexpected end of JSON input")
+            size *= 2
+
+    def array_items(self, item):
+        """
+        Walks an array, calling item() once per element with the stream
+        positioned at that element.
+        """
+        self.expect("[")
+        if self.skip("]"):
+            return
+        while True:
+            yield from item()
+            if self.skip("]"):
+                return
+            self.expect(",")
+
+
+def iter_records(f, stream_key="articles", chunk_size=READ_CHUNK):
+    """
+    Yields (group, record) pairs from grouped JSON, flat JSON arrays or
+    NDJSON, without loading the file.
+
+    Objects with a `stream_key` array are groups (the ai_studio_code.txt
+    layout): their other fields form `group` and the array elements are
+    streamed one by one. Any other object is a record with group None.
+    Group fields that come after the array in the file are not known
+    while it streams, so those records are held until the group closes.
+    """
+    stream = JsonStream(f, chunk_size)
+
+    def walk_object():
+        group = {}
+        held = None
+        stream.expect("{")
+        if stream.skip("}"):
+            yield None, group
+            return
+        is_group = False
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == stream_key and stream.peek() == "[":
+                is_group = True
+                if group:
+                    yield from ((group, record) for record in stream.array_items(lambda: [stream.value()]))
+                else:
+                    held = list(stream.array_items(lambda: [stream.value()]))
+            else:
+                group[key] = stream.value()
+            if stream.skip("}"):
+                break
+            stream.expect(",")
+        if not is_group:
+            yield None, group
+        elif held:
+            yield from ((group, record) for record in held)
+
+    def walk_value():
+        if stream.peek() == "{":
+            yield from walk_object()
+        else:
+            raise ValueError(f"Expected an object but found {stream.peek()!r}")
+
+    first = stream.peek()
+    if first == "[":
+        yield from stream.array_items(walk_value)
+        return
+    # NDJSON or concatenated objects
+    while stream.peek():
+        yield from walk_value()
@@ -0,0 +1,147 @@
+import numpy as np
+from sumy.summarizers._summarizer import AbstractSummarizer
+
+
+class NumpyLexRank:
+    """
+    Vectorized LexRank with the same scoring as sumy's LexRankSummarizer.
+
+    sumy computes IDF and the cosine matrix in nested Python loops
+    (O(sentences^2 * words) interpreter work). Here a whole batch of
+    documents is turned into one TF-IDF matrix in coordinate form with
+    np.unique, each document's similarity matrix is one matrix product,
+    and the power iteration runs for the whole batch at once.
+
+    Sentence selection goes through sumy's own _get_best_sentences so
+    ties and duplicate sentences resolve the same way.
+    """
+
+    threshold = 0.1
+    epsilon = 0.1
+
+    def __init__(self, stemmer, stop_words=()):
+        self.stem = stemmer
+        self.stop_words = frozenset(word.lower() for word in stop_words)
+
+    def __call__(self, document, sentences_count):
+        return self.summarize_batch([document], sentences_count)[0]
+
+    def summarize_batch(self, documents, sentences_count):
+        """Returns the best sentences of every document, like sumy would."""
+        summaries = []
+        for document, scores in zip(documents, self.rate_batch(documents)):
+            if scores is None:
+                summaries.append(())
+                continue
+            ratings = dict(zip(document.sentences, scores))
+            summaries.append(
+                AbstractSummarizer._get_best_sentences(document.sentences, sentences_count, ratings)
+            )
+        return summaries
+
+    def _terms(self, sentence):
+        stop_words = self.stop_words
+        terms = []
+        for word in sentence.words:
+            word = word.lower()
+            if word not in stop_words:
+                terms.append(self.stem(word))
+        return terms
+
+    def rate_batch(self, documents):
+        """Returns one score array per document (None for documents without sentences)."""
+        vocabulary = {}
+        sentence_ids = []
+        term_ids = []
+        doc_sizes = []
+
+        sentence_index = 0
+        for document in documents:
+            sentences = document.sentences
+            doc_sizes.append(len(sentences))
+            for sentence in sentences:
+                for term in self._terms(sentence):
+                    term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                    sentence_ids.append(sentence_index)
+                sentence_index += 1
+
+        doc_sizes = np.array(doc_sizes, dtype=np.int64)
+        doc_starts = np.concatenate(([0], np.cumsum(doc_sizes)[:-1])).astype(np.int64)
+        doc_of_sentence = np.repeat(np.arange(len(documents)), doc_sizes)
+
+        weights_by_doc = [None] * len(documents)
+        if term_ids:
+            vocab_size = len(vocabulary)
+            keys = np.array(sentence_ids, dtype=np.int64) * vocab_size + np.array(term_ids, dtype=np.int64)
+            cell_keys, counts = np.unique(keys, return_counts=True)
+            rows = cell_keys // vocab_size
+            cols = cell_keys % vocab_size
+
+            # tf = count / max count within the sentence
+            row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            row_max = np.maximum.reduceat(counts, row_starts)
+            tf = counts / np.repeat(row_max, np.diff(np.r_[row_starts, len(rows)]))
+
+            # idf = log(N / (1 + n_j)) with N and n_j counted per document
+            docs = doc_of_sentence[rows]
+            doc_term_keys = docs * vocab_size + cols
+            unique_doc_terms, doc_term_index, n_j = np.unique(
+                doc_term_keys, return_inverse=True, return_counts=True
+            )
+            idf = np.log(doc_sizes[unique_doc_terms // vocab_size] / (1.0 + n_j))
+            weights = tf * idf[doc_term_index]
+
+            # Columns are (document, term) pairs, so each document owns a
+            # contiguous column range and a contiguous block of cells.
+            doc_col_starts = np.searchsorted(unique_doc_terms // vocab_size, np.arange(len(documents) + 1))
+            doc_cell_starts = np.searchsorted(docs, np.arange(len(documents) + 1))
+            for d in range(len(documents)):
+                lo, hi = doc_cell_starts[d], doc_cell_starts[d + 1]
+                matrix = np.zeros((doc_sizes[d], doc_col_starts[d + 1] - doc_col_starts[d]))
+                matrix[rows[lo:hi] - doc_starts[d], doc_term_index[lo:hi] - doc_col_starts[d]] = weights[lo:hi]
+                weights_by_doc[d] = matrix
+
+        size = int(doc_sizes.max()) if len(documents) else 0
+        transitions = np.zeros((len(documents), size, size))
+        for d, count in enumerate(doc_sizes):
+            if count == 0:
+                continue
+            matrix = weights_by_doc[d]
+            if matrix is None:
+                matrix = np.zeros((count, 0))
+            transitions[d, :count, :count] = self._transition_matrix(matrix)
+
+        scores = self._power_method(transitions, doc_sizes)
+        return [scores[d, :count] if count else None for d, count in enumerate(doc_sizes)]
+
+    def _transition_matrix(self, weights):
+        norms = np.sqrt(np.einsum("ij,ij->i", weights, weights))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarity = (weights @ weights.T) / np.outer(norms, norms)
+        similarity[~np.isfinite(similarity)] = 0.0
+        similarity[(norms == 0)[:, None] | (norms == 0)[None, :]] = 0.0
+
+        adjacency = (similarity > self.threshold).astype(float)
+        degrees = adjacency.sum(axis=1)
+        degrees[degrees == 0] = 1
+        return adjacency / degrees[:, None]
+
+    def _power_method(self, transitions, doc_sizes):
+        """Batched version of sumy's power_method; each document stops on its own."""
+        p = np.zeros(transitions.shape[:2])
+        for d, count in enumerate(doc_sizes):
+            if count:
+                p[d, :count] = 1.0 / count
+
+        transposed = transitions.transpose(0, 2, 1)
+        active = doc_sizes > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            while active.any():
+                next_p = np.einsum("bij,bj->bi", transposed[active], p[active])
+                next_p /= np.linalg.norm(next_p, axis=1)[:, None]
+                delta = np.linalg.norm(next_p - p[active], axis=1)
+                p[active] = next_p
+                still_active = np.zeros_like(active)
+                still_active[np.flatnonzero(active)] = delta > self.epsilon
+                active = still_active
+        return p
@@ -0,0 +1,13 @@
+import os
+
+# Local state (spools, caches, indexes) lives here unless overridden
+CACHE_DIR = os.getenv(
+    "LEXIS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+def cache_path(filename):
+    """Returns the path of a file inside the local cache directory, creating it if needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
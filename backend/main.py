@@ -1,16 +1,23 @@
 import os
-import time
+import argparse
+import asyncio
 import feedparser
-import nltk
-from sumy.parsers.html import HtmlParser
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lex_rank import LexRankSummarizer
-from sumy.nlp.stemmers import Stemmer
-from sumy.utils import get_stop_words
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
+from host_limits import AsyncHostLimiter
+from dedup import fetch_existing_links
+from news_writer import NewsWriter
+from feed_cache import FeedCache
+from seen_index import SeenIndex
+from summarizer_engine import get_engine, ensure_nltk_data
+from summarize_pool import SummarizePool, SUMMARIZE_WORKERS
+from rate_limit import HostRateLimiter
+from http_fetch import fetch as fetch_page, get_session, HEADERS, REQUEST_TIMEOUT
+from http_fetch import report as report_http
+import metrics
+from metrics import (FEEDS_FETCHED, ENTRIES_SEEN, ENTRIES_DEDUPED, ARTICLES_SUMMARIZED,
+                     ARTICLES_SAVED, FAILURES, STAGE_SECONDS, QUEUE_DEPTH)
 
 # Load environment variables
 load_dotenv()
@@ -18,16 +25,29 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Supabase client and local caches, created by setup(). Not at import time:
+# the summarize pool's forkserver workers re-import this module as __mp_main__
+supabase: Client = None
+# ETag / Last-Modified validators for FEEDS
+feed_cache = None
+# Local index of links already stored, consulted before Supabase
+seen_index = None
+# Per-host token buckets, configured from the sources table
+rate_limiter = None
 
-# Download NLTK data if not present (quietly)
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('tokenizers/punkt_tab')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-    nltk.download('punkt_tab', quiet=True)
+def setup():
+    """Connects to Supabase, fetches NLTK data and opens the local caches, once per process."""
+    global supabase, feed_cache, seen_index, rate_limiter
+    if supabase is None:
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Download NLTK data if not present (quietly)
+    ensure_nltk_data()
+    if feed_cache is None:
+        feed_cache = FeedCache()
+    if seen_index is None:
+        seen_index = SeenIndex()
+    if rate_limiter is None:
+        rate_limiter = HostRateLimiter()
 
 # Configuration
 FEEDS = {
@@ -43,6 +63,10 @@ FEEDS = {
     "Mashable": "https://mashable.com/feed"
 }
 
+# Async ingestion limits (see main_async)
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "20"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))
+
 def get_published_time(entry):
     """Extracts and converts published time to UTC datetime."""
     if hasattr(entry, 'published_parsed'):
@@ -68,60 +92,89 @@ def is_recent(published_dt):
     two_days_ago = datetime.now(timezone.utc) - timedelta(days=2)
     return published_dt > two_days_ago
 
+def fresh_entries(entries):
+    """Returns (entry, published_dt) pairs that pass the freshness filter."""
+    fresh = []
+    for entry in entries:
+        published_dt = get_published_time(entry)
+        if is_recent(published_dt):
+            fresh.append((entry, published_dt))
+    return fresh
+
 def check_if_exists(link):
-    """Checks if the article link already exists in Supabase."""
-    try:
-        response = supabase.table("news_items").select("link").eq("link", link).execute()
-        return len(response.data) > 0
-    except Exception as e:
-        print(f"Error checking existence for {link}: {e}")
-        return False
+    """Checks if the article link already exists, asking Supabase only if the local index is unsure."""
+    return link in fetch_existing_links(supabase, [link], index=seen_index)
 
-def summarize_article(url, sentence_count=3):
-    """Summarizes the article using LexRank from the sumy library."""
-    try:
-        language = "english"
-        parser = HtmlParser.from_url(url, Tokenizer(language))
-        
-        stemmer = Stemmer(language)
-        summarizer = LexRankSummarizer(stemmer)
-        summarizer.stop_words = get_stop_words(language)
+def count_entries(source_name, candidates, entries, existing_links):
+    """Feeds the entry counters: dropped as stale, dropped as already stored."""
+    ENTRIES_DEDUPED.inc(len(candidates) - len(entries), source=source_name, reason="stale")
+    ENTRIES_DEDUPED.inc(sum(1 for entry, _ in entries if entry.link in existing_links),
+                        source=source_name, reason="existing")
 
-        summary_sentences = summarizer(parser.document, sentence_count)
-        
-        if not summary_sentences:
-            return None
+def entry_item(source_name, source_id, entry, published_dt):
+    """The news_items row for a feed entry, before it is summarized."""
+    return {
+        "title": entry.title,
+        "source_name": source_name,
+        "source_id": source_id,
+        "link": entry.link,
+        "image_url": get_image_url(entry),
+        "published_at": published_dt
+    }
 
-        # Join sentences into a single paragraph
-        summary_text = " ".join([str(sentence) for sentence in summary_sentences])
-        
-        # Limit to 75 words
-        words = summary_text.split()
-        if len(words) > 75:
-            summary_text = " ".join(words[:75]) + "..."
-            
-        return summary_text
+def feed_candidates(source_name, fetched):
+    """
+    The entries to look at for a fetched feed: those waiting in the retry
+    table, then the feed's own (none on a 304). Returns (entries, retried links).
+    """
+    if fetched.content is None:
+        FEEDS_FETCHED.inc(source=source_name, status="not_modified")
+        feed_entries = []
+    else:
+        FEEDS_FETCHED.inc(source=source_name, status="ok")
+        feed_entries = feedparser.parse(fetched.content).entries
+        ENTRIES_SEEN.inc(len(feed_entries), source=source_name)
+    return feed_cache.with_retries(source_name, feed_entries)
+
+def summarize_article(url, sentence_count=3, source_name=None):
+    """
+    Summarizes the article using LexRank from the sumy library.
+    Download errors are raised; None means the page gave no summary.
+    """
+    with STAGE_SECONDS.time(stage="download", source=source_name):
+        html = download(url)
+    return summarize_html(html, url, sentence_count, source_name)
+
+def summarize_html(html, url, sentence_count=3, source_name=None):
+    """Summarizes an already downloaded page (bytes or str) with the shared engine."""
+    try:
+        with STAGE_SECONDS.time(stage="summarize", source=source_name):
+            summary, _ = get_engine().summarize_html(html, url, sentence_count)
+        if summary:
+            ARTICLES_SUMMARIZED.inc(source=source_name, summarizer="lexrank")
+        return summary
 
     except Exception as e:
         print(f"Error summarizing {url}: {e}")
         return None
 
+# Write-behind writer for news_items, open for the length of a cycle
+writer = None
+
 def save_to_supabase(item):
-    """Saves the processed item to Supabase."""
+    """Queues the processed item for a batched upsert to Supabase. Returns True once it is spooled."""
     try:
-        data = {
-            "title": item["title"],
-            "source_name": item["source_name"],
-            "source_id": item.get("source_id"),
-            "summary_text": item["summary_text"],
-            "link": item["link"],
-            "image_url": item.get("image_url"),
-            "published_at": item["published_at"].isoformat()
-        }
-        supabase.table("news_items").insert(data).execute()
-        print(f"Saved: {item['title']}")
+        writer.add(item)
+        seen_index.add([item["link"]])
+        ARTICLES_SAVED.inc(source=item["source_name"])
+        feed_cache.resolve([item["link"]])
+        print(f"Queued: {item['title']}")
+        return True
     except Exception as e:
+        FAILURES.inc(stage="save", source=item["source_name"])
+        feed_cache.retry_later(item["source_name"], item, failed=True)
         print(f"Error saving {item['title']}: {e}")
+        return False
 
 def process_feed(source_name, feed_url):
     print(f"Processing {source_name}...")
@@ -131,46 +184,60 @@ def process_feed(source_name, feed_url):
         print(f"Skipping {source_name}: Source ID not found")
         return
 
-    feed = feedparser.parse(feed_url)
+    rate_limiter.wait(feed_url, source_name)
+    try:
+        with STAGE_SECONDS.time(stage="feed", source=source_name):
+            fetched = feed_cache.fetch(source_name, feed_url, HEADERS, REQUEST_TIMEOUT, get_session())
+    except Exception:
+        FEEDS_FETCHED.inc(source=source_name, status="error")
+        raise
+    candidates, retried = feed_candidates(source_name, fetched)
+    if not candidates:
+        print(f"{source_name}: nothing new, skipping.")
+        feed_cache.commit(fetched)
+        return
     
-    for entry in feed.entries:
-        published_dt = get_published_time(entry)
-        
-        # Freshness Filter (1 Hour)
-        if not is_recent(published_dt):
-            continue
-            
+    # Freshness Filter
+    entries = fresh_entries(candidates)
+
+    # Deduplication: one bulk lookup for the whole feed
+    with STAGE_SECONDS.time(stage="dedup", source=source_name):
+        existing_links = fetch_existing_links(supabase, [entry.link for entry, _ in entries], index=seen_index)
+    count_entries(source_name, candidates, entries, existing_links)
+    # Retried links that went stale or got stored meanwhile are done
+    feed_cache.resolve(retried - {entry.link for entry, _ in entries if entry.link not in existing_links})
+
+    for entry, published_dt in entries:
         link = entry.link
         
-        # Deduplication
-        if check_if_exists(link):
+        if link in existing_links:
             # print(f"Skipping (Exists): {entry.title}")
             continue
             
         print(f"New Article: {entry.title}")
-
-        # Extract Image
-        image_url = get_image_url(entry)
+        item = entry_item(source_name, source_id, entry, published_dt)
         
         # Summarize using LexRank
-        summary = summarize_article(link, sentence_count=4) # Aiming for 3-5 lines roughly
+        rate_limiter.wait(link, source_name)
+        try:
+            summary = summarize_article(link, sentence_count=4, source_name=source_name) # Aiming for 3-5 lines roughly
+        except Exception as e:
+            FAILURES.inc(stage="download", source=source_name)
+            feed_cache.retry_later(source_name, item, failed=True)
+            print(f"Error downloading {link}: {e}")
+            continue
         
         if summary:
-            item = {
-                "title": entry.title,
-                "source_name": source_name,
-                "source_id": source_id,
-                "summary_text": summary,
-                "link": link,
-                "image_url": image_url,
-                "published_at": published_dt
-            }
+            item["summary_text"] = summary
             save_to_supabase(item)
-            # small sleep to be nice to the target server
-            time.sleep(1) 
         else:
+            FAILURES.inc(stage="summarize", source=source_name)
+            feed_cache.retry_later(source_name, item, failed=True)
             print("Skipping due to summarization failure.")
 
+    # Failed entries wait in the retry table, so the validators are always stored
+    feed_cache.commit(fetched)
+
 
 # Cache for source IDs
 SOURCE_IDS = {}
@@ -178,23 +245,178 @@ SOURCE_IDS = {}
 def load_source_ids():
     """Loads source IDs from Supabase."""
     try:
-        response = supabase.table("sources").select("id, source_name").execute()
+        response = supabase.table("sources").select("*").execute()
         for row in response.data:
             SOURCE_IDS[row['source_name']] = row['id']
+            rate_limiter.configure_source(row)
         print(f"Loaded {len(SOURCE_IDS)} source IDs.")
     except Exception as e:
         print(f"Error loading source IDs: {e}")
 
+def download(url):
+    """Blocking GET through the shared session; returns the page bytes."""
+    return fetch_page(url).content
+
+async def fetch_bytes(limiter, url, source_name=None):
+    """Downloads a URL in a worker thread once the host's rate and a limiter slot allow it."""
+    await rate_limiter.wait_async(url, source_name)
+    async with limiter.slot(url):
+        return await asyncio.to_thread(download, url)
+
+# Process pool for LexRank in async mode, open for the length of a cycle
+summarize_pool = None
+
+async def process_entry_async(limiter, source_name, source_id, entry, published_dt):
+    """Downloads, summarizes and queues one entry. Returns True when it was saved."""
+    link = entry.link
+    print(f"New Article: {entry.title}")
+    item = entry_item(source_name, source_id, entry, published_dt)
+
+    try:
+        with STAGE_SECONDS.time(stage="download", source=source_name):
+            html = await fetch_bytes(limiter, link, source_name)
+    except Exception as e:
+        FAILURES.inc(stage="download", source=source_name)
+        await asyncio.to_thread(feed_cache.retry_later, source_name, item, True)
+        print(f"Error downloading {link}: {e}")
+        return False
+
+    # LexRank is CPU bound, it runs in the worker processes
+    QUEUE_DEPTH.inc(queue="summarize_pool")
+    try:
+        with STAGE_SECONDS.time(stage="summarize", source=source_name):
+            summary, _ = await summarize_pool.summarize_html(html, link, 4)
+    finally:
+        QUEUE_DEPTH.dec(queue="summarize_pool")
+
+    if summary:
+        ARTICLES_SUMMARIZED.inc(source=source_name, summarizer="lexrank")
+        item["summary_text"] = summary
+        return await asyncio.to_thread(save_to_supabase, item)
+    FAILURES.inc(stage="summarize", source=source_name)
+    await asyncio.to_thread(feed_cache.retry_later, source_name, item, True)
+    print("Skipping due to summarization failure.")
+    return False
+
+async def process_feed_async(limiter, source_name, feed_url):
+    print(f"Processing {source_name}...")
+
+    source_id = SOURCE_IDS.get(source_name)
+    if not source_id:
+        print(f"Skipping {source_name}: Source ID not found")
+        return
+
+    await rate_limiter.wait_async(feed_url, source_name)
+    try:
+        async with limiter.slot(feed_url):
+            with STAGE_SECONDS.time(stage="feed", source=source_name):
+                fetched = await asyncio.to_thread(
+                    feed_cache.fetch, source_name, feed_url, HEADERS, REQUEST_TIMEOUT, get_session()
+                )
+    except Exception:
+        FEEDS_FETCHED.inc(source=source_name, status="error")
+        raise
+    candidates, retried = await asyncio.to_thread(feed_candidates, source_name, fetched)
+    if not candidates:
+        print(f"{source_name}: nothing new, skipping.")
+        await asyncio.to_thread(feed_cache.commit, fetched)
+        return
+
+    entries = fresh_entries(candidates)
+    with STAGE_SECONDS.time(stage="dedup", source=source_name):
+        existing_links = await asyncio.to_thread(
+            fetch_existing_links, supabase, [entry.link for entry, _ in entries], index=seen_index
+        )
+    count_entries(source_name, candidates, entries, existing_links)
+    await asyncio.to_thread(
+        feed_cache.resolve, retried - {entry.link for entry, _ in entries if entry.link not in existing_links}
+    )
+
+    tasks = [
+        process_entry_async(limiter, source_name, source_id, entry, published_dt)
+        for entry, published_dt in entries
+        if entry.link not in existing_links
+    ]
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Error processing entry from {source_name}: {result}")
+
+    # Failed entries wait in the retry table, so the validators are always stored
+    await asyncio.to_thread(feed_cache.commit, fetched)
+
+async def main_async(workers=SUMMARIZE_WORKERS):
+    """
+    Fetches every feed and article concurrently.
+    Politeness comes from the per-host cap instead of a fixed sleep,
+    so a cycle takes about as long as the slowest source.
+    Summaries are computed by `workers` processes while fetching goes on.
+    """
+    global writer, summarize_pool
+    print("Starting LexRank News Fetcher (async)...")
+    setup()
+    metrics.start("main")
+    await asyncio.to_thread(load_source_ids)
+
+    writer = NewsWriter(supabase)
+    summarize_pool = SummarizePool(workers)
+    limiter = AsyncHostLimiter(FETCH_CONCURRENCY, FETCH_PER_HOST)
+    sources = list(FEEDS.items())
+    try:
+        results = await asyncio.gather(
+            *(process_feed_async(limiter, source, url) for source, url in sources),
+            return_exceptions=True
+        )
+        for (source, _), result in zip(sources, results):
+            if isinstance(result, Exception):
+                FAILURES.inc(stage="feed", source=source)
+                print(f"Error processing feed {source}: {result}")
+    finally:
+        await asyncio.to_thread(summarize_pool.close)
+        await asyncio.to_thread(writer.close)
+    report_http()
+    feed_cache.report()
+    seen_index.report()
+    summarize_pool.report()
+    metrics.finish()
+    print("Cycle complete.")
+
 def main():
+    global writer
     print("Starting LexRank News Fetcher...")
+    setup()
+    metrics.start("main")
     load_source_ids()
     
-    for source, url in FEEDS.items():
-        try:
-            process_feed(source, url)
-        except Exception as e:
-            print(f"Error processing feed {source}: {e}")
+    writer = NewsWriter(supabase)
+    try:
+        for source, url in FEEDS.items():
+            try:
+                process_feed(source, url)
+            except Exception as e:
+                FAILURES.inc(stage="feed", source=source)
+                print(f"Error processing feed {source}: {e}")
+    finally:
+        writer.close()
+    report_http()
+    feed_cache.report()
+    seen_index.report()
+    get_engine().cache.report()
+    metrics.finish()
     print("Cycle complete.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="LexRank news fetcher")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="fetch feeds and articles concurrently")
+    parser.add_argument("--workers", type=int, default=SUMMARIZE_WORKERS,
+                        help="summarization processes in async mode (default: CPU count)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.use_async:
+        asyncio.run(main_async(args.workers))
+    else:
+        main()
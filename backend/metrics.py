@@ -0,0 +1,262 @@
+import os
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Serve /metrics on this port while a pipeline runs (0 = off)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_ADDR = os.getenv("METRICS_ADDR", "127.0.0.1")
+# Directory for node_exporter's textfile collector; each pipeline writes lexis_<pipeline>.prom
+METRICS_TEXTFILE_DIR = os.getenv("METRICS_TEXTFILE_DIR", "")
+
+PREFIX = "lexis_"
+# Seconds; covers a cache hit up to a slow Gemini call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+# Labels added to every series, e.g. {"pipeline": "main"}
+_constant_labels = {}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    pairs = list(_constant_labels.items()) + [pair for pair in pairs if pair[1] is not None]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name) for name in self.labelnames)
+
+    def _series(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._series(), key=lambda item: str(item[0])):
+            lines.append(f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, n=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; set_function() reads it only when scraped."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, n=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def dec(self, n=1, **labels):
+        self.inc(-n, **labels)
+
+    def set_function(self, function, **labels):
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def _series(self):
+        with self._lock:
+            series = dict(self._values)
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                series[key] = function()
+            except Exception:
+                pass
+        return list(series.items())
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; each observation is one bisect and one locked update."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent in the block, also when it raises."""
+        return _Timer(self, labels)
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in sorted(series, key=lambda item: str(item[0])):
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(pairs + [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return lines
+
+
+# Shared by main.py, ai_news_service.py and fetch_news.py
+FEEDS_FETCHED = Counter("feeds_fetched_total", "Feed or front-page fetches by outcome (ok, not_modified, error).",
+                        ("source", "status"))
+ENTRIES_SEEN = Counter("entries_seen_total", "Feed entries or candidate links found.", ("source",))
+ENTRIES_DEDUPED = Counter("entries_deduped_total", "Entries dropped before download, by reason.",
+                          ("source", "reason"))
+ARTICLES_SUMMARIZED = Counter("articles_summarized_total", "Articles summarized, by summarizer.",
+                              ("source", "summarizer"))
+ARTICLES_SAVED = Counter("articles_saved_total", "Articles queued or upserted to news_items.", ("source",))
+FAILURES = Counter("failures_total", "Failures by pipeline stage.", ("stage", "source"))
+STAGE_SECONDS = Histogram("stage_seconds", "Seconds spent per stage and source.", ("stage", "source"))
+GEMINI_SECONDS = Histogram("gemini_call_seconds", "Gemini request latency by model and outcome.",
+                           ("model", "outcome"))
+GEMINI_WAIT_SECONDS = Histogram("gemini_wait_seconds", "Pacing delay before a Gemini request.", ("model",))
+QUEUE_DEPTH = Gauge("queue_depth", "Items waiting or in flight, per queue.", ("queue",))
+CYCLE_SECONDS = Gauge("cycle_seconds", "Duration of the last completed cycle.")
+CYCLE_COMPLETED = Gauge("cycle_completed_timestamp_seconds", "Unix time the last cycle finished.")
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_started = None
+
+
+def serve(port=METRICS_PORT, addr=METRICS_ADDR):
+    """Serves /metrics from a daemon thread. Returns the server."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((addr, port), _Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        print(f"Serving metrics on http://{addr}:{_server.server_address[1]}/metrics", flush=True)
+    return _server
+
+
+def write_textfile(path):
+    """Writes every metric to `path` atomically, for node_exporter's textfile collector."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+def start(pipeline):
+    """
+    Labels every series with `pipeline` and starts the /metrics server
+    when METRICS_PORT is set. Call once at the top of a cycle.
+    """
+    global _started
+    _constant_labels["pipeline"] = pipeline
+    _started = time.perf_counter()
+    if METRICS_PORT:
+        try:
+            serve()
+        except OSError as e:
+            print(f"Metrics server not started: {e}", flush=True)
+
+
+def finish():
+    """Records the cycle duration and writes the textfile when METRICS_TEXTFILE_DIR is set."""
+    if _started is not None:
+        CYCLE_SECONDS.set(time.perf_counter() - _started)
+    CYCLE_COMPLETED.set(time.time())
+    if METRICS_TEXTFILE_DIR:
+        try:
+            os.makedirs(METRICS_TEXTFILE_DIR, exist_ok=True)
+            path = os.path.join(METRICS_TEXTFILE_DIR, f"lexis_{_constant_labels.get('pipeline', 'backend')}.prom")
+            write_textfile(path)
+        except OSError as e:
+            print(f"Error writing metrics textfile: {e}", flush=True)
@@ -0,0 +1,156 @@
+import os
+import json
+import argparse
+import textwrap
+from local_cache import cache_path
+from news_snapshot import SnapshotWriter
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+EXPORT_COLUMNS = "id, created_at, source_name, title, summary_text, link, published_at, image_url"
+
+
+def format_article(row):
+    """The latest_news.json shape of a news_items row."""
+    return {
+        "source": row.get("source_name"),
+        "headline": row.get("title"),
+        "summary": row.get("summary_text"),
+        "url": row.get("link"),
+        "image": row.get("image_url"),
+        "date": row.get("published_at")
+    }
+
+
+def iter_news_pages(client, since=None, after=None, page_size=EXPORT_PAGE_SIZE, columns=EXPORT_COLUMNS):
+    """
+    Yields pages of news_items ordered by (created_at, id).
+
+    Keyset pagination: each page asks for rows strictly after the last
+    (created_at, id) seen, so no request hits the PostgREST row cap and
+    rows inserted during the export are neither skipped nor repeated.
+    `after` is a (created_at, id) watermark; `since` a created_at lower
+    bound used when there is no watermark. `columns` must include
+    created_at and id.
+    """
+    while True:
+        query = client.table("news_items").select(columns)
+        if after:
+            created_at, row_id = after
+            query = query.or_(
+                f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{row_id})'
+            )
+        elif since:
+            query = query.gte("created_at", since)
+        rows = query.order("created_at").order("id").limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+        if len(rows) < page_size:
+            return
+
+
+class Watermark:
+    """Last exported (created_at, id) for one output file, kept in the local cache."""
+
+    def __init__(self, output_path):
+        name = os.path.basename(output_path)
+        self.path = cache_path(f"export_{name}.watermark.json")
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["created_at"], data["id"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, created_at, row_id):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": created_at, "id": row_id}, f)
+        os.replace(tmp_path, self.path)
+
+
+def export_news(client, output_path, since=None, fmt="ndjson", resume=False, page_size=EXPORT_PAGE_SIZE):
+    """
+    Streams news_items rows to output_path one page at a time, so memory
+    stays flat however many rows there are.
+
+    fmt="ndjson" writes one article per line. With resume=True it appends
+    to the file from the stored watermark, which is advanced after every
+    page, so an interrupted export picks up where it stopped.
+    fmt="json" writes the same indented array json.dump(..., indent=4)
+    produced, one element at a time, to a temporary file that replaces
+    output_path at the end. fmt="snapshot" writes the same records as a
+    columnar news_snapshot file. With resume=True these two hold only
+    rows newer than the previous export.
+    Returns the number of rows written.
+    """
+    watermark = Watermark(output_path)
+    after = watermark.load() if resume else None
+    last = None
+    count = 0
+
+    if fmt == "ndjson":
+        mode = "a" if resume and after else "w"
+        with open(output_path, mode, encoding="utf-8") as f:
+            for rows in iter_news_pages(client, since, after, page_size):
+                for row in rows:
+                    f.write(json.dumps(format_article(row), ensure_ascii=False))
+                    f.write("\n")
+                f.flush()
+                os.fsync(f.fileno())
+                count += len(rows)
+                last = rows[-1]
+                watermark.save(last["created_at"], last["id"])
+        return count
+
+    if fmt == "snapshot":
+        writer = SnapshotWriter(output_path)
+        for rows in iter_news_pages(client, since, after, page_size):
+            for row in rows:
+                writer.add(format_article(row))
+            count += len(rows)
+            last = rows[-1]
+        writer.close()
+        if last is not None:
+            watermark.save(last["created_at"], last["id"])
+        return count
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for rows in iter_news_pages(client, since, after, page_size):
+            for row in rows:
+                f.write(",\n" if count else "\n")
+                f.write(textwrap.indent(json.dumps(format_article(row), indent=4, ensure_ascii=False), "    "))
+                count += 1
+            last = rows[-1]
+        f.write("\n]" if count else "]")
+    os.replace(tmp_path, output_path)
+    if last is not None:
+        watermark.save(last["created_at"], last["id"])
+    return count
+
+
+def main():
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Stream news_items to NDJSON, JSON or a columnar snapshot")
+    parser.add_argument("--output", default="latest_news.ndjson")
+    parser.add_argument("--format", choices=["ndjson", "json", "snapshot"], default="ndjson")
+    parser.add_argument("--since", help="ISO timestamp; only rows created at or after it")
+    parser.add_argument("--resume", action="store_true", help="continue from the stored watermark")
+    parser.add_argument("--page-size", type=int, default=EXPORT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    load_dotenv()
+    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    count = export_news(supabase, args.output, args.since, args.format, args.resume, args.page_size)
+    print(f"Exported {count} articles to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import os
+import sys
+import mmap
+import struct
+import shutil
+import tempfile
+from array import array
+
+# File layout (little-endian, every buffer 8-byte aligned):
+#   header     MAGIC, version, row count, column count
+#   directory  one DIRECTORY_ENTRY per column
+#   buffers    per column: validity bitmap (1 bit per row), then
+#              string columns: u32 offsets (rows + 1) and the UTF-8 data,
+#              dict columns:   u32 offsets and data of the distinct values,
+#                              then one u16/u32 code per row
+MAGIC = b"LXSNAP\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sIII")
+# name, encoding, code width, reserved, dictionary size,
+# validity, offsets, data, data length, codes
+DIRECTORY_ENTRY = struct.Struct("<16sBBHI5Q")
+
+STRING = 0
+DICTIONARY = 1
+
+# The latest_news.json record, with the repeated source name dictionary-encoded
+SNAPSHOT_COLUMNS = [
+    ("source", DICTIONARY),
+    ("headline", STRING),
+    ("summary", STRING),
+    ("url", STRING),
+    ("image", STRING),
+    ("date", STRING),
+]
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _pad(n):
+    return (8 - n % 8) % 8
+
+
+def _bitmap_size(rows):
+    return (rows + 7) // 8
+
+
+def _le(values):
+    """array in file byte order."""
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class _StringBuffers:
+    """Offsets in memory, string bytes spooled to a temp file so memory stays small."""
+
+    def __init__(self):
+        self.offsets = array("I", [0])
+        self.data = tempfile.TemporaryFile()
+        self.size = 0
+
+    def append(self, value):
+        encoded = value.encode("utf-8")
+        self.data.write(encoded)
+        self.size += len(encoded)
+        if self.size > 0xFFFFFFFF:
+            raise ValueError("snapshot string column exceeds 4 GiB")
+        self.offsets.append(self.size)
+
+
+class SnapshotWriter:
+    """
+    Builds a columnar snapshot one record at a time.
+    add() takes latest_news.json-style dicts; close() writes the file.
+    """
+
+    def __init__(self, path, columns=SNAPSHOT_COLUMNS):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        self._validity = {name: bytearray() for name, _ in columns}
+        self._strings = {}
+        self._dictionaries = {}
+        self._codes = {}
+        for name, encoding in columns:
+            self._strings[name] = _StringBuffers()
+            if encoding == DICTIONARY:
+                self._dictionaries[name] = {}
+                self._codes[name] = array("I")
+
+    def add(self, record):
+        byte, bit = divmod(self.rows, 8)
+        for name, encoding in self.columns:
+            validity = self._validity[name]
+            if bit == 0:
+                validity.append(0)
+            value = record.get(name)
+            if value is not None:
+                validity[byte] |= 1 << bit
+                value = str(value)
+            if encoding == DICTIONARY:
+                codes = self._dictionaries[name]
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(codes)
+                    self._strings[name].append(value or "")
+                self._codes[name].append(code)
+            else:
+                self._strings[name].append(value or "")
+        self.rows += 1
+
+    def _layout(self):
+        """Directory entries and the buffers to write, in file order."""
+        position = HEADER.size + DIRECTORY_ENTRY.size * len(self.columns)
+        position += _pad(position)
+        entries = []
+        buffers = []
+
+        def place(buffer, size):
+            nonlocal position
+            start = position
+            buffers.append((start, buffer, size))
+            position += size + _pad(size)
+            return start
+
+        for name, encoding in self.columns:
+            strings = self._strings[name]
+            validity = place(bytes(self._validity[name]), _bitmap_size(self.rows))
+            offsets = place(_le(strings.offsets).tobytes(), 4 * len(strings.offsets))
+            data = place(strings.data, strings.size)
+            codes = 0
+            width = 0
+            dictionary_size = 0
+            if encoding == DICTIONARY:
+                dictionary_size = len(self._dictionaries[name])
+                width = 2 if dictionary_size <= 0xFFFF else 4
+                packed = array("H" if width == 2 else "I", self._codes[name])
+                codes = place(_le(packed).tobytes(), width * self.rows)
+            entries.append(DIRECTORY_ENTRY.pack(
+                name.encode("ascii"), encoding, width, 0, dictionary_size,
+                validity, offsets, data, strings.size, codes
+            ))
+        return entries, buffers
+
+    def close(self):
+        entries, buffers = self._layout()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.rows, len(self.columns)))
+            for entry in entries:
+                f.write(entry)
+            for start, buffer, size in buffers:
+                f.write(b"\0" * (start - f.tell()))
+                if isinstance(buffer, bytes):
+                    f.write(buffer)
+                else:
+                    buffer.seek(0)
+                    shutil.copyfileobj(buffer, f)
+            f.write(b"\0" * _pad(f.tell()))
+        os.replace(tmp_path, self.path)
+        for strings in self._strings.values():
+            strings.data.close()
+
+
+def write_snapshot(path, records, columns=SNAPSHOT_COLUMNS):
+    """Writes an iterable of latest_news.json-style records. Returns the row count."""
+    writer = SnapshotWriter(path, columns)
+    for record in records:
+        writer.add(record)
+    writer.close()
+    return writer.rows
+
+
+class StringColumn:
+    """Zero-copy view of a string column; values are decoded on access."""
+
+    def __init__(self, buf, count, validity, offsets, data, data_len):
+        self._views = []
+        self.validity = self._view(buf, validity, _bitmap_size(count)) if validity is not None else None
+        self.offsets = self._cast(self._view(buf, offsets, 4 * (count + 1)), "I")
+        self.data = self._view(buf, data, data_len)
+        self.count = count
+
+    def _view(self, buf, start, size):
+        view = buf[start:start + size]
+        self._views.append(view)
+        return view
+
+    def _cast(self, view, typecode):
+        if _LITTLE_ENDIAN:
+            view = view.cast(typecode)
+            self._views.append(view)
+            return view
+        values = array(typecode, view)
+        values.byteswap()
+        return values
+
+    def is_valid(self, i):
+        return self.validity is None or bool(self.validity[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        if not self.is_valid(i):
+            return None
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(self.count))
+
+    def release(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+
+
+class DictionaryColumn(StringColumn):
+    """Codes per row into a small decoded dictionary."""
+
+    def __init__(self, buf, count, validity, offsets, data, data_len, codes, width, dictionary_size):
+        super().__init__(buf, dictionary_size, None, offsets, data, data_len)
+        self.dictionary = [str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+                           for i in range(dictionary_size)]
+        self.count = count
+        self.validity = self._view(buf, validity, _bitmap_size(count))
+        self.codes = self._cast(self._view(buf, codes, width * count), "H" if width == 2 else "I")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        if not self.is_valid(i):
+            return None
+        return self.dictionary[self.codes[i]]
+
+    def rows_for(self, value):
+        """Row numbers holding `value`, without decoding any strings."""
+        try:
+            code = self.dictionary.index(value)
+        except ValueError:
+            return []
+        return [i for i, row_code in enumerate(self.codes) if row_code == code and self.is_valid(i)]
+
+
+class Snapshot:
+    """
+    mmap-backed reader. Opening parses only the header and directory;
+    columns are views into the mapped file and strings are decoded when
+    read, so loading does not depend on the file size.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+        self._columns = {}
+        magic, version, self.rows, column_count = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} news snapshot")
+
+        self._entries = {}
+        self.column_names = []
+        for i in range(column_count):
+            entry = DIRECTORY_ENTRY.unpack_from(self._buf, HEADER.size + i * DIRECTORY_ENTRY.size)
+            name = entry[0].rstrip(b"\0").decode("ascii")
+            self._entries[name] = entry[1:]
+            self.column_names.append(name)
+
+    def column(self, name):
+        column = self._columns.get(name)
+        if column is None:
+            encoding, width, _, dictionary_size, validity, offsets, data, data_len, codes = self._entries[name]
+            if encoding == DICTIONARY:
+                column = DictionaryColumn(self._buf, self.rows, validity, offsets, data, data_len,
+                                          codes, width, dictionary_size)
+            else:
+                column = StringColumn(self._buf, self.rows, validity, offsets, data, data_len)
+            self._columns[name] = column
+        return column
+
+    def row(self, i):
+        return {name: self.column(name)[i] for name in self.column_names}
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        columns = [(name, self.column(name)) for name in self.column_names]
+        for i in range(self.rows):
+            yield {name: column[i] for name, column in columns}
+
+    def close(self):
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        self._buf.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from local_cache import cache_path
+from metrics import QUEUE_DEPTH, STAGE_SECONDS, FAILURES
+
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "200"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("WRITE_FLUSH_INTERVAL", "5"))
+# Times Supabase may reject a row before it moves to the dead_letter table
+WRITE_MAX_ATTEMPTS = int(os.getenv("WRITE_MAX_ATTEMPTS", "3"))
+
+# SQLSTATE classes for rows the database will never accept as they are:
+# data exceptions, integrity violations, undefined columns and types
+_REJECTED_CLASSES = ("22", "23", "42")
+# PostgREST's own 4xx errors: PGRST1xx request errors and PGRST2xx schema
+# cache errors such as PGRST204 (unknown column). PGRST0xx (connection)
+# and PGRST3xx (JWT) say nothing about the row and stay outages.
+_REJECTED_POSTGREST_GROUPS = ("PGRST1", "PGRST2")
+
+
+def to_row(item):
+    """Converts a pipeline item into a news_items row."""
+    published_at = item.get("published_at")
+    if hasattr(published_at, "isoformat"):
+        published_at = published_at.isoformat()
+    return {
+        "title": item["title"],
+        "source_name": item["source_name"],
+        "source_id": item.get("source_id"),
+        "summary_text": item["summary_text"],
+        "link": item["link"],
+        "image_url": item.get("image_url"),
+        "published_at": published_at
+    }
+
+
+def upsert_rows(client, rows, chunk_size=WRITE_BATCH_SIZE):
+    """Bulk upserts rows into news_items on link, one request per chunk."""
+    # Postgres rejects an upsert that touches the same row twice,
+    # so keep only the latest row per link.
+    unique_rows = list({row["link"]: row for row in rows}.values())
+    for start in range(0, len(unique_rows), chunk_size):
+        chunk = unique_rows[start:start + chunk_size]
+        client.table("news_items").upsert(chunk, on_conflict="link").execute()
+    return len(unique_rows)
+
+
+def is_rejection(error):
+    """True when Postgres or PostgREST refused the row itself, as opposed to an outage or timeout."""
+    code = str(getattr(error, "code", "") or "")
+    return code[:2] in _REJECTED_CLASSES or code.startswith(_REJECTED_POSTGREST_GROUPS)
+
+
+class NewsWriter:
+    """
+    Write-behind writer for news_items.
+
+    add() appends the row to a local SQLite spool before returning, and
+    rows leave the spool only after Supabase accepted them. The background
+    thread flushes when `batch_size` rows are pending or every
+    `flush_interval` seconds. Rows left over from a previous run (crash,
+    outage) are replayed on start.
+
+    When a batch fails, its rows are retried one by one so a single bad
+    row cannot hold back the rest. A row Postgres rejects `max_attempts`
+    times moves to the dead_letter table; outages leave rows spooled.
+    """
+
+    def __init__(self, client, spool_path=None, batch_size=WRITE_BATCH_SIZE,
+                 flush_interval=WRITE_FLUSH_INTERVAL, max_attempts=WRITE_MAX_ATTEMPTS):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+
+        self._db = sqlite3.connect(spool_path or cache_path("news_spool.sqlite3"),
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " link TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " queued_at REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(spool)")]
+        if "attempts" not in columns:
+            self._db.execute("ALTER TABLE spool ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " id INTEGER PRIMARY KEY,"
+            " link TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL,"
+            " failed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # After a failed flush, size-triggered flushes wait for the timer
+        self._retry_at = 0.0
+        self._pending = self._db.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+        if self._pending:
+            print(f"Replaying {self._pending} spooled news items...", flush=True)
+
+        QUEUE_DEPTH.set_function(lambda: self.pending, queue="news_writer")
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="news-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def add(self, item):
+        """Durably queues one item. Returns once it is in the spool."""
+        row = to_row(item)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO spool (link, payload, queued_at) VALUES (?, ?, ?)",
+                (row["link"], json.dumps(row, ensure_ascii=False), time.time())
+            )
+            self._db.commit()
+            self._pending += 1
+            due = self._pending >= self.batch_size and time.time() >= self._retry_at
+
+        if due:
+            # The background thread does the network round trip
+            self._wake.set()
+
+    def flush(self):
+        """Sends every spooled row to Supabase. Returns False if a batch failed."""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._db.execute(
+                        "SELECT id, payload, attempts FROM spool ORDER BY id LIMIT ?", (self.batch_size,)
+                    ).fetchall()
+                if not batch:
+                    return True
+
+                try:
+                    with STAGE_SECONDS.time(stage="flush"):
+                        saved = upsert_rows(self.client, [json.loads(payload) for _, payload, _ in batch],
+                                            self.batch_size)
+                except Exception as e:
+                    FAILURES.inc(stage="flush")
+                    print(f"Error flushing {len(batch)} news items, retrying one by one: {e}", flush=True)
+                    if not self._flush_rows(batch):
+                        self._retry_at = time.time() + self.flush_interval
+                        return False
+                    continue
+
+                # New rows always get higher ids, so everything up to the
+                # last id of this batch has been written.
+                with self._lock:
+                    self._db.execute("DELETE FROM spool WHERE id <= ?", (batch[-1][0],))
+                    self._db.commit()
+                    self._pending = max(0, self._pending - len(batch))
+                print(f"Saved {saved} news items.", flush=True)
+
+    def _flush_rows(self, batch):
+        """
+        Upserts a failed batch row by row. Rows Postgres rejects are
+        charged an attempt and dead-lettered after max_attempts; any other
+        error means Supabase is unreachable, so the rest stays spooled.
+        Returns True when every row left the spool.
+        """
+        cleared = True
+        for row_id, payload, attempts in batch:
+            try:
+                upsert_rows(self.client, [json.loads(payload)], 1)
+            except Exception as e:
+                if not is_rejection(e):
+                    print(f"Error flushing news items (kept in spool): {e}", flush=True)
+                    return False
+                self._reject(row_id, payload, attempts + 1, e)
+                cleared = cleared and attempts + 1 >= self.max_attempts
+                continue
+            with self._lock:
+                self._db.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+                self._db.commit()
+                self._pending = max(0, self._pending - 1)
+        return cleared
+
+    def _reject(self, row_id, payload, attempts, error):
+        with self._lock:
+            if attempts < self.max_attempts:
+                self._db.execute("UPDATE spool SET attempts = ? WHERE id = ?", (attempts, row_id))
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO dead_letter (id, link, payload, error, attempts, failed_at)"
+                    " SELECT id, link, payload, ?, ?, ? FROM spool WHERE id = ?",
+                    (str(error), attempts, time.time(), row_id)
+                )
+                self._db.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+                self._pending = max(0, self._pending - 1)
+            self._db.commit()
+        if attempts >= self.max_attempts:
+            FAILURES.inc(stage="dead_letter")
+            print(f"Moved news item {json.loads(payload).get('link')} to dead_letter "
+                  f"after {attempts} rejections: {error}", flush=True)
+
+    def _run(self):
+        # Replay leftovers right away, then flush on the timer or when add() fills a batch
+        if self._pending:
+            self.flush()
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._pending and not self._stop.is_set():
+                self.flush()
+
+    def close(self):
+        """Stops the timer, flushes what is left and closes the spool."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        if self._pending:
+            print(f"{self._pending} news items remain spooled for the next run.", flush=True)
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
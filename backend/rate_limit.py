@@ -0,0 +1,143 @@
+import os
+import time
+import asyncio
+import threading
+from urllib import robotparser
+from urllib.parse import urlparse
+from host_limits import host_of
+from http_fetch import fetch as fetch_page, page_text, REQUEST_TIMEOUT
+
+# Defaults for hosts without a per-source setting
+HOST_RATE = float(os.getenv("HOST_RATE", "1.0"))    # requests per second
+HOST_BURST = int(os.getenv("HOST_BURST", "2"))
+ROBOTS_USER_AGENT = os.getenv("ROBOTS_USER_AGENT", "*")
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations.
+    reserve() always takes a token and returns how long the caller must
+    wait before using it, so sync and async callers can share one bucket.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class HostRateLimiter:
+    """
+    One token bucket per host.
+
+    Rates come from, in order: an explicit configure() for the host, the
+    settings of the source the request belongs to (sources.rate_per_sec,
+    sources.burst, sources.respect_crawl_delay), then HOST_RATE/HOST_BURST.
+    When Crawl-delay is honoured, the host's robots.txt is read once
+    (outside the limiter lock, with REQUEST_TIMEOUT) and the rate is
+    capped at one request per delay; an unreadable robots.txt counts as
+    no delay.
+    """
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST, respect_crawl_delay=False,
+                 user_agent=ROBOTS_USER_AGENT):
+        self.rate = rate
+        self.burst = burst
+        self.respect_crawl_delay = respect_crawl_delay
+        self.user_agent = user_agent
+        self._host_settings = {}
+        self._source_settings = {}
+        self._buckets = {}
+        self._crawl_delays = {}
+        self._robots_locks = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, rate=None, burst=None, respect_crawl_delay=None):
+        self._host_settings[host] = (rate, burst, respect_crawl_delay)
+
+    def configure_source(self, source):
+        """Reads optional rate columns from a `sources` row."""
+        self._source_settings[source.get("source_name")] = (
+            source.get("rate_per_sec"),
+            source.get("burst"),
+            source.get("respect_crawl_delay"),
+        )
+
+    def _crawl_delay(self, host, scheme="https"):
+        """
+        Crawl-delay from the host's robots.txt, read once per host over the
+        article's scheme (https falls back to http); None when unset or
+        unreadable.
+        """
+        with self._lock:
+            host_lock = self._robots_locks.setdefault(host, threading.Lock())
+        # Only requests to this host wait while its robots.txt downloads
+        with host_lock:
+            if host in self._crawl_delays:
+                return self._crawl_delays[host]
+            delay = None
+            schemes = ["https", "http"] if scheme == "https" else [scheme]
+            for i, robots_scheme in enumerate(schemes):
+                try:
+                    page = fetch_page(f"{robots_scheme}://{host}/robots.txt", timeout=REQUEST_TIMEOUT)
+                    robots = robotparser.RobotFileParser()
+                    robots.parse(page_text(page).splitlines())
+                    delay = robots.crawl_delay(self.user_agent)
+                    break
+                except Exception as e:
+                    if i == len(schemes) - 1:
+                        print(f"Could not read robots.txt for {host}: {e}", flush=True)
+            self._crawl_delays[host] = delay
+            return delay
+
+    def _bucket(self, host, source, scheme="https"):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is not None:
+                return bucket
+
+            rate, burst, respect = self._host_settings.get(host) or \
+                self._source_settings.get(source) or (None, None, None)
+        rate = rate or self.rate
+        burst = burst or self.burst
+        if respect is None:
+            respect = self.respect_crawl_delay
+
+        if respect:
+            delay = self._crawl_delay(host, scheme)
+            if delay:
+                rate = min(rate, 1.0 / float(delay))
+                burst = 1
+
+        with self._lock:
+            # Another thread may have built it while robots.txt was read
+            return self._buckets.setdefault(host, TokenBucket(rate, burst))
+
+    def wait(self, url, source=None):
+        """Blocks until a request to url's host is allowed."""
+        delay = self._bucket(host_of(url), source, urlparse(url).scheme or "https").reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self, url, source=None):
+        """Waits without blocking the event loop."""
+        host = host_of(url)
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            # First request to the host may read robots.txt
+            bucket = await asyncio.to_thread(self._bucket, host, source, urlparse(url).scheme or "https")
+        delay = bucket.reserve()
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,5 @@
+-- Per-source politeness settings used by rate_limit.HostRateLimiter.
+-- NULL means "use the HOST_RATE / HOST_BURST defaults".
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS rate_per_sec REAL;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS burst INTEGER;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS respect_crawl_delay BOOLEAN DEFAULT FALSE;
@@ -0,0 +1,17 @@
+-- Server-side aggregates for diagnose_data.py.
+-- One row per (source_name, source_id) pair found in news_items, so the
+-- diagnostics transfer O(sources) rows however large the table gets.
+-- Dropped first: CREATE OR REPLACE cannot remove the registered_id column
+-- an earlier version of this view had.
+DROP VIEW IF EXISTS news_source_stats;
+CREATE VIEW news_source_stats
+WITH (security_invoker = true) AS
+SELECT
+    n.source_name,
+    n.source_id,
+    COUNT(*) AS row_count
+FROM news_items n
+GROUP BY n.source_name, n.source_id;
+
+-- Lets the paged fallback (no view) walk distinct names and ids with index scans
+CREATE INDEX IF NOT EXISTS idx_news_items_source_name_id ON news_items(source_name, source_id);
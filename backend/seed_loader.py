@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import argparse
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from dedup import fetch_existing_links
+from extractors import parse_lxml
+from host_limits import HostLimiter
+from http_fetch import fetch as fetch_page
+from news_writer import upsert_rows
+
+SEED_WORKERS = int(os.getenv("SEED_WORKERS", "16"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))
+
+
+def load_payload(spec):
+    """
+    Curated items from a JSON file ({"news": [...]} or a plain list) or
+    from the DATA dict of a seed module such as seed_manual_news.
+    """
+    if os.path.exists(spec):
+        with open(spec, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = importlib.import_module(spec.removesuffix(".py")).DATA
+    return data["news"] if isinstance(data, dict) else data
+
+
+def needs_enrichment(item, prefer_fetched_title=False):
+    return prefer_fetched_title or not item.get("headline") or not item.get("image")
+
+
+def enrich(item, limiter):
+    """Fetches the page once and returns (title, image_url); (None, None) on failure."""
+    url = item["url"]
+    try:
+        with limiter.slot(url):
+            page = fetch_page(url)
+        extracted = parse_lxml(page)
+        return extracted.title, extracted.image_url
+    except Exception as e:
+        print(f"Error enriching {url}: {e}")
+        return None, None
+
+
+def to_seed_row(item, enrichment, source_ids, prefer_fetched_title=False):
+    title, image_url = enrichment or (None, None)
+    if not (prefer_fetched_title and title):
+        title = item.get("headline") or title
+    return {
+        "source_name": item["source"],
+        "source_id": source_ids.get(item["source"]),
+        "title": title,
+        "summary_text": item["summary"],
+        "link": item["url"],
+        "published_at": item.get("published_at"),
+        "image_url": item.get("image") or image_url
+    }
+
+
+def seed_items(client, items, workers=SEED_WORKERS, prefer_fetched_title=False, fetch_missing=True):
+    """
+    Seeds curated items in one batched upsert on link.
+
+    Items missing a headline or image are enriched from their page with
+    `workers` threads, at most FETCH_PER_HOST requests per host at a
+    time; complete items are not fetched at all. With
+    prefer_fetched_title every item is fetched and the page title wins
+    over the curated headline. With fetch_missing=False nothing is fetched and
+    items are stored as given.
+    Returns {"items", "fetched", "new", "updated", "skipped"}.
+    """
+    started = time.perf_counter()
+    source_ids = {row["source_name"]: row["id"]
+                  for row in client.table("sources").select("id, source_name").execute().data}
+
+    to_fetch = [item for item in items if fetch_missing and needs_enrichment(item, prefer_fetched_title)]
+    limiter = HostLimiter(max(1, workers), FETCH_PER_HOST)
+    enrichments = {}
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for item, result in zip(to_fetch, executor.map(lambda item: enrich(item, limiter), to_fetch)):
+                enrichments[item["url"]] = result
+
+    rows = []
+    skipped = 0
+    for item in items:
+        row = to_seed_row(item, enrichments.get(item["url"]), source_ids, prefer_fetched_title)
+        if not row["title"]:
+            print(f"Skipping {item['url']}: no title")
+            skipped += 1
+            continue
+        rows.append(row)
+
+    existing = fetch_existing_links(client, [row["link"] for row in rows])
+    written = upsert_rows(client, rows, max(1, len(rows))) if rows else 0
+
+    stats = {
+        "items": len(items),
+        "fetched": len(to_fetch),
+        "new": written - len(existing),
+        "updated": len(existing),
+        "skipped": skipped,
+    }
+    print(f"Seeded {written} articles in {time.perf_counter() - started:.1f}s: "
+          f"{stats['new']} new, {stats['updated']} updated, {stats['fetched']} pages fetched, "
+          f"{skipped} skipped.")
+    return stats
+
+
+def main():
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Seed curated news items")
+    parser.add_argument("payloads", nargs="+",
+                        help="JSON files or seed modules with a DATA dict (e.g. seed_manual_news_v2)")
+    parser.add_argument("--workers", type=int, default=SEED_WORKERS)
+    parser.add_argument("--prefer-fetched-title", action="store_true",
+                        help="fetch every page and use its title instead of the curated headline")
+    parser.add_argument("--no-enrich", action="store_true",
+                        help="store items as given, without fetching missing headlines or images")
+    args = parser.parse_args()
+
+    load_dotenv()
+    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    items = [item for spec in args.payloads for item in load_payload(spec)]
+    seed_items(supabase, items, args.workers, args.prefer_fetched_title, fetch_missing=not args.no_enrich)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import os
 import json
 from dotenv import load_dotenv
 from supabase import create_client, Client
-from newspaper import Article
+from seed_loader import seed_items
 import time
 
 # Load environment variables
@@ -127,50 +127,8 @@ DATA = {
 
 def seed_data():
     print(f"Seeding {len(DATA['news'])} articles...")
-    
-    for item in DATA['news']:
-        url = item['url']
-        print(f"Processing: {url}")
-        
-        try:
-            # Fetch article content to get real title (ignoring provided headline)
-            # and image if not provided
-            article = Article(url)
-            article.download()
-            article.parse()
-            
-            # Use fetched title instead of JSON headline
-            title = article.title
-            
-            # Use provided image if available, else fetch
-            image_url = item.get("image")
-            if not image_url:
-                image_url = article.top_image
-            
-            db_item = {
-                "source_name": item["source"],
-                "title": title, # Fetched title
-                "summary_text": item["summary"], # Provided summary
-                "link": url,
-                "image_url": image_url, 
-                "published_at": item["published_at"]
-            }
-            
-            # Upsert
-            supabase.table("news_items").upsert(
-                db_item, 
-                on_conflict="link"
-            ).execute()
-            
-            print(f"Inserted: {title}")
-            if image_url:
-                print(f"  > Image: {image_url}")
-            else:
-                print("  > No image found.")
-
-        except Exception as e:
-            print(f"Error processing {url}: {e}")
-            pass
+    # Fetched page titles replace the JSON headlines; pages are fetched concurrently
+    seed_items(supabase, DATA['news'], prefer_fetched_title=True)
 
 if __name__ == "__main__":
     seed_data()
@@ -2,6 +2,7 @@ import os
 import json
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from seed_loader import seed_items
 
 # Load environment variables
 load_dotenv()
@@ -125,42 +126,8 @@ DATA = {
 
 def seed_data_v2():
     print(f"Seeding batch 2: {len(DATA['news'])} articles...")
-    
-    dup_count = 0
-    new_count = 0
-    
-    for item in DATA['news']:
-        article = {
-            "source_name": item["source"],
-            "title": item["headline"],
-            "summary_text": item["summary"],
-            "link": item["url"],
-            "published_at": item["published_at"],
-            "image_url": item.get("image")
-        }
-        
-        try:
-            # Check for existing
-            # We want to know if it's a duplicate for reporting purposes
-            check = supabase.table("news_items").select("id").eq("link", article["link"]).execute()
-            is_dup = len(check.data) > 0
-            
-            # Upsert
-            supabase.table("news_items").upsert(article, on_conflict="link").execute()
-            
-            if is_dup:
-                dup_count += 1
-                print(f"Updated (Existing): {item['headline']}")
-            else:
-                new_count += 1
-                print(f"Inserted (New): {item['headline']}")
-                
-        except Exception as e:
-            print(f"Error checking/inserting {item['headline']}: {e}")
-
-    print(f"\nBatch 2 Complete.")
-    print(f"New Articles: {new_count}")
-    print(f"Duplicates Updated: {dup_count}")
+    # Stored as given, like the original per-item upserts
+    seed_items(supabase, DATA['news'], fetch_missing=False)
 
 if __name__ == "__main__":
     seed_data_v2()
@@ -2,6 +2,7 @@ import os
 import json
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from seed_loader import seed_items
 
 # Load environment variables
 load_dotenv()
@@ -125,23 +126,8 @@ DATA = {
 
 def seed_data():
     print(f"Seeding {len(DATA['news'])} articles...")
-    
-    for item in DATA['news']:
-        article = {
-            "source_name": item["source"],
-            "title": item["headline"],
-            "summary_text": item["summary"],
-            "link": item["url"],
-            "published_at": item["published_at"],
-            "image_url": item["image"] if item["image"] else None
-        }
-        
-        try:
-            # Using upsert on 'link' column to prevent duplicates
-            supabase.table("news_items").upsert(article, on_conflict="link").execute()
-            print(f"Inserted: {item['headline']}")
-        except Exception as e:
-            print(f"Error inserting {item['headline']}: {e}")
+    # Stored as given, like the original per-item upserts
+    seed_items(supabase, DATA['news'], fetch_missing=False)
 
 if __name__ == "__main__":
     seed_data()
@@ -0,0 +1,200 @@
+import os
+import math
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from local_cache import cache_path
+
+# Links expire after the freshness window; anything older is dropped
+# by the feed freshness filters before dedup runs anyway.
+SEEN_WINDOW_DAYS = float(os.getenv("SEEN_WINDOW_DAYS", "2"))
+SEEN_CAPACITY = int(os.getenv("SEEN_CAPACITY", "100000"))
+SEEN_ERROR_RATE = float(os.getenv("SEEN_ERROR_RATE", "0.01"))
+
+# SQLite's default limit on bound parameters is 999
+_SQLITE_CHUNK = 500
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+
+class SeenIndex:
+    """
+    Local index of links that are already in news_items.
+
+    An in-memory Bloom filter sits in front of an exact set stored in
+    SQLite. A Bloom negative means the link was never recorded here; a
+    positive is confirmed against the exact set. Entries expire after
+    `window_days`.
+
+    The index only answers "already stored". Every link it has not
+    recorded is reported as unsure and checked against news_items, since
+    rows written by another node or by the import scripts, or outside the
+    rebuild window, never reach this index. rebuild() warms it so fewer
+    links need that check.
+    """
+
+    def __init__(self, path=None, window_days=SEEN_WINDOW_DAYS,
+                 capacity=SEEN_CAPACITY, error_rate=SEEN_ERROR_RATE):
+        self.window = window_days * 86400
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or cache_path("seen_links.sqlite3"),
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen (link TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+        self.counters = {"lookups": 0, "hits": 0, "negatives": 0,
+                         "false_positives": 0, "unsure": 0}
+        self._load(capacity)
+
+    def _load(self, capacity):
+        """Drops expired links and rebuilds the Bloom filter from the exact set."""
+        with self._lock:
+            self._db.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - self.window,))
+            self._db.commit()
+            links = [row[0] for row in self._db.execute("SELECT link FROM seen")]
+            self.bloom = BloomFilter(max(capacity, 2 * len(links)), self.error_rate)
+            for link in links:
+                self.bloom.add(link)
+
+    def _exact(self, links):
+        found = set()
+        cutoff = time.time() - self.window
+        for start in range(0, len(links), _SQLITE_CHUNK):
+            chunk = links[start:start + _SQLITE_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT link FROM seen WHERE seen_at >= ? AND link IN ({placeholders})",
+                [cutoff, *chunk]
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    def lookup(self, links):
+        """
+        Splits links into (seen, unsure): links known to be stored, and
+        the rest, which the caller has to check against news_items.
+        """
+        seen = set()
+        unsure = []
+        with self._lock:
+            positives = [link for link in links if link in self.bloom]
+            confirmed = self._exact(positives)
+            self.counters["lookups"] += len(links)
+            for link in links:
+                if link in confirmed:
+                    seen.add(link)
+                    self.counters["hits"] += 1
+                elif link in self.bloom:
+                    self.counters["false_positives"] += 1
+                    unsure.append(link)
+                else:
+                    self.counters["negatives"] += 1
+                    unsure.append(link)
+            self.counters["unsure"] += len(unsure)
+        return seen, unsure
+
+    def add(self, links):
+        """Records links as stored in news_items."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO seen (link, seen_at) VALUES (?, ?)",
+                [(link, now) for link in links]
+            )
+            self._db.commit()
+            for link in links:
+                self.bloom.add(link)
+
+    def rebuild(self, client, window_days=None, page_size=1000):
+        """Warms the index from news_items.link for everything inside the window."""
+        window_days = window_days if window_days is not None else self.window / 86400
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=window_days)).isoformat()
+        total = 0
+        offset = 0
+        while True:
+            response = client.table("news_items") \
+                .select("link") \
+                .gte("published_at", cutoff) \
+                .order("id") \
+                .range(offset, offset + page_size - 1) \
+                .execute()
+            links = [row["link"] for row in response.data]
+            self.add(links)
+            total += len(links)
+            if len(links) < page_size:
+                break
+            offset += page_size
+        return total
+
+    def stats(self):
+        """Returns the counters plus hit rate and false-positive rate."""
+        stats = dict(self.counters)
+        lookups = stats["lookups"]
+        answered = lookups - stats["unsure"]
+        stats["local_answer_rate"] = answered / lookups if lookups else 0.0
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        # Share of links absent from the exact set that the Bloom filter still claimed
+        absent = stats["negatives"] + stats["false_positives"]
+        stats["false_positive_rate"] = stats["false_positives"] / absent if absent else 0.0
+        with self._lock:
+            stats["size"] = self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        return stats
+
+    def report(self):
+        stats = self.stats()
+        print(f"Seen index: {stats['size']} links, {stats['lookups']} lookups, "
+              f"hit rate {stats['hit_rate']:.1%}, answered locally {stats['local_answer_rate']:.1%}, "
+              f"false positives {stats['false_positive_rate']:.2%}", flush=True)
+
+
+def main():
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Local seen-link index")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild = subcommands.add_parser("rebuild", help="warm the index from news_items.link")
+    rebuild.add_argument("--days", type=float, default=SEEN_WINDOW_DAYS)
+    subcommands.add_parser("stats", help="print index size")
+    args = parser.parse_args()
+
+    index = SeenIndex(window_days=getattr(args, "days", SEEN_WINDOW_DAYS))
+    if args.command == "rebuild":
+        load_dotenv()
+        supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        total = index.rebuild(supabase)
+        print(f"Indexed {total} links from news_items.")
+    index.report()
+
+
+if __name__ == "__main__":
+    main()
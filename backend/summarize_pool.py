@@ -0,0 +1,94 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from summarizer_engine import get_engine, reset_engine, ensure_nltk_data
+from summary_cache import report_counters
+
+SUMMARIZE_WORKERS = int(os.getenv("SUMMARIZE_WORKERS", "0")) or os.cpu_count() or 1
+
+# The pool starts after NewsWriter and to_thread workers are running; forking
+# a threaded process can leave children stuck on inherited locks
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _warm_worker():
+    """
+    Builds the per-process engine (tokenizer, stop words, stem cache) once.
+    Relies on nothing the parent set up, since forkserver and spawn workers
+    only re-import the main module's top level.
+    """
+    # Workers start clean, but keep them independent of the start method
+    reset_engine()
+    ensure_nltk_data()
+    get_engine()
+
+
+def _summarize_html(html, url, sentence_count):
+    try:
+        return get_engine().summarize_html(html, url, sentence_count)
+    except Exception as e:
+        print(f"Error summarizing {url}: {e}", flush=True)
+        return None, None
+
+
+def _summarize_text(text, sentence_count):
+    try:
+        return get_engine().summarize_text(text, sentence_count)
+    except Exception as e:
+        print(f"Error summarizing text: {e}", flush=True)
+        return None, None
+
+
+class SummarizePool:
+    """
+    Summarization stage on a ProcessPoolExecutor.
+
+    LexRank is CPU bound, so running it in worker processes lets fetching
+    continue on the main process while every core ranks sentences. Each
+    worker builds its SummarizerEngine once in the pool initializer.
+    Results are (summary or None, timings).
+
+    The summary cache lives in the workers, so hits and misses are counted
+    here from each result's timings for report().
+    """
+
+    def __init__(self, workers=SUMMARIZE_WORKERS):
+        self.workers = workers
+        self.counters = {"lexrank": {"hits": 0, "misses": 0}}
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker,
+                                             mp_context=multiprocessing.get_context(START_METHOD))
+
+    def _count(self, result):
+        timings = result[1]
+        if timings and timings.get("cached") is not None:
+            self.counters["lexrank"]["hits" if timings["cached"] else "misses"] += 1
+
+    def _counted(self, future):
+        future.add_done_callback(lambda done: done.exception() or self._count(done.result()))
+        return future
+
+    def submit_html(self, html, url, sentence_count=3):
+        return self._counted(self._executor.submit(_summarize_html, html, url, sentence_count))
+
+    def submit_text(self, text, sentence_count=3):
+        return self._counted(self._executor.submit(_summarize_text, text, sentence_count))
+
+    async def summarize_html(self, html, url, sentence_count=3):
+        """Awaitable form for the asyncio pipeline."""
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, _summarize_html, html, url, sentence_count)
+        self._count(result)
+        return result
+
+    def report(self):
+        report_counters(self.counters)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,179 @@
+import os
+import time
+import functools
+import nltk
+from sumy.parsers.html import HtmlParser
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.nlp.tokenizers import Tokenizer
+from sumy.summarizers.lex_rank import LexRankSummarizer
+from sumy.nlp.stemmers import Stemmer
+from sumy.utils import get_stop_words
+from lexrank_np import NumpyLexRank
+from summary_cache import SummaryCache
+
+SUMMARY_LANGUAGE = "english"
+STEM_CACHE_SIZE = int(os.getenv("STEM_CACHE_SIZE", "50000"))
+# "numpy" (vectorized, see lexrank_np.py) or "sumy" (reference implementation)
+SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "numpy")
+MAX_SUMMARY_WORDS = 75
+
+
+def ensure_nltk_data():
+    """Downloads the punkt data sumy's Tokenizer needs, unless it is already installed."""
+    try:
+        nltk.data.find('tokenizers/punkt')
+        nltk.data.find('tokenizers/punkt_tab')
+    except LookupError:
+        nltk.download('punkt', quiet=True)
+        nltk.download('punkt_tab', quiet=True)
+
+
+def limit_words(text, max_words=MAX_SUMMARY_WORDS):
+    """Cuts text to max_words, adding an ellipsis when it was longer."""
+    words = text.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "..."
+    return text
+
+
+class SummarizerEngine:
+    """
+    Long-lived LexRank summarizer.
+
+    The tokenizer, stop words and summarizer are built once, and stemming
+    goes through a bounded LRU shared by every article the engine sees,
+    so common words are stemmed once per process instead of once per article.
+    Works on already downloaded HTML or plain text.
+
+    With a SummaryCache, documents whose extracted text was summarized
+    before (same sentence count) skip ranking entirely.
+    """
+
+    def __init__(self, language=SUMMARY_LANGUAGE, stem_cache_size=STEM_CACHE_SIZE,
+                 backend=SUMMARIZER_BACKEND, cache=None):
+        self.language = language
+        self.backend = backend
+        self.cache = cache
+        self.tokenizer = Tokenizer(language)
+        self.stem = functools.lru_cache(maxsize=stem_cache_size)(Stemmer(language))
+        stop_words = get_stop_words(language)
+        if backend == "numpy":
+            self.summarizer = NumpyLexRank(self.stem, stop_words)
+        elif backend == "sumy":
+            self.summarizer = LexRankSummarizer(self.stem)
+            self.summarizer.stop_words = stop_words
+        else:
+            raise ValueError(f"Unknown summarizer backend: {backend}")
+
+    @staticmethod
+    def _join(summary_sentences):
+        if not summary_sentences:
+            return None
+
+        # Join sentences into a single paragraph
+        summary_text = " ".join(str(sentence) for sentence in summary_sentences)
+        return limit_words(summary_text)
+
+    def _cache_params(self, sentence_count):
+        return {"language": self.language, "sentences": sentence_count, "max_words": MAX_SUMMARY_WORDS}
+
+    def _cached(self, document, sentence_count):
+        """Returns (document text, cached summary or None)."""
+        text = " ".join(str(sentence) for sentence in document.sentences)
+        return text, self.cache.get(text, "lexrank", self._cache_params(sentence_count))
+
+    def _summarize(self, document, sentence_count, started, parsed):
+        text = cached = None
+        if self.cache is not None:
+            text, cached = self._cached(document, sentence_count)
+        if cached is None:
+            summary = self._join(self.summarizer(document, sentence_count))
+            if self.cache is not None:
+                self.cache.put(text, "lexrank", summary, self._cache_params(sentence_count))
+        else:
+            summary = cached
+
+        finished = time.perf_counter()
+        timings = {
+            "parse": parsed - started,
+            "rank": finished - parsed,
+            "total": finished - started,
+            # None when the cache is disabled and no lookup happened
+            "cached": None if self.cache is None else cached is not None,
+        }
+        return summary, timings
+
+    def summarize_html(self, html, url=None, sentence_count=3):
+        """Summarizes page bytes/str. Returns (summary or None, timings in seconds)."""
+        started = time.perf_counter()
+        parser = HtmlParser.from_string(html, url, self.tokenizer)
+        document = parser.document
+        return self._summarize(document, sentence_count, started, time.perf_counter())
+
+    def summarize_text(self, text, sentence_count=3):
+        """Summarizes plain article text. Returns (summary or None, timings in seconds)."""
+        started = time.perf_counter()
+        parser = PlaintextParser.from_string(text, self.tokenizer)
+        document = parser.document
+        return self._summarize(document, sentence_count, started, time.perf_counter())
+
+    def summarize_html_batch(self, pages, sentence_count=3):
+        """
+        Summarizes (html, url) pairs together. With the numpy backend the
+        documents are ranked as one batch. Returns a list of (summary, timings);
+        ranking time is split evenly across the batch.
+        """
+        started = time.perf_counter()
+        documents = [HtmlParser.from_string(html, url, self.tokenizer).document for html, url in pages]
+        parsed = time.perf_counter()
+
+        summaries = [None] * len(documents)
+        texts = [None] * len(documents)
+        to_rank = list(range(len(documents)))
+        if self.cache is not None:
+            to_rank = []
+            for i, document in enumerate(documents):
+                texts[i], summaries[i] = self._cached(document, sentence_count)
+                if summaries[i] is None:
+                    to_rank.append(i)
+
+        ranked_documents = [documents[i] for i in to_rank]
+        if self.backend == "numpy":
+            batch = self.summarizer.summarize_batch(ranked_documents, sentence_count)
+        else:
+            batch = [self.summarizer(document, sentence_count) for document in ranked_documents]
+
+        for i, summary_sentences in zip(to_rank, batch):
+            summaries[i] = self._join(summary_sentences)
+            if self.cache is not None:
+                self.cache.put(texts[i], "lexrank", summaries[i], self._cache_params(sentence_count))
+        finished = time.perf_counter()
+
+        share = 1.0 / max(len(pages), 1)
+        timings = {
+            "parse": (parsed - started) * share,
+            "rank": (finished - parsed) * share,
+            "total": (finished - started) * share,
+        }
+        ranked = set(to_rank)
+        return [(summary, dict(timings, cached=i not in ranked)) for i, summary in enumerate(summaries)]
+
+    def stem_cache_info(self):
+        return self.stem.cache_info()
+
+
+_engine = None
+
+
+def get_engine():
+    """Returns the process-wide engine, building it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = SummarizerEngine(cache=SummaryCache())
+    return _engine
+
+
+def reset_engine():
+    """Drops the process-wide engine, e.g. in a forked worker that must not share the cache connection."""
+    global _engine
+    _engine = None
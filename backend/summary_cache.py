@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from local_cache import cache_path
+
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+SUMMARY_CACHE_MAX_MB = float(os.getenv("SUMMARY_CACHE_MAX_MB", "64"))
+# Puts between sweeps for expired rows (the size cap is checked on every put)
+SUMMARY_CACHE_SWEEP_EVERY = int(os.getenv("SUMMARY_CACHE_SWEEP_EVERY", "500"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Lower-cases and collapses whitespace so re-scrapes of a story hash the same."""
+    return _WHITESPACE.sub(" ", text or "").strip().lower()
+
+
+class SummaryCache:
+    """
+    Persistent summary cache shared by every summarizer backend.
+
+    Keys are a SHA-256 of the normalized article text plus the summarizer
+    name and its parameters, so a wire story published under several links,
+    or an article scraped twice, is summarized once. Entries expire after
+    `ttl_days`; when the stored summaries exceed `max_bytes`, the least
+    recently used ones are evicted.
+
+    The total size is tracked as rows are written, so a put() only touches
+    its own row unless the cap is exceeded. Expired rows are swept, and the
+    total re-read from disk (other processes share the file), at startup
+    and every `sweep_every` puts.
+    """
+
+    def __init__(self, path=None, ttl_days=SUMMARY_CACHE_TTL_DAYS,
+                 max_bytes=int(SUMMARY_CACHE_MAX_MB * 1024 * 1024),
+                 sweep_every=SUMMARY_CACHE_SWEEP_EVERY):
+        self.ttl = ttl_days * 86400
+        self.max_bytes = max_bytes
+        self.sweep_every = max(1, sweep_every)
+        self._puts = 0
+        self._total = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or cache_path("summaries.sqlite3"),
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY,"
+            " summarizer TEXT NOT NULL,"
+            " summary TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_summaries_access ON summaries(last_access)")
+        self._db.commit()
+        # {summarizer: {"hits": n, "misses": n}} for this process
+        self.counters = {}
+        with self._lock:
+            self._sweep()
+
+    @staticmethod
+    def key(text, summarizer, params=None):
+        payload = json.dumps([summarizer, params or {}, normalize_text(text)], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, summarizer, outcome):
+        counters = self.counters.setdefault(summarizer, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(self, text, summarizer, params=None):
+        """Returns the cached summary or None."""
+        return self.get_first(text, summarizer, [params])
+
+    def get_first(self, text, summarizer, params_options):
+        """
+        Returns the summary stored under the first of several parameter sets
+        (e.g. one per Gemini model, in priority order), or None. Counts as
+        one lookup.
+        """
+        keys = [self.key(text, summarizer, params) for params in params_options]
+        now = time.time()
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = dict(self._db.execute(
+                f"SELECT key, summary FROM summaries WHERE key IN ({placeholders}) AND created_at >= ?",
+                [*keys, now - self.ttl]
+            ).fetchall())
+            key = next((key for key in keys if key in rows), None)
+            if key is None:
+                self._count(summarizer, "misses")
+                return None
+            self._db.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._count(summarizer, "hits")
+            return rows[key]
+
+    def put(self, text, summarizer, summary, params=None):
+        if not summary:
+            return
+        key = self.key(text, summarizer, params)
+        size = len(summary.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM summaries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, summarizer, summary, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, summarizer, summary, size, now, now)
+            )
+            self._total += size - (old[0] if old else 0)
+            self._puts += 1
+            if self._puts % self.sweep_every == 0:
+                self._sweep()
+            self._evict()
+            self._db.commit()
+
+    def get_or_compute(self, text, summarizer, compute, params=None):
+        """Returns the cached summary, or computes, stores and returns it."""
+        summary = self.get(text, summarizer, params)
+        if summary is None:
+            summary = compute(text)
+            self.put(text, summarizer, summary, params)
+        return summary
+
+    def _sweep(self):
+        """Deletes expired rows and re-reads the total size. Caller holds the lock."""
+        self._db.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - self.ttl,))
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        """Drops least recently used rows until back under the cap. Caller holds the lock."""
+        if self._total <= self.max_bytes:
+            return
+        freed = 0
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM summaries ORDER BY last_access"):
+            doomed.append((key,))
+            freed += size
+            if self._total - freed <= self.max_bytes:
+                break
+        self._db.executemany("DELETE FROM summaries WHERE key = ?", doomed)
+        self._total -= freed
+
+    def report(self):
+        report_counters(self.counters)
+
+
+def report_counters(counters_by_summarizer):
+    """Prints hit rates per summarizer; Gemini hits are API calls saved."""
+    for summarizer, counters in sorted(counters_by_summarizer.items()):
+        lookups = counters["hits"] + counters["misses"]
+        rate = counters["hits"] / lookups if lookups else 0.0
+        line = f"Summary cache [{summarizer}]: {counters['hits']}/{lookups} hits ({rate:.1%})"
+        if summarizer.startswith("gemini"):
+            line += f", {counters['hits']} Gemini calls saved"
+        print(line, flush=True)
@@ -0,0 +1,13 @@
+import os
+import random
+
+SENTENCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sentences.txt")
+
+
+def load_corpus(count, sentences_per_article, seed=7):
+    """Builds synthetic articles by sampling sentences from the fixture file."""
+    with open(SENTENCES_FILE, "r", encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(sentences) for _ in range(sentences_per_article)) for _ in range(count)]
@@ -0,0 +1,80 @@
+import re
+import json
+import time
+import random
+import asyncio
+from google.api_core import exceptions
+
+_ARTICLE_RE = re.compile(r"### Article id: (\S+)\n(.*?)(?=\n### Article id: |\Z)", re.S)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Local stand-in for genai.GenerativeModel used by the bench scripts.
+
+    Summaries are the first sentences of the article. `latency` is added to
+    every call; `drop_rate` / `malformed_rate` make batched replies lose or
+    garble entries so the per-article retry path gets exercised.
+    After `quota_after` calls every call raises ResourceExhausted with a
+    "retry in Ns" hint, like the real API on an exhausted quota.
+    """
+
+    def __init__(self, latency=0.0, drop_rate=0.0, malformed_rate=0.0, seed=0,
+                 quota_after=None, retry_seconds=30):
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.malformed_rate = malformed_rate
+        self.quota_after = quota_after
+        self.retry_seconds = retry_seconds
+        self.quota_errors = 0
+        self.calls = 0
+        self.batched_calls = 0
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def _summarize(text):
+        sentences = [s.strip() for s in text.split(". ") if s.strip()]
+        return ". ".join(sentences[:3]).rstrip(".") + "."
+
+    def _reply(self, prompt):
+        articles = _ARTICLE_RE.findall(prompt)
+        if not articles:
+            return FakeResponse(self._summarize(prompt.split("Article Text:", 1)[-1]))
+
+        self.batched_calls += 1
+        entries = []
+        for article_id, text in articles:
+            roll = self._random.random()
+            if roll < self.drop_rate:
+                continue
+            if roll < self.drop_rate + self.malformed_rate:
+                entries.append({"id": article_id, "summary": ""})
+                continue
+            entries.append({"id": article_id, "summary": self._summarize(text)})
+        return FakeResponse(json.dumps(entries))
+
+    def _check_quota(self):
+        if self.quota_after is not None and self.calls > self.quota_after:
+            self.quota_errors += 1
+            raise exceptions.ResourceExhausted(
+                f"Resource has been exhausted (e.g. check quota). Please retry in {self.retry_seconds}s."
+            )
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        self._check_quota()
+        if self.latency:
+            time.sleep(self.latency)
+        return self._reply(prompt)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        self._check_quota()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(prompt)
@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import local_cache
+import build_feed_bundles
+from build_feed_bundles import build_bundles, feed_definitions, slugify, MANIFEST_NAME
+
+_AFTER = re.compile(r'created_at\.gt\."(.*?)",and\(created_at\.eq\."(.*?)",id\.gt\.(\d+)\)')
+
+
+class FakeQuery:
+    """The select/filter/order/limit chain build_feed_bundles and news_export use."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.orders = []
+        self.count = None
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self.rows = [row for row in self.rows if row[column] in values]
+        return self
+
+    def or_(self, expression):
+        created_at, _, row_id = _AFTER.fullmatch(expression).groups()
+        self.rows = [row for row in self.rows if (row["created_at"], row["id"]) > (created_at, int(row_id))]
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.count = n
+        return self
+
+    def execute(self):
+        rows = self.rows
+        # Stable sorts from the last order back give the combined ordering
+        for column, desc in reversed(self.orders):
+            rows = sorted(rows, key=lambda row: row[column], reverse=desc)
+        rows = rows[:self.count]
+        return type("Response", (), {"data": [dict(row) for row in rows]})
+
+
+class FakeClient:
+    def __init__(self, sources, items):
+        self.sources = sources
+        self.items = items
+
+    def table(self, name):
+        return FakeQuery(self.sources if name == "sources" else self.items)
+
+
+def item(row_id, source_id, created_at):
+    return {"id": row_id, "title": f"Story {row_id}", "summary_text": "Summary.", "link": f"https://a/{row_id}",
+            "image_url": None, "published_at": created_at, "created_at": created_at, "source_id": source_id,
+            "source_name": f"Source {source_id}"}
+
+
+class FeedBundlesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.out = os.path.join(self.dir, "feeds")
+        patcher = mock.patch.object(local_cache, "CACHE_DIR", os.path.join(self.dir, "cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = FakeClient(
+            [{"id": 1, "source_name": "Source 1", "category": "AI/ML", "logo_url": None},
+             {"id": 2, "source_name": "Source 2", "category": "AI ML", "logo_url": None}],
+            [item(i, 1 + i % 2, f"2026-01-08T00:00:{i:02d}+00:00") for i in range(1, 6)],
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def manifest(self):
+        with open(os.path.join(self.out, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_names_that_slug_alike_get_separate_feeds(self):
+        self.assertNotEqual(slugify("AI/ML"), slugify("AI ML"))
+        self.assertTrue(slugify("AI/ML").startswith("ai-ml-"))
+        self.assertEqual(slugify("AI/ML"), slugify("AI/ML"))
+
+        feeds = feed_definitions({source["id"]: source for source in self.client.sources})
+        categories = sorted(feed["source_ids"] for key, feed in feeds.items() if feed["kind"] == "category")
+        self.assertEqual(categories, [[1], [2]])
+
+    def test_incremental_run_rebuilds_only_touched_feeds(self):
+        stats = build_bundles(self.client, self.out, page_size=2)
+        self.assertEqual((stats["feeds"], stats["rebuilt"], stats["failed"]), (4, 4, 0))
+        first = self.manifest()["feeds"]
+        self.assertEqual(first["source/1"]["count"], 2)
+        self.assertEqual(len(first["source/2"]["pages"]), 2)
+        for page in first["source/2"]["pages"]:
+            for suffix in ("", ".gz"):
+                self.assertTrue(os.path.exists(os.path.join(self.out, page + suffix)))
+
+        self.client.items.append(item(6, 2, "2026-01-08T00:01:00+00:00"))
+        stats = build_bundles(self.client, self.out, page_size=2)
+        self.assertEqual(stats["rebuilt"], 2)
+        feeds = self.manifest()["feeds"]
+        self.assertEqual(feeds["source/1"], first["source/1"])
+        self.assertEqual(feeds["source/2"]["count"], 4)
+
+    def test_failed_feed_keeps_its_pages_and_the_watermark(self):
+        build_bundles(self.client, self.out, page_size=2)
+        first = self.manifest()["feeds"]
+        self.client.items.append(item(6, 1, "2026-01-08T00:01:00+00:00"))
+        self.client.items.append(item(7, 2, "2026-01-08T00:01:01+00:00"))
+
+        real_write_shard = build_feed_bundles.write_shard
+
+        def failing_write_shard(out_dir, key, page, payload):
+            if key == "source/1":
+                raise OSError("disk full")
+            return real_write_shard(out_dir, key, page, payload)
+
+        with mock.patch.object(build_feed_bundles, "write_shard", failing_write_shard):
+            stats = build_bundles(self.client, self.out, page_size=2)
+        self.assertEqual((stats["rebuilt"], stats["failed"]), (3, 1))
+        feeds = self.manifest()["feeds"]
+        self.assertEqual(feeds["source/1"], first["source/1"])
+        self.assertEqual(feeds["source/2"]["count"], 4)
+        for page in feeds["source/1"]["pages"]:
+            self.assertTrue(os.path.exists(os.path.join(self.out, page)))
+
+        # The watermark did not move past item 6, so the next run still picks it up
+        stats = build_bundles(self.client, self.out, page_size=2)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(self.manifest()["feeds"]["source/1"]["count"], 3)
+
+    def test_interrupted_shard_write_is_retried(self):
+        real_replace = os.replace
+
+        def replace_failing_on_json(src, dst):
+            if dst.endswith(".json") and "/source/1/" in dst:
+                raise OSError("interrupted")
+            real_replace(src, dst)
+
+        with mock.patch.object(build_feed_bundles.os, "replace", replace_failing_on_json):
+            stats = build_bundles(self.client, self.out, page_size=2)
+        self.assertEqual(stats["failed"], 1)
+        self.assertNotIn("source/1", self.manifest()["feeds"])
+
+        # Only the variants were in place, so the shard is not mistaken for complete
+        stats = build_bundles(self.client, self.out, page_size=2)
+        self.assertEqual((stats["failed"], stats["rebuilt"]), (0, 4))
+        for page in self.manifest()["feeds"]["source/1"]["pages"]:
+            for suffix in ("", ".gz"):
+                self.assertTrue(os.path.exists(os.path.join(self.out, page + suffix)))
+
+
+if __name__ == "__main__":
+    unittest.main()
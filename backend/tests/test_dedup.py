@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from dedup import fetch_existing_links
+from seen_index import SeenIndex
+
+
+class FakeNewsItems:
+    """Answers dedup's select(...).in_("link", chunk) on news_items."""
+
+    def __init__(self, links):
+        self.links = set(links)
+        self.queried = []
+        self.down = False
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self._chunk = list(values)
+        return self
+
+    def execute(self):
+        self.queried.append(self._chunk)
+        if self.down:
+            raise ConnectionError("Supabase unreachable")
+        return type("Response", (), {"data": [{"link": link} for link in self._chunk if link in self.links]})
+
+
+class FetchExistingLinksTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.index = SeenIndex(os.path.join(self.dir, "seen.sqlite3"))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_one_query_per_chunk_without_an_index(self):
+        client = FakeNewsItems(["https://a/1", "https://a/4"])
+        links = [f"https://a/{i}" for i in range(5)] + ["https://a/1", ""]
+
+        existing = fetch_existing_links(client, links, chunk_size=2)
+        self.assertEqual(existing, {"https://a/1", "https://a/4"})
+        self.assertEqual([len(chunk) for chunk in client.queried], [2, 2, 1])
+
+    def test_links_stored_elsewhere_are_found_despite_a_warm_index(self):
+        # Stored by another node or an import script, never seen by this index
+        client = FakeNewsItems(["https://a/1", "https://a/2"])
+        self.index.add(["https://a/1"])
+
+        existing = fetch_existing_links(client, ["https://a/1", "https://a/2", "https://a/3"], index=self.index)
+        self.assertEqual(existing, {"https://a/1", "https://a/2"})
+        # Only the links the index could not confirm were asked for
+        self.assertEqual(client.queried, [["https://a/2", "https://a/3"]])
+
+        # What Supabase confirmed is answered locally next time
+        client.queried.clear()
+        existing = fetch_existing_links(client, ["https://a/1", "https://a/2"], index=self.index)
+        self.assertEqual(existing, {"https://a/1", "https://a/2"})
+        self.assertEqual(client.queried, [])
+
+    def test_bloom_false_positive_still_asks_supabase(self):
+        client = FakeNewsItems(["https://a/2"])
+        self.index.bloom.bits = bytearray(b"\xff" * len(self.index.bloom.bits))
+
+        self.assertEqual(fetch_existing_links(client, ["https://a/2"], index=self.index), {"https://a/2"})
+        self.assertEqual(client.queried, [["https://a/2"]])
+
+    def test_failed_query_treats_links_as_new(self):
+        client = FakeNewsItems(["https://a/1"])
+        client.down = True
+        self.assertEqual(fetch_existing_links(client, ["https://a/1"], index=self.index), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
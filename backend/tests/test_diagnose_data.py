@@ -0,0 +1,124 @@
+import io
+import unittest
+from collections import Counter
+from contextlib import redirect_stdout
+from diagnose_data import stats_from_counts, stats_from_view, report
+
+
+class FakeQuery:
+    """The PostgREST filters diagnose_data uses, over a list of news_items rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.head = False
+        self.negate = False
+        self.column = None
+
+    def select(self, columns, count=None, head=False):
+        self.column = columns
+        self.head = head
+        return self
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def _filter(self, keep):
+        negate, self.negate = self.negate, False
+        self.rows = [row for row in self.rows if keep(row) != negate]
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row[column] == value)
+
+    def is_(self, column, value):
+        assert value == "null"
+        return self._filter(lambda row: row[column] is None)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row[column] > value)
+
+    def order(self, column):
+        self.rows = sorted(self.rows, key=lambda row: row[column])
+        return self
+
+    def limit(self, n):
+        self.rows = self.rows[:n]
+        return self
+
+    def execute(self):
+        data = [] if self.head else [{self.column: row[self.column]} for row in self.rows]
+        return type("Response", (), {"data": data, "count": len(self.rows)})
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        if name == "news_source_stats":
+            # What the view's GROUP BY source_name, source_id returns
+            groups = Counter((row["source_name"], row["source_id"]) for row in self.rows)
+            rows = [{"source_name": name, "source_id": source_id, "row_count": count}
+                    for (name, source_id), count in groups.items()]
+            return ViewQuery(rows)
+        return FakeQuery(self.rows)
+
+
+class ViewQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": self.rows})
+
+
+def rows(*groups):
+    """news_items rows from (source_name, source_id, count) groups."""
+    return [{"source_name": name, "source_id": source_id}
+            for name, source_id, count in groups for _ in range(count)]
+
+
+class DiagnoseDataTest(unittest.TestCase):
+    GROUPS = [
+        ("BBC News", 1, 3),
+        ("BBC News", None, 2),
+        ("BBC News", 7, 1),
+        ("Wired", 2, 4),
+        (None, 1, 2),
+        (None, None, 5),
+        ("Gone", None, 1),
+    ]
+
+    def test_paged_counts_match_the_view_including_null_names(self):
+        client = FakeClient(rows(*self.GROUPS))
+
+        by_counts = sorted(stats_from_counts(client), key=str)
+        by_view = sorted(stats_from_view(client), key=str)
+        self.assertEqual(by_counts, by_view)
+        self.assertEqual(by_counts, sorted(self.GROUPS, key=str))
+        self.assertEqual(sum(count for _, _, count in by_counts), len(client.rows))
+
+    def test_no_rows(self):
+        self.assertEqual(stats_from_counts(FakeClient([])), [])
+
+    def test_report_totals_count_rows_without_a_name(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            report(self.GROUPS, {"BBC News": 1, "Wired": 2, "Engadget": 3})
+        text = output.getvalue()
+
+        self.assertIn("MISSING NAME: 5 rows without source_name (source_id None)", text)
+        self.assertIn("MISSING NAME: 2 rows without source_name (source_id 1)", text)
+        self.assertIn("NULL ID: 'BBC News' has 2 rows without source_id", text)
+        self.assertIn("EMPTY: source 'Engadget' has no news_items", text)
+        # 1 wrong id + 2 + 5 nameless + 1 unknown name
+        self.assertIn("18 news_items rows, 2 with NULL source_id, 9 in 4 orphaned", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
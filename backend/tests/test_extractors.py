@@ -0,0 +1,90 @@
+import os
+import unittest
+from unittest import mock
+import extractors
+from http_fetch import Page
+from extractors import parse_bs4, parse_lxml, extract_article
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "article.html")
+URL = "https://news.example/transit"
+
+
+def make_page(content, encoding=None):
+    return Page(URL, URL, 200, content, encoding, len(content))
+
+
+def fixture_page(charset="utf-8", encoding=None):
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    html = html.replace('<meta charset="utf-8">', f'<meta charset="{charset}">')
+    return make_page(html.encode(charset), encoding)
+
+
+class ExtractorParityTest(unittest.TestCase):
+    def assert_same(self, page):
+        lxml_result = parse_lxml(page)
+        bs4_result = parse_bs4(page)
+        self.assertEqual(lxml_result.title, bs4_result.title)
+        self.assertEqual(lxml_result.published_time, bs4_result.published_time)
+        self.assertEqual(lxml_result.image_url, bs4_result.image_url)
+        self.assertEqual(" ".join(lxml_result.text.split()), " ".join(bs4_result.text.split()))
+        return lxml_result
+
+    def test_lxml_and_bs4_extract_the_same_fields(self):
+        extracted = self.assert_same(fixture_page())
+
+        self.assertEqual(extracted.title, "Council approves transit budget")
+        self.assertEqual(extracted.published_time, "2026-01-08T12:00:00Z")
+        self.assertEqual(extracted.image_url, "https://img.example/transit.jpg")
+        self.assertIn("two bus lines & extends tram service", extracted.text)
+        self.assertIn("“regional grant”\xa0from Zürich", extracted.text)
+        self.assertNotIn("not a paragraph", extracted.text)
+        self.assertNotIn("ad slot", extracted.text)
+
+    def test_meta_charset_and_header_encoding(self):
+        for page in (fixture_page("windows-1252"), fixture_page("windows-1252", "windows-1252")):
+            with self.subTest(encoding=page.encoding):
+                self.assertIn("Zürich", self.assert_same(page).text)
+
+    def test_missing_meta_tags(self):
+        page = make_page(b"<html><head><title> Plain page </title></head>"
+                         b"<body><p>One.</p><p>Two.</p></body></html>")
+
+        extracted = self.assert_same(page)
+        self.assertEqual(extracted, ("One. Two.", None, "Plain page", None))
+
+
+class ExtractArticleTest(unittest.TestCase):
+    def test_newspaper_failure_falls_through_to_lxml(self):
+        page = fixture_page()
+        with mock.patch.object(extractors, "extract_newspaper", side_effect=RuntimeError("parse error")):
+            text, image_url = extract_article(page)
+
+        self.assertEqual(text, parse_lxml(page).text)
+        self.assertEqual(image_url, "https://img.example/transit.jpg")
+
+    def test_short_newspaper_text_keeps_its_image(self):
+        page = fixture_page()
+        with mock.patch.object(extractors, "extract_newspaper", return_value=("Too short", "https://top.example/a.jpg", None)):
+            text, image_url = extract_article(page)
+
+        self.assertEqual(text, parse_lxml(page).text)
+        self.assertEqual(image_url, "https://top.example/a.jpg")
+
+    def test_lxml_failure_falls_through_to_bs4(self):
+        page = fixture_page()
+        with mock.patch.object(extractors, "extract_newspaper", side_effect=RuntimeError("parse error")), \
+                mock.patch.object(extractors, "extract_lxml", side_effect=ValueError("bad document")):
+            text, image_url = extract_article(page)
+
+        self.assertEqual(text, parse_bs4(page).text)
+        self.assertEqual(image_url, "https://img.example/transit.jpg")
+
+    def test_nothing_usable(self):
+        page = make_page(b"<html><body><div>No paragraphs</div></body></html>")
+        with mock.patch.object(extractors, "extract_newspaper", side_effect=RuntimeError("parse error")):
+            self.assertEqual(extract_article(page), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import shutil
+import calendar
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from feed_cache import FeedCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent.append(headers)
+        return self.responses.pop(0)
+
+
+class FeedCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = FeedCache(os.path.join(self.dir, "feeds.sqlite3"))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_only_304_counts_as_hit(self):
+        body = b"<rss/>"
+        session = FakeSession(
+            FakeResponse(200, body, {"ETag": '"v1"'}),
+            FakeResponse(200, body, {"ETag": '"v2"'}),
+            FakeResponse(304),
+        )
+        first = self.cache.fetch("s", "https://example.com/feed", session=session)
+        self.cache.commit(first)
+        # Validators sent, but the feed changed
+        second = self.cache.fetch("s", "https://example.com/feed", session=session)
+        self.cache.commit(second)
+        third = self.cache.fetch("s", "https://example.com/feed", session=session)
+
+        self.assertEqual(session.sent[1]["If-None-Match"], '"v1"')
+        self.assertIsNone(third.content)
+        stats = self.cache.run_stats["s"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_uncommitted_fetch_is_downloaded_again(self):
+        session = FakeSession(
+            FakeResponse(200, b"<rss/>", {"ETag": '"v1"'}),
+            FakeResponse(200, b"<rss/>", {"ETag": '"v1"'}),
+        )
+        self.cache.fetch("s", "https://example.com/feed", session=session)
+        # The cycle died before the caller committed
+        self.cache.fetch("s", "https://example.com/feed", session=session)
+        self.assertNotIn("If-None-Match", session.sent[1])
+
+
+class RetryTableTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = FeedCache(os.path.join(self.dir, "feeds.sqlite3"), retry_attempts=3)
+        self.published = datetime(2026, 10, 17, 8, 30, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def item(self, link, **fields):
+        return dict({"link": link, "title": f"Title {link}", "published_at": self.published}, **fields)
+
+    def links(self, source="s", entries=()):
+        entries, _ = self.cache.with_retries(source, list(entries))
+        return [entry.link for entry in entries]
+
+    def test_retries_come_back_before_the_feed_entries(self):
+        self.cache.retry_later("s", self.item("https://a/1", image_url="https://a/1.jpg"), failed=False)
+        self.cache.retry_later("other", self.item("https://b/1"), failed=True)
+
+        # On a 304 there are no feed entries, the retries still come back
+        retried = self.cache.retry_entries("s")
+        self.assertEqual([entry.link for entry in retried], ["https://a/1"])
+        self.assertEqual(retried[0].title, "Title https://a/1")
+        self.assertEqual(retried[0].media_content[0]["url"], "https://a/1.jpg")
+        self.assertEqual(calendar.timegm(retried[0].published_parsed), self.published.timestamp())
+
+        feed = [{"link": "https://a/1"}, {"link": "https://a/2"}]
+        entries, links = self.cache.with_retries("s", feed)
+        self.assertEqual([entry["link"] for entry in entries], ["https://a/1", "https://a/2"])
+        self.assertEqual(links, {"https://a/1"})
+
+    def test_failed_links_are_dropped_after_the_attempt_cap(self):
+        for _ in range(2):
+            self.cache.retry_later("s", self.item("https://a/bad"), failed=True)
+        # Deferring over the per-source cap is not an attempt
+        self.cache.retry_later("s", self.item("https://a/bad"), failed=False)
+        self.assertEqual(self.links(), ["https://a/bad"])
+
+        self.cache.retry_later("s", self.item("https://a/bad"), failed=True)
+        self.assertEqual(self.links(), [])
+
+    def test_resolve_removes_saved_links(self):
+        self.cache.retry_later("s", self.item("https://a/1"), failed=False)
+        self.cache.retry_later("s", self.item("https://a/2"), failed=True)
+        self.cache.resolve(["https://a/1"])
+        self.assertEqual(self.links(), ["https://a/2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import fetch_news
+from fetch_news import infer_url_date, filter_candidates
+from seen_index import SeenIndex
+from tests.test_dedup import FakeNewsItems
+
+# Stands in for newspaper's Article; filter_candidates only reads .url
+FakeArticle = namedtuple("FakeArticle", ["url"])
+
+
+def utc(*parts):
+    return datetime(*parts, tzinfo=timezone.utc)
+
+
+class InferUrlDateTest(unittest.TestCase):
+    def test_full_dates_count_until_the_end_of_the_day(self):
+        for url in ("https://example.com/2024/05/07/chip-stocks-rally/",
+                    "https://example.com/news/2024-05-07-chip-stocks-rally",
+                    "https://example.com/2024/05/07",
+                    "https://example.com/news/20240507/chip-stocks-rally"):
+            with self.subTest(url=url):
+                self.assertEqual(infer_url_date(url), utc(2024, 5, 8))
+
+    def test_month_only_dates_count_until_the_end_of_the_month(self):
+        self.assertEqual(infer_url_date("https://example.com/2024/05/chip-stocks-rally"), utc(2024, 6, 1))
+        self.assertEqual(infer_url_date("https://example.com/2024/12/year-in-review"), utc(2025, 1, 1))
+        self.assertEqual(infer_url_date("https://example.com/2024/12/31/new-year"), utc(2025, 1, 1))
+
+    def test_invalid_dates(self):
+        # Day 30 of February is no date; the month is still usable
+        self.assertEqual(infer_url_date("https://example.com/2024/02/30/story"), utc(2024, 3, 1))
+        for url in ("https://example.com/2024/13/01/story",
+                    "https://example.com/news/20241301/story",
+                    "https://example.com/news/20240500/story",
+                    "https://example.com/1999/05/07/story"):
+            with self.subTest(url=url):
+                self.assertIsNone(infer_url_date(url))
+
+    def test_undated_urls(self):
+        for url in ("https://example.com/news/world-europe-68912345",
+                    "https://example.com/story?date=/2024/05/07/",
+                    "https://example.com/20240507",
+                    "https://example.com/"):
+            with self.subTest(url=url):
+                self.assertIsNone(infer_url_date(url))
+
+
+class FilterCandidatesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.index = SeenIndex(os.path.join(self.dir, "seen.sqlite3"), window_days=7)
+        self.client = FakeNewsItems([])
+        patcher = mock.patch.multiple(fetch_news, supabase=self.client, seen_index=self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_drops_stale_duplicate_and_stored_links(self):
+        today = datetime.now(timezone.utc)
+        fresh = today.strftime("https://example.com/%Y/%m/%d/fresh")
+        self.client.links = {"https://example.com/stored"}
+        articles = [FakeArticle(url) for url in (
+            fresh,
+            "https://example.com/2020/01/02/stale",
+            "https://example.com/undated",
+            "https://example.com/undated",
+            "https://example.com/stored",
+        )]
+
+        candidates, stats = filter_candidates(articles, today - timedelta(days=1), "Example")
+        self.assertEqual([article.url for article in candidates], [fresh, "https://example.com/undated"])
+        self.assertEqual(stats, {"found": 5, "stale_url": 1, "existing": 1})
+
+    def test_seen_index_answers_inside_its_window(self):
+        self.index.add(["https://example.com/a"])
+        articles = [FakeArticle("https://example.com/a"), FakeArticle("https://example.com/b")]
+
+        candidates, _ = filter_candidates(articles, datetime.now(timezone.utc) - timedelta(days=2))
+        self.assertEqual([article.url for article in candidates], ["https://example.com/b"])
+        self.assertEqual(self.client.queried, [["https://example.com/b"]])
+
+    def test_longer_lookback_than_the_index_window_asks_supabase(self):
+        self.index.add(["https://example.com/a"])
+        self.client.links = {"https://example.com/a"}
+        articles = [FakeArticle("https://example.com/a"), FakeArticle("https://example.com/b")]
+
+        candidates, stats = filter_candidates(articles, datetime.now(timezone.utc) - timedelta(days=30))
+        self.assertEqual([article.url for article in candidates], ["https://example.com/b"])
+        self.assertEqual(stats["existing"], 1)
+        # Every link went to Supabase, including the one the index knows
+        self.assertEqual(self.client.queried, [["https://example.com/a", "https://example.com/b"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from google.api_core import exceptions
+from tests.fake_gemini import FakeGeminiModel, FakeResponse
+from gemini_batch import pack_batches, parse_batch_response, summarize_batch
+from gemini_scheduler import QuotaExhausted
+
+
+def article(i, sentences=3):
+    return " ".join(f"Article {i} sentence {n}." for n in range(sentences))
+
+
+def corpus(n):
+    return [(str(i), article(i)) for i in range(n)]
+
+
+class SingleCalls:
+    def __init__(self, model):
+        self.model = model
+        self.texts = []
+
+    def __call__(self, text):
+        self.texts.append(text)
+        return self.model.generate_content(f"Article Text: {text}").text
+
+
+class ExhaustedAfter(FakeGeminiModel):
+    """Fake model that raises `error` once `calls` requests went through."""
+
+    def __init__(self, calls, error):
+        super().__init__()
+        self.limit = calls
+        self.error = error
+
+    def generate_content(self, prompt, **kwargs):
+        if self.calls >= self.limit:
+            raise self.error
+        return super().generate_content(prompt, **kwargs)
+
+
+class PackBatchesTest(unittest.TestCase):
+    def test_splits_on_article_count(self):
+        batches = pack_batches(corpus(7), token_budget=100_000, max_articles=3)
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual([article_id for batch in batches for article_id, _ in batch],
+                         [str(i) for i in range(7)])
+
+    def test_splits_on_token_budget(self):
+        articles = [("small", "x" * 400), ("big", "x" * 40_000), ("after", "x" * 400)]
+        batches = pack_batches(articles, token_budget=2_000, max_articles=8)
+        self.assertEqual([[article_id for article_id, _ in batch] for batch in batches],
+                         [["small"], ["big"], ["after"]])
+
+
+class SummarizeBatchTest(unittest.TestCase):
+    def test_maps_summaries_back_to_ids(self):
+        model = FakeGeminiModel()
+        single = SingleCalls(model)
+        results, stats = summarize_batch(model, corpus(10), single, max_articles=4)
+
+        self.assertEqual(stats, {"articles": 10, "batch_calls": 3, "single_calls": 0})
+        for article_id, text in corpus(10):
+            self.assertEqual(results[article_id], FakeGeminiModel._summarize(text))
+        self.assertEqual(single.texts, [])
+
+    def test_partial_reply_retries_only_missing_ids(self):
+        model = FakeGeminiModel(drop_rate=0.3, malformed_rate=0.2, seed=3)
+        single = SingleCalls(model)
+        results, stats = summarize_batch(model, corpus(16), single, max_articles=8)
+
+        self.assertEqual(stats["batch_calls"], 2)
+        self.assertGreater(stats["single_calls"], 0)
+        self.assertLess(stats["single_calls"], 16)
+        self.assertEqual(len(single.texts), stats["single_calls"])
+        for article_id, text in corpus(16):
+            self.assertEqual(results[article_id], FakeGeminiModel._summarize(text))
+
+    def test_malformed_reply_falls_back_per_article(self):
+        model = FakeGeminiModel()
+
+        class Garbled:
+            def generate_content(self, prompt, **kwargs):
+                return FakeResponse('[{"id": "0", "summary": "trunc')
+
+        single = SingleCalls(model)
+        results, stats = summarize_batch(Garbled(), corpus(3), single)
+        self.assertEqual(stats["single_calls"], 3)
+        self.assertEqual(set(results), {"0", "1", "2"})
+        self.assertTrue(all(results.values()))
+
+    def test_quota_error_propagates_without_single_calls(self):
+        for error in (exceptions.ResourceExhausted("quota"), QuotaExhausted(0.0)):
+            model = ExhaustedAfter(1, error)
+            single = SingleCalls(FakeGeminiModel())
+            results = {}
+            with self.assertRaises(type(error)):
+                summarize_batch(model, corpus(8), single, max_articles=4, results=results)
+            # The first batch is kept, the second is left for the caller's fallback
+            self.assertEqual(set(results), {"0", "1", "2", "3"})
+            self.assertEqual(single.texts, [])
+
+
+class ParseBatchResponseTest(unittest.TestCase):
+    def test_drops_unknown_duplicate_and_empty_entries(self):
+        reply = ('```json\n[{"id": "a", "summary": "A."}, {"id": "a", "summary": "again"},'
+                 ' {"id": "zz", "summary": "Z."}, {"id": "b", "summary": " "}]```')
+        self.assertEqual(parse_batch_response(reply, {"a", "b"}), {"a": "A."})
+
+
+if __name__ == "__main__":
+    unittest.main()
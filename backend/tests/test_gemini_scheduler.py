@@ -0,0 +1,107 @@
+import time
+import asyncio
+import unittest
+from tests.fake_gemini import FakeGeminiModel
+from gemini_scheduler import GeminiScheduler, QuotaExhausted
+
+
+class SleepRecorder:
+    def __init__(self):
+        self.delays = []
+
+    def __call__(self, seconds):
+        self.delays.append(seconds)
+
+
+def make_scheduler(models, rpm=6000, max_wait=10):
+    sleep = SleepRecorder()
+    scheduler = GeminiScheduler([(name, rpm, 1_000_000) for name in models], models.get,
+                                max_wait=max_wait, sleep=sleep)
+    return scheduler, sleep
+
+
+class PacingTest(unittest.TestCase):
+    def test_single_model_is_paced_instead_of_exhausted(self):
+        model = FakeGeminiModel()
+        scheduler, sleep = make_scheduler({"primary": model}, rpm=15)
+        interval = 60 / (15 * 0.9)
+
+        for _ in range(30):
+            scheduler.generate_content("Article Text: One. Two. Three.")
+
+        self.assertEqual(model.calls, 30)
+        # The clock does not move while the fake sleep returns at once, so
+        # call k is booked k intervals ahead
+        self.assertEqual(len(sleep.delays), 29)
+        for k, delay in enumerate(sleep.delays, start=1):
+            self.assertAlmostEqual(delay, k * interval, delta=0.5)
+
+    def test_busy_primary_moves_to_secondary(self):
+        models = {"primary": FakeGeminiModel(), "secondary": FakeGeminiModel()}
+        scheduler, sleep = make_scheduler(models, rpm=1)
+
+        scheduler.generate_content("Article Text: a.")
+        scheduler.generate_content("Article Text: b.")
+
+        self.assertEqual(models["primary"].calls, 1)
+        self.assertEqual(models["secondary"].calls, 1)
+        self.assertEqual(sleep.delays, [])
+
+
+class CascadeTest(unittest.TestCase):
+    def test_quota_error_cascades_and_parks_primary(self):
+        models = {
+            "primary": FakeGeminiModel(quota_after=3, retry_seconds=120),
+            "secondary": FakeGeminiModel(),
+        }
+        scheduler, _ = make_scheduler(models)
+
+        for _ in range(10):
+            scheduler.generate_content("Article Text: a.")
+
+        # Three successes, one ResourceExhausted, then the primary stays parked
+        self.assertEqual(models["primary"].calls, 4)
+        self.assertEqual(models["primary"].quota_errors, 1)
+        self.assertEqual(models["secondary"].calls, 7)
+        self.assertEqual(scheduler.counters["primary"]["quota_errors"], 1)
+        self.assertGreater(scheduler.budgets[0].blocked_until, time.monotonic() + 100)
+        # Callers key their caches on the model that answered
+        self.assertEqual(scheduler.generate_content("Article Text: a.").model_name, "secondary")
+
+    def test_async_cascade(self):
+        models = {
+            "primary": FakeGeminiModel(quota_after=1),
+            "secondary": FakeGeminiModel(),
+        }
+        scheduler, _ = make_scheduler(models)
+
+        async def run():
+            for _ in range(4):
+                await scheduler.generate_content_async("Article Text: a.")
+
+        asyncio.run(run())
+        self.assertEqual(models["primary"].calls, 2)
+        self.assertEqual(models["secondary"].calls, 3)
+
+
+class FallbackTest(unittest.TestCase):
+    def test_raises_only_after_every_model_is_exhausted(self):
+        models = {
+            "primary": FakeGeminiModel(quota_after=0, retry_seconds=30),
+            "secondary": FakeGeminiModel(quota_after=0, retry_seconds=45),
+        }
+        scheduler, _ = make_scheduler(models)
+
+        with self.assertRaises(QuotaExhausted) as raised:
+            scheduler.generate_content("Article Text: a.")
+        self.assertAlmostEqual(raised.exception.retry_at - time.monotonic(), 30, delta=1)
+
+        # While both are parked the caller falls back without another request
+        with self.assertRaises(QuotaExhausted):
+            scheduler.generate_content("Article Text: b.")
+        self.assertEqual(models["primary"].calls, 1)
+        self.assertEqual(models["secondary"].calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import time
+import asyncio
+import threading
+import unittest
+from gemini_stream import GeminiStream
+
+
+class GeminiStreamTest(unittest.TestCase):
+    def test_on_done_runs_off_the_event_loop(self):
+        done = []
+
+        def on_done(job, result):
+            # Blocking persistence, like writer.add() and the SQLite caches
+            time.sleep(0.2)
+            done.append((job, result, threading.current_thread()))
+
+        async def work(job):
+            await asyncio.sleep(0.1)
+            return job * 2
+
+        async def run():
+            stream = GeminiStream(asyncio.get_running_loop(), work, on_done, max_in_flight=4)
+            jobs = range(4)
+            await asyncio.to_thread(lambda: [stream.append(job) for job in jobs])
+            started = time.perf_counter()
+            await stream.drain()
+            return stream, time.perf_counter() - started, threading.current_thread()
+
+        stream, elapsed, loop_thread = asyncio.run(run())
+        self.assertEqual(sorted((job, result) for job, result, _ in done), [(0, 0), (1, 2), (2, 4), (3, 6)])
+        self.assertTrue(all(thread is not loop_thread for _, _, thread in done))
+        self.assertEqual(stream.completed, 4)
+        # Four blocking on_done calls on the loop would take at least 0.8 s
+        self.assertLess(elapsed, 0.6)
+
+
+if __name__ == "__main__":
+    unittest.main()
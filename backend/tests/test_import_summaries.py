@@ -0,0 +1,140 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import local_cache
+from import_summaries import import_summaries, to_news_row
+
+SOURCE_IDS = {"BBC News": 1}
+
+
+class FakeClient:
+    """Records every news_items upsert; links in `failing` make their request fail once."""
+
+    def __init__(self, failing=()):
+        self.requests = []
+        self.failing = set(failing)
+
+    def table(self, name):
+        self._table = name
+        return self
+
+    def select(self, columns):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._rows = rows
+        return self
+
+    def execute(self):
+        if self._table == "sources":
+            return type("Response", (), {"data": [{"id": 1, "source_name": "BBC News"}]})
+        links = [row["link"] for row in self._rows]
+        if self.failing.intersection(links):
+            self.failing.difference_update(links)
+            raise ConnectionError("Supabase unreachable")
+        self.requests.append(links)
+
+
+def record(n, image=True):
+    return {"source": "BBC News", "headline": f"Story {n}", "summary": "Summary.",
+            "url": f"https://a/{n}", "date": "2026-01-08T00:00:00Z", "image": f"https://img/{n}.jpg" if image else None}
+
+
+class ToNewsRowTest(unittest.TestCase):
+    def test_file_and_column_spellings_and_group_fields(self):
+        row = to_news_row({"title": "Story", "summary_text": "Summary.", "link": "https://a/1",
+                           "published_at": "2026-01-08T00:00:00+00:00", "image": ""},
+                          {"source": "BBC News"}, SOURCE_IDS)
+        self.assertEqual(row, {"source_name": "BBC News", "title": "Story", "summary_text": "Summary.",
+                               "link": "https://a/1", "published_at": "2026-01-08T00:00:00+00:00",
+                               "source_id": 1})
+
+    def test_unknown_source_and_missing_date_are_allowed(self):
+        row = to_news_row({"source": "Elsewhere", "headline": "Story", "summary": "Summary.",
+                           "url": "http://a/1", "image": "https://img/1.jpg"}, None, SOURCE_IDS)
+        self.assertIsNone(row["source_id"])
+        self.assertIsNone(row["published_at"])
+        self.assertEqual(row["image_url"], "https://img/1.jpg")
+
+    def test_invalid_records(self):
+        cases = {
+            "invalid link": dict(record(1), url="ftp://a/1"),
+            "missing title": dict(record(1), headline="  "),
+            "missing summary_text": dict(record(1), summary=None),
+            "missing source_name": dict(record(1), source=None),
+            "invalid date": dict(record(1), date="yesterday"),
+        }
+        for message, bad in cases.items():
+            with self.subTest(message=message):
+                with self.assertRaisesRegex(ValueError, message):
+                    to_news_row(bad, None, SOURCE_IDS)
+
+
+class ImportSummariesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "summaries.ndjson")
+        patcher = mock.patch.object(local_cache, "CACHE_DIR", os.path.join(self.dir, "cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, records):
+        with open(self.path, "w", encoding="utf-8") as f:
+            for value in records:
+                f.write(json.dumps(value) + "\n")
+
+    def test_rows_with_and_without_images_go_in_separate_requests(self):
+        self.write([record(1), record(2, image=False), dict(record(3), url="bad"), record(4), record(5, image=False)])
+        client = FakeClient()
+
+        stats = import_summaries(self.path, batch_size=2, client=client)
+        self.assertEqual((stats.read, stats.invalid, stats.upserted, stats.failed), (5, 1, 4, 0))
+        self.assertEqual(client.requests, [["https://a/1", "https://a/4"], ["https://a/2", "https://a/5"]])
+
+    def test_resume_skips_committed_records_and_retries_a_failed_batch(self):
+        self.write([record(n, image=n % 3 != 0) for n in range(1, 9)])
+        client = FakeClient(failing={"https://a/4"})
+
+        stats = import_summaries(self.path, batch_size=2, client=client)
+        self.assertEqual(stats.failed, 2)
+        # 1-2 committed, then the batch with 4 failed
+        self.assertEqual(client.requests[0], ["https://a/1", "https://a/2"])
+
+        client.requests = []
+        stats = import_summaries(self.path, batch_size=2, client=client, resume=True)
+        self.assertEqual(stats.skipped, 3)
+        self.assertEqual(stats.failed, 0)
+        sent = sorted(link for request in client.requests for link in request)
+        self.assertEqual(sent, [f"https://a/{n}" for n in range(4, 9)])
+
+        client.requests = []
+        stats = import_summaries(self.path, batch_size=2, client=client, resume=True)
+        self.assertEqual((stats.skipped, stats.read, client.requests), (8, 0, []))
+
+    def test_changed_file_starts_over(self):
+        self.write([record(1), record(2)])
+        import_summaries(self.path, batch_size=2, client=FakeClient())
+        self.write([record(1), record(2), record(3)])
+        client = FakeClient()
+
+        stats = import_summaries(self.path, batch_size=2, client=client, resume=True)
+        self.assertEqual((stats.skipped, stats.upserted), (0, 3))
+
+    def test_dry_run_writes_no_checkpoint(self):
+        self.write([record(1), record(2)])
+        client = FakeClient()
+        import_summaries(self.path, batch_size=2, dry_run=True, client=client)
+
+        stats = import_summaries(self.path, batch_size=2, client=client, resume=True)
+        self.assertEqual((stats.skipped, stats.upserted), (0, 2))
+        self.assertEqual(client.requests, [["https://a/1", "https://a/2"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import os
+import json
+import unittest
+from json_stream import JsonStream, iter_records
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "grouped_news.json")
+# Small reads put chunk boundaries inside strings, escapes, numbers and literals
+CHUNK_SIZES = (1, 2, 3, 7, 64, 1 << 20)
+
+
+def expected_records(groups, stream_key="articles"):
+    """The pairs iter_records should yield, built from a json.load of the whole file."""
+    pairs = []
+    for value in groups:
+        if isinstance(value.get(stream_key), list):
+            group = {key: field for key, field in value.items() if key != stream_key}
+            pairs.extend((group, record) for record in value[stream_key])
+        else:
+            pairs.append((None, value))
+    return pairs
+
+
+class JsonStreamTest(unittest.TestCase):
+    def records(self, text, chunk_size):
+        return list(iter_records(io.StringIO(text), chunk_size=chunk_size))
+
+    def test_matches_json_load_at_every_chunk_size(self):
+        with open(FIXTURE, encoding="utf-8") as f:
+            text = f.read()
+        expected = expected_records(json.loads(text))
+
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.records(text, chunk_size), expected)
+
+    def test_escapes_split_across_chunks(self):
+        value = {"summary": "quote \" backslash \\ newline \n tab \t é 🚀 end"}
+        text = json.dumps(value)
+
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.records(text, chunk_size), [(None, value)])
+
+    def test_numbers_and_literals_at_the_window_edge(self):
+        stream = JsonStream(io.StringIO("[12345, true, null, -0.5e10]"), chunk_size=2)
+        values = list(stream.array_items(lambda: [stream.value()]))
+        self.assertEqual(values, [12345, True, None, -0.5e10])
+
+    def test_nested_objects_are_records_not_groups(self):
+        record = {"headline": "Nested", "meta": {"articles": [{"id": 1}], "tags": ["a", {"b": [None]}]}}
+        text = json.dumps([record])
+
+        for chunk_size in (1, 5, 1 << 20):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.records(text, chunk_size), [(None, record)])
+
+    def test_ndjson(self):
+        lines = [{"url": "https://example.com/1"}, {"source": "BBC", "articles": [{"url": "https://example.com/2"}]}]
+        text = "\n".join(json.dumps(line) for line in lines) + "\n"
+
+        self.assertEqual(self.records(text, 4), [
+            (None, {"url": "https://example.com/1"}),
+            ({"source": "BBC"}, {"url": "https://example.com/2"}),
+        ])
+
+    def test_truncated_trailing_record_raises_after_complete_ones(self):
+        text = '{"url": "https://example.com/1"}\n{"url": "https://example.com/2", "headline": "Cut o'
+
+        for chunk_size in (3, 1 << 20):
+            with self.subTest(chunk_size=chunk_size):
+                records = iter_records(io.StringIO(text), chunk_size=chunk_size)
+                self.assertEqual(next(records), (None, {"url": "https://example.com/1"}))
+                with self.assertRaises(ValueError):
+                    next(records)
+
+    def test_truncated_array_raises(self):
+        with self.assertRaises(ValueError):
+            self.records('[{"url": "https://example.com/1"},', 4)
+
+    def test_empty_inputs(self):
+        self.assertEqual(self.records("", 4), [])
+        self.assertEqual(self.records("  [ ]\n", 1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import re
+import unittest
+import numpy as np
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.summarizers.lex_rank import LexRankSummarizer
+from sumy.nlp.stemmers import Stemmer
+from sumy.utils import get_stop_words
+from lexrank_np import NumpyLexRank
+from tests.corpus import load_corpus
+
+
+class RegexTokenizer:
+    """Keeps the test independent of NLTK's punkt data."""
+    language = "english"
+
+    def to_sentences(self, paragraph):
+        return [s for s in re.split(r"(?<=[.!?])\s+", paragraph.strip()) if s]
+
+    def to_words(self, sentence):
+        return re.findall(r"[\w']+", sentence)
+
+
+def sumy_scores(summarizer, document):
+    """The scores LexRankSummarizer.__call__ computes before picking sentences."""
+    words = [summarizer._to_words_set(s) for s in document.sentences]
+    matrix = summarizer._create_matrix(words, summarizer.threshold,
+                                       summarizer._compute_tf(words), summarizer._compute_idf(words))
+    return summarizer.power_method(matrix, summarizer.epsilon)
+
+
+class NumpyLexRankTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        tokenizer = RegexTokenizer()
+        texts = load_corpus(12, 40) + [
+            # Short, single-sentence and repeated-sentence articles
+            " ".join(load_corpus(1, 3, seed=1)),
+            load_corpus(1, 1, seed=2)[0],
+            " ".join([load_corpus(1, 1, seed=3)[0]] * 3) + " " + load_corpus(1, 5, seed=4)[0],
+        ]
+        cls.documents = [PlaintextParser.from_string(text, tokenizer).document for text in texts]
+        stem = Stemmer("english")
+        stop_words = get_stop_words("english")
+        cls.reference = LexRankSummarizer(stem)
+        cls.reference.stop_words = stop_words
+        cls.vectorized = NumpyLexRank(stem, stop_words)
+
+    def test_scores_match_sumy(self):
+        for document, scores in zip(self.documents, self.vectorized.rate_batch(self.documents)):
+            np.testing.assert_allclose(scores, sumy_scores(self.reference, document), rtol=1e-9, atol=1e-12)
+
+    def test_selected_sentences_match_sumy(self):
+        batched = self.vectorized.summarize_batch(self.documents, 4)
+        self.assertEqual([self.vectorized(document, 4) for document in self.documents], batched)
+
+        identical = 0
+        for document, selected in zip(self.documents, batched):
+            expected = self.reference(document, 4)
+            identical += selected == expected
+            # Sentences whose scores tie to the last bit may be swapped
+            ratings = dict(zip(document.sentences, sumy_scores(self.reference, document)))
+            self.assertEqual(len(selected), len(expected))
+            np.testing.assert_allclose(sorted(ratings[s] for s in selected),
+                                       sorted(ratings[s] for s in expected), rtol=1e-9)
+        self.assertGreaterEqual(identical, len(self.documents) - 2)
+
+    def test_empty_document(self):
+        empty = PlaintextParser.from_string("", RegexTokenizer()).document
+        self.assertEqual(self.vectorized.summarize_batch([empty, self.documents[0]], 4),
+                         [(), self.reference(self.documents[0], 4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+import metrics
+from metrics import Counter, Histogram
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.registered = list(metrics._registry)
+        self.constant_labels = dict(metrics._constant_labels)
+        metrics._constant_labels.clear()
+
+    def tearDown(self):
+        metrics._registry[:] = self.registered
+        metrics._constant_labels.clear()
+        metrics._constant_labels.update(self.constant_labels)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("test_latency_seconds", "Test latency.", ("stage",), buckets=(1, 0.1, 5))
+        for value in (0.05, 0.1, 0.5, 3, 30):
+            histogram.observe(value, stage="fetch")
+
+        self.assertEqual(histogram.collect(), [
+            "# HELP lexis_test_latency_seconds Test latency.",
+            "# TYPE lexis_test_latency_seconds histogram",
+            'lexis_test_latency_seconds_bucket{stage="fetch",le="0.1"} 2',
+            'lexis_test_latency_seconds_bucket{stage="fetch",le="1"} 3',
+            'lexis_test_latency_seconds_bucket{stage="fetch",le="5"} 4',
+            'lexis_test_latency_seconds_bucket{stage="fetch",le="+Inf"} 5',
+            'lexis_test_latency_seconds_sum{stage="fetch"} 33.65',
+            'lexis_test_latency_seconds_count{stage="fetch"} 5',
+        ])
+
+    def test_histogram_time_observes_when_the_block_raises(self):
+        histogram = Histogram("test_block_seconds", "Test block.", ("stage",))
+        with self.assertRaises(ValueError):
+            with histogram.time(stage="parse"):
+                raise ValueError("boom")
+
+        self.assertIn('lexis_test_block_seconds_count{stage="parse"} 1', histogram.collect())
+
+    def test_label_values_are_escaped_and_none_labels_dropped(self):
+        counter = Counter("test_events_total", "Test events.", ("source", "stage"))
+        counter.inc(source='Le "Monde"\\Paris\nEdition')
+        metrics._constant_labels["pipeline"] = "main"
+
+        self.assertEqual(counter.collect()[-1],
+                         'lexis_test_events_total{pipeline="main",source="Le \\"Monde\\"\\\\Paris\\nEdition"} 1')
+
+    def test_write_textfile_replaces_the_file_atomically(self):
+        counter = Counter("test_written_total", "Test writes.")
+        counter.inc(3)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "lexis_test.prom")
+        with open(path, "w") as f:
+            f.write("# previous textfile\n")
+
+        metrics.write_textfile(path)
+
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        self.assertEqual(content, metrics.render())
+        self.assertIn("lexis_test_written_total 3\n", content)
+        self.assertNotIn("previous textfile", content)
+        self.assertEqual(os.listdir(directory), ["lexis_test.prom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from news_snapshot import Snapshot, SnapshotWriter, write_snapshot, SNAPSHOT_COLUMNS
+
+RECORDS = [
+    {"source": "TechCrunch", "headline": "Chip stocks rally", "summary": "Shares rose on Monday.",
+     "url": "https://example.com/a", "image": "https://example.com/a.jpg", "date": "2024-05-07"},
+    {"source": "Le Monde", "headline": "Élections européennes : les résultats",
+     "summary": "Le scrutin a eu lieu dimanche. Über 60 % — “record”.",
+     "url": "https://example.com/b", "image": None, "date": "2024-06-09"},
+    {"source": "TechCrunch", "headline": "日本の市場が上昇", "summary": "株価は月曜日に上昇した。🚀",
+     "url": "https://example.com/c", "image": "", "date": "2024-05-08"},
+    {"source": None, "headline": "No source", "summary": "", "url": "https://example.com/d",
+     "date": "2024-05-09"},
+]
+
+
+def expected(record):
+    return {name: record.get(name) for name, _ in SNAPSHOT_COLUMNS}
+
+
+class NewsSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "latest_news.snap")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_records_round_trip_in_order(self):
+        self.assertEqual(write_snapshot(self.path, RECORDS), len(RECORDS))
+
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), len(RECORDS))
+            self.assertEqual(snapshot.column_names, [name for name, _ in SNAPSHOT_COLUMNS])
+            self.assertEqual(list(snapshot), [expected(record) for record in RECORDS])
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_random_access_after_reopening(self):
+        write_snapshot(self.path, RECORDS)
+
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.row(2), expected(RECORDS[2]))
+            self.assertEqual(snapshot.row(-1), expected(RECORDS[-1]))
+            headlines = snapshot.column("headline")
+            self.assertEqual(headlines[1], "Élections européennes : les résultats")
+            self.assertEqual(headlines[0], "Chip stocks rally")
+            with self.assertRaises(IndexError):
+                headlines[len(RECORDS)]
+
+        with Snapshot(self.path) as snapshot:
+            sources = snapshot.column("source")
+            self.assertEqual(sources.rows_for("TechCrunch"), [0, 2])
+            self.assertEqual(sources.rows_for("Reuters"), [])
+            self.assertIsNone(sources[3])
+
+    def test_none_and_empty_strings_stay_distinct(self):
+        write_snapshot(self.path, RECORDS)
+
+        with Snapshot(self.path) as snapshot:
+            images = snapshot.column("image")
+            self.assertEqual(images[0], "https://example.com/a.jpg")
+            self.assertIsNone(images[1])
+            self.assertEqual(images[2], "")
+            self.assertIsNone(images[3])
+            self.assertEqual(snapshot.column("summary")[3], "")
+
+    def test_empty_snapshot(self):
+        SnapshotWriter(self.path).close()
+
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 0)
+            self.assertEqual(list(snapshot), [])
+            self.assertEqual(len(snapshot.column("headline")), 0)
+            self.assertEqual(snapshot.column("source").rows_for("TechCrunch"), [])
+            with self.assertRaises(IndexError):
+                snapshot.row(0)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"[]" + b"\0" * 64)
+
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from news_writer import NewsWriter, is_rejection
+
+
+class RowRejected(Exception):
+    """Stands in for postgrest's APIError, which carries the SQLSTATE or PGRST code in `code`."""
+
+    def __init__(self, code):
+        super().__init__(f"rejected ({code})")
+        self.code = code
+
+
+class FakeClient:
+    """Accepts upserts into news_items except links starting with 'bad', rejected with `code`."""
+
+    def __init__(self, code="23502"):
+        self.saved = {}
+        self.requests = []
+        self.down = False
+        self.code = code
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._rows = rows
+        return self
+
+    def execute(self):
+        rows = self._rows
+        self.requests.append((threading.current_thread().name, len(rows)))
+        if self.down:
+            raise ConnectionError("Supabase unreachable")
+        if any(row["link"].startswith("bad") for row in rows):
+            raise RowRejected(self.code)
+        for row in rows:
+            self.saved[row["link"]] = row
+
+
+def item(link):
+    return {"title": link, "source_name": "s", "summary_text": "x", "link": link}
+
+
+class NewsWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.spool = os.path.join(self.dir, "spool.sqlite3")
+        self.client = FakeClient()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def writer(self, **kwargs):
+        return NewsWriter(self.client, self.spool, flush_interval=3600, **kwargs)
+
+    def test_bad_row_does_not_block_the_batch_and_is_dead_lettered(self):
+        writer = self.writer(batch_size=10, max_attempts=3)
+        for link in ["a", "bad", "b"]:
+            writer.add(item(link))
+
+        self.assertFalse(writer.flush())
+        self.assertEqual(set(self.client.saved), {"a", "b"})
+        self.assertEqual(writer.pending, 1)
+
+        writer.add(item("c"))
+        self.assertFalse(writer.flush())
+        self.assertTrue(writer.flush())
+        self.assertEqual(set(self.client.saved), {"a", "b", "c"})
+        self.assertEqual(writer.pending, 0)
+
+        dead = writer._db.execute("SELECT link, attempts FROM dead_letter").fetchall()
+        self.assertEqual(dead, [("bad", 3)])
+        writer.close()
+
+    def test_postgrest_client_errors_are_rejections(self):
+        self.client.code = "PGRST204"
+        writer = self.writer(batch_size=10, max_attempts=1)
+        for link in ["a", "bad", "b"]:
+            writer.add(item(link))
+
+        self.assertTrue(writer.flush())
+        self.assertEqual(set(self.client.saved), {"a", "b"})
+        dead = writer._db.execute("SELECT link, attempts FROM dead_letter").fetchall()
+        self.assertEqual(dead, [("bad", 1)])
+        writer.close()
+
+    def test_error_codes(self):
+        for code in ("23502", "22P02", "42703", "PGRST100", "PGRST116", "PGRST204"):
+            with self.subTest(code=code):
+                self.assertTrue(is_rejection(RowRejected(code)))
+        for code in ("PGRST000", "PGRST002", "PGRST301", "PGRSTX00", "57014", "08006", "", None):
+            with self.subTest(code=code):
+                self.assertFalse(is_rejection(RowRejected(code)))
+        self.assertFalse(is_rejection(ConnectionError("Supabase unreachable")))
+
+    def test_outage_keeps_rows_without_charging_attempts(self):
+        writer = self.writer(batch_size=10)
+        writer.add(item("a"))
+        self.client.down = True
+        self.assertFalse(writer.flush())
+        self.assertFalse(writer.flush())
+        attempts = writer._db.execute("SELECT attempts FROM spool").fetchall()
+        self.assertEqual(attempts, [(0,)])
+
+        self.client.down = False
+        writer.close()
+        self.assertEqual(set(self.client.saved), {"a"})
+
+    def test_full_batch_flushes_on_the_writer_thread(self):
+        writer = self.writer(batch_size=2)
+        writer.add(item("a"))
+        writer.add(item("b"))
+        # add() only wakes the writer thread; the caller never waits on Supabase
+        deadline = time.monotonic() + 5
+        while not self.client.requests and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.client.requests, [("news-writer", 2)])
+        writer.close()
+        self.assertEqual(set(self.client.saved), {"a", "b"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import time
+import threading
+import unittest
+from unittest import mock
+from http_fetch import Page
+import rate_limit
+from rate_limit import HostRateLimiter
+
+
+def robots_page(body):
+    return Page("", "", 200, body.encode(), "utf-8", len(body))
+
+
+class CrawlDelayTest(unittest.TestCase):
+    def test_crawl_delay_caps_the_rate(self):
+        limiter = HostRateLimiter(rate=5, respect_crawl_delay=True)
+        with mock.patch.object(rate_limit, "fetch_page",
+                               return_value=robots_page("User-agent: *\nCrawl-delay: 4\n")):
+            bucket = limiter._bucket("example.com", None)
+        self.assertEqual(bucket.rate, 0.25)
+        self.assertEqual(bucket.burst, 1)
+
+    def test_unreadable_robots_is_cached_as_no_delay(self):
+        limiter = HostRateLimiter(rate=5, respect_crawl_delay=True)
+        with mock.patch.object(rate_limit, "fetch_page", side_effect=TimeoutError("timed out")) as fetch:
+            self.assertIsNone(limiter._crawl_delay("example.com"))
+            self.assertIsNone(limiter._crawl_delay("example.com"))
+            bucket = limiter._bucket("example.com", None)
+        # https, then the http fallback, and never again for this host
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(bucket.rate, 5)
+
+    def test_robots_follows_the_article_scheme(self):
+        limiter = HostRateLimiter(rate=5, respect_crawl_delay=True)
+        with mock.patch.object(rate_limit, "fetch_page",
+                               return_value=robots_page("User-agent: *\nCrawl-delay: 2\n")) as fetch:
+            limiter.wait("http://plain.example/story")
+        self.assertEqual(fetch.call_args.args[0], "http://plain.example/robots.txt")
+        self.assertEqual(limiter._buckets["plain.example"].rate, 0.5)
+
+    def test_https_robots_falls_back_to_http(self):
+        limiter = HostRateLimiter(rate=5, respect_crawl_delay=True)
+
+        def fetch(url, timeout=None):
+            if url.startswith("https://"):
+                raise ConnectionError("connection refused")
+            return robots_page("User-agent: *\nCrawl-delay: 4\n")
+
+        with mock.patch.object(rate_limit, "fetch_page", side_effect=fetch) as fetch_mock:
+            self.assertEqual(limiter._crawl_delay("plain.example"), 4)
+        self.assertEqual([call.args[0] for call in fetch_mock.call_args_list],
+                         ["https://plain.example/robots.txt", "http://plain.example/robots.txt"])
+
+    def test_slow_robots_does_not_block_other_hosts(self):
+        limiter = HostRateLimiter(rate=5, respect_crawl_delay=True)
+        release = threading.Event()
+
+        def fetch(url, timeout=None):
+            if "slow.example" in url:
+                release.wait(5)
+            return robots_page("User-agent: *\n")
+
+        with mock.patch.object(rate_limit, "fetch_page", side_effect=fetch):
+            slow = threading.Thread(target=limiter._bucket, args=("slow.example", None))
+            slow.start()
+            time.sleep(0.05)
+            started = time.monotonic()
+            limiter._bucket("fast.example", None)
+            elapsed = time.monotonic() - started
+            release.set()
+            slow.join()
+        self.assertLess(elapsed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import seed_loader
+from http_fetch import Page
+from seed_loader import load_payload, seed_items, to_seed_row
+
+PAGE = (b"<html><head><title>Fetched title</title>"
+        b"<meta property='og:image' content='https://img.example/fetched.jpg'></head>"
+        b"<body><p>Text.</p></body></html>")
+
+
+def news(n, **fields):
+    item = {"source": "TechCrunch", "headline": f"Curated {n}", "summary": "Summary.",
+            "url": f"https://news.example/{n}", "published_at": "2026-01-08T00:00:00Z",
+            "image": f"https://img.example/{n}.jpg"}
+    item.update(fields)
+    return item
+
+
+class FakeClient:
+    """sources lookup, dedup's select ... in_ on news_items, and upserts."""
+
+    def __init__(self, stored=()):
+        self.stored = {link: {"link": link} for link in stored}
+        self.upserts = []
+
+    def table(self, name):
+        self._table = name
+        self._upsert = None
+        return self
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self._links = list(values)
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._upsert = rows
+        return self
+
+    def execute(self):
+        if self._table == "sources":
+            data = [{"id": 7, "source_name": "TechCrunch"}]
+        elif self._upsert is not None:
+            self.upserts.append(self._upsert)
+            self.stored.update((row["link"], row) for row in self._upsert)
+            data = self._upsert
+        else:
+            data = [{"link": link} for link in self._links if link in self.stored]
+        return type("Response", (), {"data": data})
+
+
+def fetched(url, *args, **kwargs):
+    return Page(url, url, 200, PAGE, "utf-8", len(PAGE))
+
+
+class SeedLoaderTest(unittest.TestCase):
+    def seed(self, client, items, **kwargs):
+        with mock.patch.object(seed_loader, "fetch_page", side_effect=fetched) as fetch:
+            stats = seed_items(client, items, workers=2, **kwargs)
+        return stats, sorted(call.args[0] for call in fetch.call_args_list)
+
+    def test_only_incomplete_items_are_fetched(self):
+        client = FakeClient(stored=["https://news.example/1"])
+        items = [news(1), news(2, image=None), news(3, headline="")]
+
+        stats, fetched_urls = self.seed(client, items)
+        self.assertEqual(fetched_urls, ["https://news.example/2", "https://news.example/3"])
+        self.assertEqual(stats, {"items": 3, "fetched": 2, "new": 2, "updated": 1, "skipped": 0})
+        self.assertEqual(len(client.upserts), 1)
+        rows = {row["link"]: row for row in client.upserts[0]}
+        self.assertEqual(rows["https://news.example/1"]["image_url"], "https://img.example/1.jpg")
+        self.assertEqual(rows["https://news.example/2"]["image_url"], "https://img.example/fetched.jpg")
+        self.assertEqual(rows["https://news.example/2"]["title"], "Curated 2")
+        self.assertEqual(rows["https://news.example/3"]["title"], "Fetched title")
+        self.assertEqual(rows["https://news.example/3"]["source_id"], 7)
+
+    def test_prefer_fetched_title_fetches_everything(self):
+        client = FakeClient()
+        stats, fetched_urls = self.seed(client, [news(1), news(2)], prefer_fetched_title=True)
+
+        self.assertEqual(stats["fetched"], 2)
+        self.assertEqual({row["title"] for row in client.upserts[0]}, {"Fetched title"})
+        self.assertEqual({row["image_url"] for row in client.upserts[0]},
+                         {"https://img.example/1.jpg", "https://img.example/2.jpg"})
+
+    def test_without_enrichment_items_are_stored_as_given(self):
+        client = FakeClient()
+        items = [news(1), news(2, image=""), news(3, headline=None)]
+
+        stats, fetched_urls = self.seed(client, items, fetch_missing=False)
+        self.assertEqual(fetched_urls, [])
+        self.assertEqual((stats["fetched"], stats["skipped"]), (0, 1))
+        self.assertEqual(client.upserts[0], [to_seed_row(news(1), None, {"TechCrunch": 7}),
+                                             to_seed_row(news(2, image=""), None, {"TechCrunch": 7})])
+        self.assertIsNone(client.upserts[0][1]["image_url"])
+
+    def test_failed_fetch_keeps_the_curated_fields(self):
+        client = FakeClient()
+        with mock.patch.object(seed_loader, "fetch_page", side_effect=ConnectionError("refused")):
+            stats = seed_items(client, [news(1, image=None), news(2, headline=None)], workers=2)
+
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(client.upserts[0], [to_seed_row(news(1, image=None), None, {"TechCrunch": 7})])
+
+
+class LoadPayloadTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_json_files_and_seed_modules(self):
+        wrapped = os.path.join(self.dir, "wrapped.json")
+        plain = os.path.join(self.dir, "plain.json")
+        with open(wrapped, "w", encoding="utf-8") as f:
+            json.dump({"news": [news(1)]}, f)
+        with open(plain, "w", encoding="utf-8") as f:
+            json.dump([news(2)], f)
+
+        self.assertEqual(load_payload(wrapped), [news(1)])
+        self.assertEqual(load_payload(plain), [news(2)])
+        module = type(os)("fake_seed_module")
+        module.DATA = {"news": [news(3)]}
+        with mock.patch.dict("sys.modules", {"fake_seed_module": module}):
+            self.assertEqual(load_payload("fake_seed_module.py"), [news(3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
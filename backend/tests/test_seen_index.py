@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from seen_index import BloomFilter, SeenIndex
+
+
+class FakeNewsItems:
+    """Answers SeenIndex.rebuild()'s paged select on news_items."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        self._rows = list(self.rows)
+        return self
+
+    def select(self, columns):
+        return self
+
+    def gte(self, column, value):
+        self._rows = [row for row in self._rows if row[column] >= value]
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self._rows = self._rows[start:end + 1]
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": self._rows})
+
+
+def stored(link, days_ago):
+    published = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return {"link": link, "published_at": published.isoformat()}
+
+
+class BloomFilterTest(unittest.TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"https://example.com/{i}")
+
+        self.assertTrue(all(f"https://example.com/{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"https://other.example/{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class SeenIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "seen.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_cold_index_is_unsure_about_everything(self):
+        index = SeenIndex(self.path)
+        seen, unsure = index.lookup(["https://a/1", "https://a/2"])
+        self.assertEqual((seen, unsure), (set(), ["https://a/1", "https://a/2"]))
+
+    def test_warm_index_answers_only_for_stored_links(self):
+        index = SeenIndex(self.path, window_days=2)
+        index.rebuild(FakeNewsItems([stored("https://a/1", 1), stored("https://a/2", 0)]), page_size=1)
+
+        seen, unsure = index.lookup(["https://a/1", "https://a/2", "https://a/3"])
+        self.assertEqual(seen, {"https://a/1", "https://a/2"})
+        # Never recorded here: another node may have stored it, so the caller checks
+        self.assertEqual(unsure, ["https://a/3"])
+
+    def test_rebuild_window_leaves_older_rows_unsure(self):
+        index = SeenIndex(self.path, window_days=2)
+        total = index.rebuild(FakeNewsItems([stored("https://a/old", 5), stored("https://a/new", 1)]))
+
+        self.assertEqual(total, 1)
+        seen, unsure = index.lookup(["https://a/old", "https://a/new"])
+        self.assertEqual((seen, unsure), ({"https://a/new"}, ["https://a/old"]))
+
+    def test_expired_links_fall_out_of_the_index(self):
+        index = SeenIndex(self.path, window_days=2)
+        index.add(["https://a/1"])
+        index._db.execute("UPDATE seen SET seen_at = 0")
+        index._db.commit()
+
+        self.assertEqual(index.lookup(["https://a/1"]), (set(), ["https://a/1"]))
+        # Reopening drops the expired row for good
+        self.assertEqual(SeenIndex(self.path, window_days=2).stats()["size"], 0)
+
+    def test_bloom_false_positive_falls_through_to_unsure(self):
+        index = SeenIndex(self.path)
+        index.add(["https://a/1"])
+        # Every link now passes the Bloom filter; only the exact set can say yes
+        index.bloom.bits = bytearray(b"\xff" * len(index.bloom.bits))
+
+        seen, unsure = index.lookup(["https://a/1", "https://a/2"])
+        self.assertEqual((seen, unsure), ({"https://a/1"}, ["https://a/2"]))
+        self.assertEqual(index.counters["false_positives"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
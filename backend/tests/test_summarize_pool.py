@@ -0,0 +1,57 @@
+import os
+import shutil
+import asyncio
+import tempfile
+import unittest
+from summarize_pool import SummarizePool
+
+ARTICLE = (
+    "The city council approved a new budget for public transport on Monday. "
+    "The budget adds two bus lines and extends tram service into the evening. "
+    "Council members said the plan was funded by a regional grant. "
+    "Critics argued that ticket prices should have been lowered instead. "
+    "The first new bus line is expected to open in the spring. "
+    "Transport officials will publish the new timetables next month."
+)
+
+
+class SummarizePoolTest(unittest.TestCase):
+    def setUp(self):
+        # Workers open their own summary cache; keep it out of the real cache dir
+        self.dir = tempfile.mkdtemp()
+        self.previous = os.environ.get("LEXIS_CACHE_DIR")
+        os.environ["LEXIS_CACHE_DIR"] = self.dir
+
+    def tearDown(self):
+        if self.previous is None:
+            os.environ.pop("LEXIS_CACHE_DIR", None)
+        else:
+            os.environ["LEXIS_CACHE_DIR"] = self.previous
+        shutil.rmtree(self.dir)
+
+    def test_worker_summarizes_text_and_html(self):
+        html = "<html><body><article>" + "".join(
+            f"<p>{sentence}.</p>" for sentence in ARTICLE.split(". ")) + "</article></body></html>"
+
+        with SummarizePool(1) as pool:
+            summary, timings = pool.submit_text(ARTICLE, 2).result(timeout=120)
+
+            async def summarize_page():
+                return await pool.summarize_html(html, "https://example.com/a", 2)
+
+            page_summary, _ = asyncio.run(summarize_page())
+            repeat, _ = pool.submit_text(ARTICLE, 2).result(timeout=120)
+
+        self.assertTrue(summary)
+        self.assertLessEqual(len([s for s in summary.split(". ") if s]), 2)
+        self.assertTrue(all(sentence.strip(". ") in ARTICLE for sentence in summary.split(". ")))
+        self.assertIn("total", timings)
+        self.assertTrue(page_summary)
+        self.assertEqual(repeat, summary)
+        counters = pool.counters["lexrank"]
+        self.assertEqual(counters["hits"] + counters["misses"], 3)
+        self.assertGreaterEqual(counters["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
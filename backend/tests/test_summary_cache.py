@@ -0,0 +1,75 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from summary_cache import SummaryCache
+
+
+class SummaryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "summaries.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def stored_size(self, cache):
+        return cache._db.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+
+    def test_total_follows_puts_and_replacements(self):
+        cache = SummaryCache(self.path)
+        cache.put("article one", "gemini", "x" * 10)
+        cache.put("article two", "gemini", "y" * 20)
+        cache.put("Article  ONE", "gemini", "z" * 5)
+
+        self.assertEqual(cache._total, 25)
+        self.assertEqual(cache._total, self.stored_size(cache))
+        self.assertEqual(cache.get("article one", "gemini"), "z" * 5)
+
+    def test_least_recently_used_rows_are_evicted_over_the_cap(self):
+        cache = SummaryCache(self.path, max_bytes=25)
+        cache.put("a", "gemini", "a" * 10)
+        cache.put("b", "gemini", "b" * 10)
+        time.sleep(0.01)
+        cache.get("a", "gemini")
+        cache.put("c", "gemini", "c" * 10)
+
+        self.assertIsNone(cache.get("b", "gemini"))
+        self.assertEqual(cache.get("a", "gemini"), "a" * 10)
+        self.assertEqual(cache._total, 20)
+        self.assertEqual(cache._total, self.stored_size(cache))
+
+    def test_expired_rows_are_swept_every_n_puts(self):
+        cache = SummaryCache(self.path, sweep_every=3)
+        cache.put("old", "gemini", "o" * 10)
+        cache._db.execute("UPDATE summaries SET created_at = 0")
+        cache.put("new", "gemini", "n" * 10)
+        self.assertEqual(cache._total, 20)
+
+        cache.put("newer", "gemini", "n" * 10)
+        self.assertEqual(cache._total, 20)
+        self.assertEqual(cache._total, self.stored_size(cache))
+
+    def test_model_is_part_of_the_key(self):
+        cache = SummaryCache(self.path)
+        cache.put("article", "gemini", "from secondary", {"model": "secondary"})
+
+        self.assertIsNone(cache.get("article", "gemini", {"model": "primary"}))
+        self.assertEqual(cache.get("article", "gemini", {"model": "secondary"}), "from secondary")
+
+    def test_get_first_prefers_earlier_params_and_counts_one_lookup(self):
+        cache = SummaryCache(self.path)
+        models = [{"model": "primary"}, {"model": "secondary"}]
+        cache.put("one", "gemini", "one by secondary", {"model": "secondary"})
+        cache.put("two", "gemini", "two by secondary", {"model": "secondary"})
+        cache.put("two", "gemini", "two by primary", {"model": "primary"})
+
+        self.assertEqual(cache.get_first("one", "gemini", models), "one by secondary")
+        self.assertEqual(cache.get_first("two", "gemini", models), "two by primary")
+        self.assertIsNone(cache.get_first("three", "gemini", models))
+        self.assertEqual(cache.counters["gemini"], {"hits": 2, "misses": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()